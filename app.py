@@ -1,5 +1,9 @@
+import io
+import os
+import uuid
 import streamlit as st
 import pandas as pd
+import altair as alt
 import re
 from functools import partial
 import streamlit.components.v1 as components
@@ -10,8 +14,9 @@ import streamlit.components.v1 as components
 
 try:
     from utils.api_handler import generate_content
-    from utils.calculations import calculate_sample_size_proportion, calculate_sample_size_continuous, calculate_duration
+    from utils.calculations import uses_exact_proportion_test
     from utils.pdf_generator import create_pdf
+    from utils.pipeline import build_calculations
 except ImportError:
     # Define placeholder functions if utils are not available
     def generate_content(api_key, data, content_type):
@@ -33,16 +38,61 @@ except ImportError:
             return {"risks": [{"risk": "A potential risk.", "mitigation": "A potential mitigation."}]}
         return {"error": "Content generation utility is not available."}
 
-    def calculate_sample_size_proportion(current_value, min_detectable_effect, confidence, power):
-        return 1000
-    def calculate_sample_size_continuous(mean, std_dev, min_detectable_effect, confidence, power):
-        return 1200
-    def calculate_duration(sample_size, daily_active_users, coverage):
-        return 14
+    def uses_exact_proportion_test(current_value, min_detectable_effect, confidence, power):
+        return False
     def create_pdf(prd_data):
         return b"This is a placeholder PDF."
+    def build_calculations(intro_data, confidence, power, coverage, min_detectable_effect, **options):
+        return {"confidence": confidence, "power": power, "coverage": coverage, "min_detectable_effect": min_detectable_effect, "sample_size": 1000, "duration": 14}
 
 
+from utils.jobs import JobQueue, JobLimitError, FAILED, DEFAULT_WORKERS, DEFAULT_SESSION_LIMIT
+from utils.models import PRD, Hypothesis, PRDSections, Calculations, Risk
+from utils.session_governor import SessionData, SessionGovernor, DEFAULT_BUDGET_BYTES
+
+try:
+    from utils.prd_store import PRDStore
+    STORE_AVAILABLE = True
+except ImportError:
+    STORE_AVAILABLE = False
+
+try:
+    from utils.similarity_index import SimilarityIndex, DEFAULT_THRESHOLD
+    SIMILARITY_AVAILABLE = True
+except ImportError:
+    SIMILARITY_AVAILABLE = False
+
+try:
+    from utils.forecasting import read_dau_history, fit_dau_forecast, plan_duration, calculations_forecast, describe_forecast, describe_duration
+    FORECAST_AVAILABLE = True
+except ImportError:
+    FORECAST_AVAILABLE = False
+
+try:
+    from utils.sequential import SPENDING_LABELS, MAX_LOOKS
+    SEQUENTIAL_AVAILABLE = True
+except ImportError:
+    SEQUENTIAL_AVAILABLE = False
+
+try:
+    from utils.bayesian import BetaPosterior, NormalInverseGamma, compare, simulate_time_to_decision
+    BAYESIAN_AVAILABLE = True
+except ImportError:
+    BAYESIAN_AVAILABLE = False
+
+try:
+    from utils.variance import read_event_chunks, estimate_metric_variance
+    VARIANCE_AVAILABLE = True
+except ImportError:
+    VARIANCE_AVAILABLE = False
+
+try:
+    from utils.portfolio import read_portfolio_csv, plan_portfolio, planned_experiments, REQUIRED_COLUMNS, TEMPLATE_CSV
+    from utils.scheduler import schedule_experiments
+    PORTFOLIO_AVAILABLE = True
+except ImportError:
+    PORTFOLIO_AVAILABLE = False
+
 try:
     from scipy.stats import norm
     CALCULATIONS_AVAILABLE = True
@@ -54,163 +104,37 @@ except ImportError as e:
 st.set_page_config(layout="wide", initial_sidebar_state="collapsed")
 
 # --- Custom CSS for a Polished UI ---
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap');
-    
-    /* --- HIDE DEFAULT STREAMLIT UI --- */
-    section[data-testid="stSidebar"] {
-        display: none !important;
-    }
-    button[data-testid="stSidebarNavCollapseButton"] {
-        display: none !important;
-    }
-    div[data-testid="stAppViewContainer"] {
-        margin-top: -6rem; /* Adjust this value as needed */
-    }
-    /* --- APP HEADER STYLES --- */
-    .app-header {
-        text-align: center;
-        padding: 1rem 0;
-        margin-bottom: 1rem;
-    }
-    .app-header h1 {
-        font-size: 2.5rem;
-        font-weight: 700;
-        color: #e0e0e0;
-        margin: 0;
-    }
-    .app-header p {
-        font-size: 1.1rem;
-        color: #8b949e;
-        margin: 0;
-    }
-
-    /* --- TOPBAR STYLES --- */
-    .top-nav {
-        display: flex;
-        justify-content: center;
-        align-items: center;
-        padding: 10px 0;
-        border-bottom: 1px solid #30363d;
-        margin-bottom: 2rem;
-    }
-    .nav-button {
-        background-color: transparent;
-        border: 2px solid #30363d;
-        color: #8b949e;
-        font-weight: bold;
-        padding: 8px 16px;
-        margin: 0 5px;
-        border-radius: 8px;
-        text-align: center;
-        white-space: nowrap;
-    }
-    .nav-button.complete-stage {
-        border-color: #216d33;
-        color: #c9d1d9;
-    }
-    .nav-button.active-stage {
-        background-color: #216d33;
-        color: white;
-        border-color: #2ea043;
-    }
-
-    /* --- MOBILE TOPBAR STYLES --- */
-    @media (max-width: 768px) {
-        .top-nav {
-            justify-content: flex-start;
-            overflow-x: auto;
-            -ms-overflow-style: none;
-            scrollbar-width: none;
-        }
-        .top-nav::-webkit-scrollbar {
-            display: none;
-        }
-    }
-    
-    /* --- GENERAL STYLES --- */
-    html, body, [class*="st-"] {
-        font-family: 'Roboto', sans-serif;
-    }
-    
-    .main .block-container {
-        padding-top: 0 !important;
-    }
-    
-    .stButton > button {
-        background-color: #216d33;
-        color: white;
-        border-radius: 8px;
-        border: none;
-        padding: 10px 20px;
-        transition: transform 0.2s;
-    }
-    
-    .stButton > button:hover {
-        background-color: #2ea043;
-        transform: scale(1.05);
-    }
-    
-    /* Additional restored styles */
-    .st-emotion-cache-18ni7ap, .st-emotion-cache-1r6r8k {
-        background-color: transparent !important;
-    }
-    .st-emotion-cache-z5fcl4 {
-        background-color: #0d1117;
-        color: #f0f0f0;
-    }
-    h1, h2, h3, h4, h5, h6 {
-        color: #e0e0e0;
-    }
-    .st-emotion-cache-6qob1r {
-        background-color: #161b22;
-        border-radius: 10px;
-        padding: 20px;
-        border: 1px solid #30363d;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.2);
-    }
-    .st-expander details {
-        background-color: #161b22;
-        border: 1px solid #30363d;
-        border-radius: 8px;
-        padding: 10px;
-    }
-    .st-expander details summary {
-        color: #c9d1d9;
-    }
-    .css-1cpxqw2 {
-        background-color: #161b22;
-        border: 1px solid #30363d;
-        border-radius: 8px;
-        color: #c9d1d9;
-    }
-    .stAlert {
-        border-radius: 8px;
-    }
-</style>
-""", unsafe_allow_html=True)
+@st.cache_data
+def load_css():
+    """Reads the app stylesheet once per server process instead of on every rerun."""
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "style.css")) as f:
+        return f.read()
+
+st.markdown(f"<style>\n{load_css()}</style>", unsafe_allow_html=True)
 
 
 
 # --- Constants & State Management ---
 STAGES = ["Intro", "Hypothesis", "PRD", "Calculations", "Review"]
+JOB_POLL_SECONDS = 1
 if "stage" not in st.session_state:
     st.session_state.stage = "Intro"
-if "prd_data" not in st.session_state:
-    st.session_state.prd_data = {
-        "intro_data": {},
-        "hypothesis": {},
-        "prd_sections": {},
-        "calculations": {},
-        "risks": []
-    }
 if "editing_section" not in st.session_state:
     st.session_state.editing_section = None
 if "editing_risk" not in st.session_state:
     st.session_state.editing_risk = None
 if "scroll_to_top" not in st.session_state:
     st.session_state.scroll_to_top = False
+if "prd_id" not in st.session_state:
+    st.session_state.prd_id = None
+if "session_key" not in st.session_state:
+    st.session_state.session_key = uuid.uuid4().hex
+if "session_data" not in st.session_state:
+    st.session_state.session_data = SessionData()  # the PRD and hypotheses, held via the session governor
+if "jobs" not in st.session_state:
+    st.session_state.jobs = {}  # job kind -> job id
+if "job_errors" not in st.session_state:
+    st.session_state.job_errors = {}  # job kind -> last error message
 
 
 def scroll_to_top():
@@ -225,8 +149,13 @@ def scroll_to_top():
     )
 
 # --- Helper & Callback Functions ---
+def session_data():
+    """This session's PRD and hypotheses; reading them restores them if they were spilled to disk."""
+    return st.session_state.session_data
+
 def next_stage():
     """Navigates to the next stage in the process."""
+    cancel_session_jobs()
     st.session_state.scroll_to_top = True
     st.session_state.editing_section = None
     st.session_state.editing_risk = None
@@ -258,11 +187,12 @@ def set_editing_risk(risk_index):
 def save_edit(section_title):
     """Saves changes to a PRD section from its text area in the modal."""
     edited_text = st.session_state[f"text_area_{section_title}"]
-    original_content = st.session_state.prd_data["prd_sections"][section_title]
-    if isinstance(original_content, list):
-        st.session_state.prd_data["prd_sections"][section_title] = [line.strip("- ").strip() for line in edited_text.split('\n') if line.strip()]
+    sections = session_data().prd.sections
+    if isinstance(sections[section_title], list):
+        sections[section_title] = [line.strip("- ").strip() for line in edited_text.split('\n') if line.strip()]
     else:
-        st.session_state.prd_data["prd_sections"][section_title] = edited_text
+        sections[section_title] = edited_text
+    session_data().changed()
     
     st.session_state.editing_section = None # Close the modal
     cleaned_label = str(section_title).replace("_", " ").title()
@@ -272,19 +202,19 @@ def save_risk_edit(risk_index):
     """Saves changes to a specific risk from the dialog."""
     edited_risk = st.session_state[f"text_area_risk_{risk_index}"]
     edited_mitigation = st.session_state[f"text_area_mitigation_{risk_index}"]
-    st.session_state.prd_data["risks"][risk_index] = {
-        "risk": edited_risk,
-        "mitigation": edited_mitigation
-    }
+    session_data().prd.risks[risk_index] = Risk(risk=edited_risk, mitigation=edited_mitigation)
+    session_data().changed()
     st.session_state.editing_risk = None # Close the modal
     st.success(f"Changes to Risk {risk_index + 1} saved!")
 
 def save_summary_edit():
     """Saves changes to the executive summary."""
-    st.session_state.prd_data["intro_data"]["business_goal"] = st.session_state.summary_business_goal
-    st.session_state.prd_data["hypothesis"]["Statement"] = st.session_state.summary_hypothesis
-    st.session_state.prd_data["intro_data"]["user_persona"] = st.session_state.summary_user_persona
-    st.session_state.prd_data["intro_data"]["app_description"] = st.session_state.summary_app_description
+    prd = session_data().prd
+    prd.intro.business_goal = st.session_state.summary_business_goal
+    prd.hypothesis.statement = st.session_state.summary_hypothesis
+    prd.intro.user_persona = st.session_state.summary_user_persona
+    prd.intro.app_description = st.session_state.summary_app_description
+    session_data().changed()
     st.session_state.editing_section = None # Close the modal
     st.success("Executive Summary updated!")
 
@@ -295,10 +225,169 @@ def format_content_for_display(content):
     else:
         return str(content)
 
+@st.cache_resource
+def get_prd_store():
+    """Opens the shared PRD store once per server process."""
+    return PRDStore()
+
+@st.cache_resource
+def get_similarity_index():
+    """Builds the hypothesis reuse index once per server process, warmed from saved PRDs."""
+    index = SimilarityIndex(threshold=float(st.secrets.get("SIMILARITY_THRESHOLD", DEFAULT_THRESHOLD)))
+    if STORE_AVAILABLE:
+        index.add_many(get_prd_store().iter_intro_hypotheses())
+    return index
+
+@st.cache_resource
+def get_job_queue():
+    """One generation worker pool shared by every session on this server."""
+    return JobQueue(
+        workers=int(st.secrets.get("JOB_WORKERS", DEFAULT_WORKERS)),
+        session_limit=int(st.secrets.get("JOBS_PER_SESSION", DEFAULT_SESSION_LIMIT)),
+    )
+
+@st.cache_resource
+def get_session_governor():
+    """Accounts every session's working state against one memory budget, spilling idle sessions to the PRD store."""
+    budget_mb = st.secrets.get("SESSION_MEMORY_BUDGET_MB")
+    return SessionGovernor(
+        store=get_prd_store() if STORE_AVAILABLE else None,
+        budget_bytes=int(float(budget_mb) * 2**20) if budget_mb else DEFAULT_BUDGET_BYTES,
+    )
+
+def start_job(kind, data, mode=None):
+    """
+    Queues an LLM generation for this session without blocking the script thread.
+    `data` is usually a prompt view over the session's PRD; it is read, not copied.
+    """
+    if kind in st.session_state.jobs:
+        return
+    try:
+        job = get_job_queue().submit(
+            st.session_state.session_key, kind,
+            generate_content, st.secrets["GROQ_API_KEY"], data, mode or kind,
+        )
+    except JobLimitError as e:
+        st.session_state.job_errors[kind] = str(e)
+        return
+    st.session_state.job_errors.pop(kind, None)
+    st.session_state.jobs[kind] = job.id
+
+def cancel_job(kind):
+    """Cancels this session's running job of the given kind."""
+    job_id = st.session_state.jobs.pop(kind, None)
+    if job_id:
+        get_job_queue().cancel(job_id)
+        get_job_queue().forget(job_id)
+        st.session_state.job_errors[kind] = "Generation cancelled."
+
+def cancel_session_jobs():
+    """Cancels everything this session has in flight, e.g. when the user navigates away."""
+    get_job_queue().cancel_session(st.session_state.session_key)
+    st.session_state.jobs = {}
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def poll_job(kind, label, on_success):
+    """Auto-refreshing progress for a background job; applies its result once it finishes."""
+    job_id = st.session_state.jobs.get(kind)
+    job = get_job_queue().get(job_id) if job_id else None
+    if job is None:
+        st.session_state.jobs.pop(kind, None)
+        st.rerun()
+    if not job.done:
+        col1, col2 = st.columns([10, 1])
+        with col1:
+            st.info(f"⏳ {label}...")
+        with col2:
+            st.button("Cancel", key=f"cancel_job_{kind}", on_click=cancel_job, args=(kind,))
+        return
+
+    del st.session_state.jobs[kind]
+    get_job_queue().forget(job.id)
+    result = job.result or {}
+    if job.status == FAILED or "error" in result:
+        st.session_state.job_errors[kind] = job.error or result["error"]
+    else:
+        on_success(result)
+    st.rerun()
+
+def render_job(kind, label, on_success):
+    """Polls the session's job of this kind, or shows why the last one failed."""
+    if kind in st.session_state.jobs:
+        poll_job(kind, label, on_success)
+    elif kind in st.session_state.job_errors:
+        st.error(st.session_state.job_errors[kind])
+
+def generate_hypotheses():
+    """Queues fresh hypotheses for the current intro data."""
+    start_job("hypotheses", session_data().prd.intro)
+
+def apply_hypotheses(hypotheses):
+    """Stores generated hypotheses, records them for future reuse and leaves the intro stage."""
+    session_data().hypotheses = hypotheses
+    st.session_state.pop("reused_hypotheses", None)
+    if SIMILARITY_AVAILABLE:
+        get_similarity_index().add(session_data().prd.intro, hypotheses)
+    if st.session_state.stage == "Intro":
+        next_stage()
+
+def apply_custom_hypothesis(enriched_data):
+    session_data().custom_hypothesis = enriched_data
+
+def apply_prd_sections(prd_sections):
+    session_data().prd.sections = PRDSections.from_dict(prd_sections)
+    session_data().changed()
+
+def apply_risks(generated_risks):
+    session_data().prd.risks = [Risk.from_dict(r) for r in generated_risks.get("risks", [])]
+    session_data().changed()
+
+def retry_job(kind):
+    st.session_state.job_errors.pop(kind, None)
+
+def save_current_prd():
+    """Saves the current PRD, updating the stored copy if it was saved or loaded before."""
+    try:
+        st.session_state.prd_id = get_prd_store().save(
+            session_data().prd.to_dict(),
+            hypotheses=session_data().hypotheses,
+            prd_id=st.session_state.prd_id,
+        )
+        st.success("PRD saved!")
+    except Exception as e:
+        st.error(f"Could not save PRD: {e}")
+
+def load_saved_prd(prd_id):
+    """Loads a stored PRD into the session and jumps to the furthest completed stage; False if it is gone."""
+    document = get_prd_store().load(prd_id)
+    if document is None:
+        st.error("That PRD no longer exists.")
+        return False
+
+    cancel_session_jobs()
+    hypotheses = document.pop("hypotheses", None)
+    session_data().prd = PRD.from_dict(document)
+    if hypotheses:
+        session_data().hypotheses = hypotheses
+    st.session_state.pop("reused_hypotheses", None)
+    st.session_state.prd_id = prd_id
+
+    prd = session_data().prd
+    if "sample_size" in prd.calculations:
+        st.session_state.stage = "Review"
+    elif prd.sections:
+        st.session_state.stage = "Calculations"
+    elif prd.hypothesis:
+        st.session_state.stage = "PRD"
+    elif hypotheses:
+        st.session_state.stage = "Hypothesis"
+    st.session_state.scroll_to_top = True
+    return True
+
 @st.dialog("Edit Section")
 def edit_section_dialog(section_title):
     """A dialog to edit a PRD section."""
-    content = st.session_state.prd_data["prd_sections"][section_title]
+    content = session_data().prd.sections[section_title]
     cleaned_label = section_title.replace("_", " ").title()
     
     st.text_area(
@@ -315,10 +404,10 @@ def edit_section_dialog(section_title):
 @st.dialog("Edit Risk")
 def edit_risk_dialog(risk_index):
     """A dialog to edit a risk and its mitigation."""
-    risk_item = st.session_state.prd_data["risks"][risk_index]
+    risk_item = session_data().prd.risks[risk_index]
     
-    st.text_area("Risk", value=risk_item['risk'], height=100, key=f"text_area_risk_{risk_index}")
-    st.text_area("Mitigation", value=risk_item['mitigation'], height=100, key=f"text_area_mitigation_{risk_index}")
+    st.text_area("Risk", value=risk_item.risk, height=100, key=f"text_area_risk_{risk_index}")
+    st.text_area("Mitigation", value=risk_item.mitigation, height=100, key=f"text_area_mitigation_{risk_index}")
 
     if st.button("Save Changes", key=f"save_dialog_risk_{risk_index}"):
         save_risk_edit(risk_index)
@@ -327,11 +416,11 @@ def edit_risk_dialog(risk_index):
 @st.dialog("Edit Executive Summary")
 def edit_summary_dialog():
     """A dialog to edit the executive summary fields."""
-    prd = st.session_state.prd_data
-    st.text_input("Business Goal", value=prd['intro_data'].get('business_goal', ''), key="summary_business_goal")
-    st.text_area("Hypothesis", value=prd['hypothesis'].get('Statement', ''), key="summary_hypothesis")
-    st.text_area("Target User Persona (Optional)", value=prd['intro_data'].get('user_persona', ''), key="summary_user_persona")
-    st.text_area("App Description (Optional)", value=prd['intro_data'].get('app_description', ''), key="summary_app_description")
+    prd = session_data().prd
+    st.text_input("Business Goal", value=prd.intro.business_goal or '', key="summary_business_goal")
+    st.text_area("Hypothesis", value=prd.hypothesis.statement or '', key="summary_hypothesis")
+    st.text_area("Target User Persona (Optional)", value=prd.intro.user_persona or '', key="summary_user_persona")
+    st.text_area("App Description (Optional)", value=prd.intro.app_description or '', key="summary_app_description")
     if st.button("Save Changes", key="save_summary_dialog"):
         save_summary_edit()
         st.rerun()
@@ -347,10 +436,9 @@ def render_header():
         </div>
     """, unsafe_allow_html=True)
 
-def render_topbar():
-    """Renders the horizontal top navigation bar as a non-interactive progress indicator."""
-    current_stage_index = STAGES.index(st.session_state.stage)
-    
+@st.cache_data
+def build_topbar_html(current_stage_index):
+    """Builds the topbar markup; there is one variant per stage, so it is cached."""
     button_html_list = []
     for i, stage in enumerate(STAGES):
         class_list = "nav-button"
@@ -362,9 +450,34 @@ def render_topbar():
         button_html_list.append(f'<div class="{class_list}">{stage}</div>')
         
     all_buttons_html = "".join(button_html_list)
-    top_nav_html = f'<div class="top-nav">{all_buttons_html}</div>'
-    
-    st.markdown(top_nav_html, unsafe_allow_html=True)
+    return f'<div class="top-nav">{all_buttons_html}</div>'
+
+def render_topbar():
+    """Renders the horizontal top navigation bar as a non-interactive progress indicator."""
+    st.markdown(build_topbar_html(STAGES.index(st.session_state.stage)), unsafe_allow_html=True)
+
+
+@st.fragment
+def render_saved_prds():
+    """
+    Renders search over previously saved PRDs with a load button for each result.
+    Typing a query reruns only this search; loading a PRD reruns the app at its stage.
+    """
+    with st.expander("📂 Load a Saved PRD"):
+        query = st.text_input("Search saved PRDs", placeholder="e.g., social proof checkout", key="saved_prd_query")
+        results = get_prd_store().search(query, limit=10)
+        if not results:
+            st.caption("No saved PRDs found.")
+        for item in results:
+            col1, col2 = st.columns([10, 1])
+            with col1:
+                st.markdown(f"**{item['title']}**")
+                st.caption(f"{item.get('product_area') or 'N/A'} · {item.get('key_metric') or 'N/A'} · {pd.to_datetime(item['updated_at'], unit='s'):%Y-%m-%d}")
+                if item.get("snippet"):
+                    st.markdown(item["snippet"])
+            with col2:
+                if st.button("Load", key=f"load_prd_{item['id']}") and load_saved_prd(item["id"]):
+                    st.rerun()
 
 
 def render_intro_page():
@@ -373,6 +486,9 @@ def render_intro_page():
         **Welcome!** Let's start by gathering some high-level details about your A/B test. 
         The more context you provide, the better the generated hypotheses and PRD will be.
     """)
+
+    if STORE_AVAILABLE:
+        render_saved_prds()
     
     if "GROQ_API_KEY" not in st.secrets:
         st.error("Groq API key not found. Please add it to your Streamlit secrets to run this app.")
@@ -381,37 +497,44 @@ def render_intro_page():
     def process_intro_form():
         """Callback to process the intro form, generate hypotheses, and move to the next stage."""
         # Safely get values from session_state
-        # Safely get values from session_state
-        st.session_state.prd_data["intro_data"]["business_goal"] = st.session_state.intro_business_goal
-        st.session_state.prd_data["intro_data"]["key_metric"] = st.session_state.intro_key_metric
-        st.session_state.prd_data["intro_data"]["product_area"] = st.session_state.intro_product_area
-        st.session_state.prd_data["intro_data"]["metric_type"] = st.session_state.intro_metric_type
-        st.session_state.prd_data["intro_data"]["current_value"] = st.session_state.intro_current_value
-        st.session_state.prd_data["intro_data"]["target_value"] = st.session_state.intro_target_value
-        st.session_state.prd_data["intro_data"]["dau"] = st.session_state.intro_dau
-        st.session_state.prd_data["intro_data"]["product_type"] = st.session_state.intro_product_type
-        st.session_state.prd_data["intro_data"]["user_persona"] = st.session_state.intro_user_persona
-        st.session_state.prd_data["intro_data"]["app_description"] = st.session_state.intro_app_description
+        intro = session_data().prd.intro
+        intro.business_goal = st.session_state.intro_business_goal
+        intro.key_metric = st.session_state.intro_key_metric
+        intro.product_area = st.session_state.intro_product_area
+        intro.metric_type = st.session_state.intro_metric_type
+        intro.current_value = st.session_state.intro_current_value
+        intro.target_value = st.session_state.intro_target_value
+        intro.dau = st.session_state.intro_dau
+        intro.product_type = st.session_state.intro_product_type
+        intro.user_persona = st.session_state.intro_user_persona
+        intro.app_description = st.session_state.intro_app_description
         
         if st.session_state.get("intro_metric_type") == "Continuous":
-            st.session_state.prd_data["intro_data"]["std_dev"] = st.session_state.get("intro_std_dev")
+            intro.std_dev = st.session_state.get("intro_std_dev")
+        session_data().changed()
         
         required_fields = ["business_goal", "key_metric", "metric_type", "current_value", "product_area", "target_value", "dau", "product_type"]
-        if st.session_state.prd_data["intro_data"]["metric_type"] == "Continuous":
+        if intro.metric_type == "Continuous":
             required_fields.append("std_dev")
 
-        if all(st.session_state.prd_data["intro_data"].get(field) for field in required_fields):
-            with st.spinner("Generating hypotheses..."):
-                hypotheses = generate_content(st.secrets["GROQ_API_KEY"], st.session_state.prd_data["intro_data"], "hypotheses")
-                if "error" in hypotheses:
-                    st.error(hypotheses["error"])
-                else:
-                    st.session_state.hypotheses = hypotheses
-                    next_stage()
+        if all(intro.get(field) for field in required_fields):
+            # Offer hypotheses from a near-identical earlier experiment before paying for an LLM call.
+            match = get_similarity_index().query(intro) if SIMILARITY_AVAILABLE else None
+            if match:
+                session_data().hypotheses = match.hypotheses
+                st.session_state.reused_hypotheses = {"score": match.score, "business_goal": match.intro_data.get("business_goal")}
+                next_stage()
+            else:
+                generate_hypotheses()
         else:
             st.error("Please fill out all the fields to continue.")
 
+    if VARIANCE_AVAILABLE:
+        render_event_variance_estimator()
 
+    # Seeded here rather than through `value=`, since the variance estimator writes these keys too.
+    st.session_state.setdefault("intro_current_value", 50.0)
+    st.session_state.setdefault("intro_std_dev", 10.0)
 
     with st.form("intro_form"):
         st.subheader("Business & Product Details")
@@ -424,10 +547,10 @@ def render_intro_page():
             
 
             st.selectbox("Metric Type", ["Proportion", "Continuous"], key="intro_metric_type", help="Proportion metrics are percentages (e.g., Conversion Rate). Continuous metrics are numerical averages (e.g., ARPDAU).")
-            st.number_input("Current Metric Value", min_value=0.0, value=50.0, key="intro_current_value")
+            st.number_input("Current Metric Value", min_value=0.0, key="intro_current_value")
             
             if st.session_state.get("intro_metric_type") == "Continuous":
-                st.number_input("Standard Deviation", min_value=0.0, value=10.0, key="intro_std_dev", help="The standard deviation of your metric.")
+                st.number_input("Standard Deviation", min_value=0.0, key="intro_std_dev", help="The standard deviation of your metric.")
         with col2:
             st.text_input("Product Area",placeholder="e.g., New user onboarding flow", key="intro_product_area")
             
@@ -442,6 +565,64 @@ def render_intro_page():
 
         st.form_submit_button("Generate Hypotheses", on_click=process_intro_form)
 
+    render_job("hypotheses", "Generating hypotheses", apply_hypotheses)
+
+
+@st.cache_data(max_entries=4)
+def estimate_event_variance(data, unit_column, value_column, denominator_column):
+    """Streams an uploaded event CSV through the clustered variance engine once per file and column choice."""
+    columns = [c for c in (unit_column, value_column, denominator_column) if c]
+    return estimate_metric_variance(read_event_chunks(io.BytesIO(data), columns), unit_column, value_column, denominator_column)
+
+
+def apply_event_variance(result):
+    """Fills the intro form with a continuous metric's mean and per-unit standard deviation."""
+    st.session_state.intro_metric_type = "Continuous"
+    st.session_state.intro_current_value = round(result.mean, 4)
+    st.session_state.intro_std_dev = round(result.std_dev, 4)
+
+
+@st.fragment
+def render_event_variance_estimator():
+    """Estimates a ratio or per-event metric's standard deviation from raw events; uploads rerun only this fragment."""
+    with st.expander("📊 Estimate Standard Deviation from Event Data (Optional)"):
+        st.caption(
+            "For ratio metrics (e.g. revenue per session) or metrics measured per event but randomised per user, "
+            "a standard deviation taken over events understates the real variance. Upload one row per event to get "
+            "the per-user standard deviation the sample size calculation needs."
+        )
+        upload = st.file_uploader("Event CSV", type="csv", key="variance_events")
+        if upload is None:
+            return
+        try:
+            columns = list(pd.read_csv(io.BytesIO(upload.getvalue()), nrows=0).columns)
+        except (ValueError, pd.errors.ParserError) as e:
+            st.error(f"Could not read the file: {e}")
+            return
+
+        col1, col2, col3 = st.columns(3)
+        unit_column = col1.selectbox("Randomisation Unit (e.g. user_id)", columns, key="variance_unit")
+        value_column = col2.selectbox("Metric Value (e.g. revenue)", columns, index=min(1, len(columns) - 1), key="variance_value")
+        denominator_column = col3.selectbox(
+            "Denominator (e.g. sessions)", [None] + columns, format_func=lambda c: "One per event" if c is None else c, key="variance_denominator",
+        )
+        try:
+            result = estimate_event_variance(upload.getvalue(), unit_column, value_column, denominator_column)
+        except ValueError as e:
+            st.error(f"Could not estimate variance: {e}")
+            return
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Metric Mean", f"{result.mean:,.4g}")
+        col2.metric("Std Dev per User", f"{result.std_dev:,.4g}")
+        col3.metric("Naive Std Dev (per event)", f"{result.naive_std_dev:,.4g}")
+        col4.metric("Design Effect", f"{result.design_effect:.2f}", help="How much clustering inflates the variance compared with independent events.")
+        st.caption(f"{result.events:,} events from {result.units:,} units ({result.events_per_unit:.1f} per unit).")
+        # A full rerun is needed so the form below picks up the new values.
+        if st.button("Use as Current Value and Standard Deviation", key="variance_apply"):
+            apply_event_variance(result)
+            st.rerun()
+
 
 def render_hypothesis_page():
     st.header("Step 2: Hypotheses 🧠")
@@ -450,7 +631,8 @@ def render_hypothesis_page():
     """)
 
     def select_hypothesis(hypothesis_data):
-        st.session_state.prd_data["hypothesis"] = hypothesis_data
+        session_data().prd.hypothesis = Hypothesis.from_dict(hypothesis_data)
+        session_data().changed()
         st.session_state.hypotheses_selected = True
         st.success(f"You have selected: {hypothesis_data['Statement']}")
         next_stage()
@@ -461,30 +643,37 @@ def render_hypothesis_page():
             st.error("Please write a custom hypothesis first.")
             return
 
-        with st.spinner("Generating from custom hypothesis..."):
-            context = {"custom_hypothesis": custom_hypothesis, **st.session_state.prd_data["intro_data"]}
-            enriched_data = generate_content(st.secrets["GROQ_API_KEY"], context, "enrich_hypothesis")
-            if "error" in enriched_data:
-                st.error(enriched_data["error"])
-            else:
-                st.session_state.custom_hypothesis_generated = enriched_data
-                st.success("Your custom hypothesis has been generated!")
+        context = session_data().prd.prompt_view(include_hypothesis=False, custom_hypothesis=custom_hypothesis)
+        start_job("enrich_hypothesis", context)
 
     def lock_custom_hypothesis():
-        enriched = st.session_state.get("custom_hypothesis_generated")
+        enriched = session_data().custom_hypothesis
         if enriched:
-            st.session_state.prd_data["hypothesis"] = enriched
+            session_data().prd.hypothesis = Hypothesis.from_dict(enriched)
+            session_data().changed()
             st.session_state.hypotheses_selected = True
             st.success("Custom hypothesis locked!")
             next_stage()
 
+    if "reused_hypotheses" in st.session_state:
+        reused = st.session_state.reused_hypotheses
+        st.info(f"""
+            These suggestions were reused from a similar earlier experiment ("{reused['business_goal']}", {reused['score']:.0%} match)
+            instead of being generated from scratch.
+        """)
+        st.button("Generate Fresh Hypotheses", on_click=generate_hypotheses, key="regenerate_hypotheses_btn")
+        stats = get_similarity_index().stats()
+        st.caption(f"Reuse hit rate: {stats['hit_rate']:.0%} over {stats['queries']:,} lookups ({stats['entries']:,} indexed experiments).")
+    render_job("hypotheses", "Generating fresh hypotheses", apply_hypotheses)
+
     st.subheader("Write Your Own Hypothesis")
     st.text_area("Your Custom Hypothesis", placeholder="e.g., I hypothesize that...", key="custom_hypothesis_input")
     st.button("Generate from Custom", on_click=generate_from_custom, key="gen_custom_btn")
+    render_job("enrich_hypothesis", "Generating from custom hypothesis", apply_custom_hypothesis)
 
-    if "custom_hypothesis_generated" in st.session_state:
+    enriched = session_data().custom_hypothesis
+    if enriched is not None:
         st.subheader("Generated Hypothesis Details")
-        enriched = st.session_state.custom_hypothesis_generated
         st.markdown(f"**Statement:** {enriched.get('Statement', 'N/A')}")
         st.markdown(f"**Rationale:** {enriched.get('Rationale', 'N/A')}")
         st.markdown(f"**Behavioral Basis:** {enriched.get('Behavioral Basis', 'N/A')}")
@@ -493,9 +682,9 @@ def render_hypothesis_page():
     st.write("---")
     
     st.subheader("Or, Select from our suggestions")
-    if 'hypotheses' in st.session_state and isinstance(st.session_state.hypotheses, dict):
-        cols = st.columns(len(st.session_state.hypotheses))
-        for i, (name, data) in enumerate(st.session_state.hypotheses.items()):
+    if isinstance(session_data().hypotheses, dict):
+        cols = st.columns(len(session_data().hypotheses))
+        for i, (name, data) in enumerate(session_data().hypotheses.items()):
             with cols[i]:
                 with st.container(border=True):
                     st.subheader(f"Hypothesis {i+1}")
@@ -506,95 +695,354 @@ def render_hypothesis_page():
                     st.button(f"Select & Continue", key=f"select_{i}", on_click=select_hypothesis, args=(data,))
 
 
+@st.cache_data(max_entries=32)
+def build_pdf(snapshot):
+    """
+    Renders the PDF once per distinct PRD instead of on every rerun of the export section.
+    Keyed on the PRD's binary snapshot, which is far cheaper to hash than the nested dict.
+    """
+    return create_pdf(PRD.from_bytes(snapshot).to_dict())
+
+
+@st.fragment
+def render_prd_section(key, button_prefix):
+    """Renders one editable PRD section; editing it reruns only this section."""
+    content = session_data().prd.sections[key]
+    cleaned_label = key.replace("_", " ").title()
+    if st.session_state.editing_section == key:
+        edit_section_dialog(key)
+    with st.container(border=True):
+        col1, col2 = st.columns([10, 1])
+        with col1:
+             st.subheader(f"**{cleaned_label}**")
+        with col2:
+            st.button("✏️", key=f"{button_prefix}_{key}", on_click=set_editing_section, args=(key,))
+        st.markdown(format_content_for_display(content))
+
+
 def render_prd_page():
     st.header("Step 3: PRD Draft ✍️")
     st.info("We've drafted the core sections of your PRD. Please review, edit, and finalize them.")
     
-    if not st.session_state.prd_data.get("prd_sections"):
-        with st.spinner("Drafting PRD sections..."):
-            prd_context = {**st.session_state.prd_data["intro_data"], **st.session_state.prd_data["hypothesis"]}
-            raw_prd_sections = generate_content(st.secrets["GROQ_API_KEY"], prd_context, "prd_sections")
-            if "error" in raw_prd_sections:
-                st.error(raw_prd_sections["error"])
-            else:
-                st.session_state.prd_data["prd_sections"] = raw_prd_sections
-
-    prd_sections = st.session_state.prd_data.get("prd_sections", {})
-    for key, content in prd_sections.items():
-        cleaned_label = key.replace("_", " ").title()
-        if st.session_state.editing_section == key:
-            edit_section_dialog(key)
-        with st.container(border=True):
-            col1, col2 = st.columns([10, 1])
-            with col1:
-                 st.subheader(f"**{cleaned_label}**")
-            with col2:
-                st.button("✏️", key=f"edit_{key}", on_click=set_editing_section, args=(key,))
-            st.markdown(format_content_for_display(content))
+    if not session_data().prd.sections:
+        if "prd_sections" not in st.session_state.job_errors:
+            start_job("prd_sections", session_data().prd.prompt_view())
+        render_job("prd_sections", "Drafting PRD sections", apply_prd_sections)
+        if "prd_sections" in st.session_state.job_errors:
+            st.button("Try Again", on_click=retry_job, args=("prd_sections",), key="retry_prd_sections")
+
+    for key in session_data().prd.sections:
+        render_prd_section(key, "edit")
 
     st.write("---")
     st.button("Save & Continue to Calculations", on_click=next_stage, key="to_calcs")
 
 
-def render_calculations_page():
-    st.header("Step 4: Experiment Calculations 📊")
-    st.info("""
-        Verify the inputs below to calculate your required sample size and duration.
-    """)
+@st.cache_data(max_entries=8)
+def fit_dau_history(data):
+    """Fits the seasonal DAU forecast once per distinct uploaded history."""
+    return fit_dau_forecast(read_dau_history(io.BytesIO(data)))
 
-    intro_data = st.session_state.prd_data["intro_data"]
-    dau = intro_data.get("dau", 10000)
-    current_value = intro_data.get("current_value", 50.0)
-    metric_type = intro_data.get("metric_type", "Proportion")
-
-    st.subheader("Key Metrics")
-    st.markdown(f"**Key Metric:** {intro_data.get('key_metric', 'N/A')}")
-    st.markdown(f"**Metric Type:** {metric_type}")
-    st.markdown(f"**Current Value:** {current_value}")
-    if metric_type == "Continuous":
-        st.markdown(f"**Standard Deviation:** {intro_data.get('std_dev', 'N/A')}")
 
+@st.fragment
+def render_calculation_inputs(intro_data):
+    """Sliders, calculation and results; moving a slider reruns only this fragment."""
     st.subheader("Experiment Parameters")
     st.slider("Confidence Level (%)", 50, 99, 95, 1, key="calc_confidence")
     st.slider("Power Level (%)", 50, 99, 80, 1, key="calc_power")
     st.slider("Coverage (%)", 5, 100, 50, 5, key="calc_coverage")
     st.number_input("Minimum Detectable Effect (%)", min_value=0.1, value=5.0, step=0.1, key="calc_mde")
 
+    dau_history = None
+    if FORECAST_AVAILABLE:
+        with st.expander("📈 Traffic Forecast (Optional)"):
+            st.caption("Upload daily DAU history to forecast eligible users with weekday seasonality and trend instead of a constant DAU.")
+            dau_history = st.file_uploader("DAU History CSV (date, dau columns)", type="csv", key="calc_dau_history")
+            st.date_input("Planned Start Date", key="calc_start_date")
+            st.checkbox("Round duration up to whole weeks", key="calc_whole_weeks", help="Stopping mid-week over-weights some weekdays.")
+
+    if SEQUENTIAL_AVAILABLE:
+        with st.expander("⏱️ Interim Analyses (Optional)"):
+            st.caption("Plan looks at the data before the end. Alpha-spending boundaries keep the false positive rate at the chosen confidence level.")
+            st.number_input("Number of Looks (including the final analysis)", min_value=1, max_value=MAX_LOOKS, value=1, step=1, key="calc_looks")
+            st.selectbox("Alpha Spending", list(SPENDING_LABELS), format_func=SPENDING_LABELS.get, key="calc_spending",
+                         help="O'Brien-Fleming keeps early looks strict; Pocock spreads alpha evenly but inflates the maximum sample size more.")
+
+    if BAYESIAN_AVAILABLE:
+        with st.expander("🎲 Bayesian Planning & Monitoring (Optional)"):
+            render_bayesian_panel(intro_data)
+
     def perform_calculations():
         try:
-            st.session_state.prd_data["calculations"]["confidence"] = st.session_state.calc_confidence / 100
-            st.session_state.prd_data["calculations"]["power"] = st.session_state.calc_power / 100
-            st.session_state.prd_data["calculations"]["coverage"] = st.session_state.calc_coverage
-            st.session_state.prd_data["calculations"]["min_detectable_effect"] = st.session_state.calc_mde
-
-            if metric_type == "Proportion":
-                sample_size = calculate_sample_size_proportion(current_value, st.session_state.calc_mde, st.session_state.calc_confidence / 100, st.session_state.calc_power / 100)
-            else:
-                sample_size = calculate_sample_size_continuous(current_value, intro_data.get("std_dev"), st.session_state.calc_mde, st.session_state.calc_confidence / 100, st.session_state.calc_power / 100)
-            
-            duration = calculate_duration(sample_size, dau, st.session_state.calc_coverage)
-            st.session_state.prd_data["calculations"]["sample_size"] = sample_size
-            st.session_state.prd_data["calculations"]["duration"] = duration
+            options = {}
+            if FORECAST_AVAILABLE:
+                options.update({
+                    "dau_forecast": fit_dau_history(dau_history.getvalue()) if dau_history is not None else None,
+                    "start_date": st.session_state.get("calc_start_date"),
+                    "whole_weeks": st.session_state.get("calc_whole_weeks", False),
+                })
+            if SEQUENTIAL_AVAILABLE:
+                options.update({
+                    "sequential_looks": st.session_state.get("calc_looks", 1),
+                    "sequential_spending": st.session_state.get("calc_spending", "obrien_fleming"),
+                })
+            session_data().prd.calculations = Calculations.from_dict(build_calculations(
+                intro_data,
+                confidence=st.session_state.calc_confidence / 100,
+                power=st.session_state.calc_power / 100,
+                coverage=st.session_state.calc_coverage,
+                min_detectable_effect=st.session_state.calc_mde,
+                **options,
+            ))
+            session_data().changed()
             st.success("Calculations complete!")
         except Exception as e:
             st.error(f"Error in calculations: {e}")
 
-    st.button("Calculate", on_click=perform_calculations, key="calc_btn")
+    # Run from the fragment body rather than as a callback so messages render in place.
+    if st.button("Calculate", key="calc_btn"):
+        perform_calculations()
 
-    if "sample_size" in st.session_state.prd_data["calculations"]:
+    calculations = session_data().prd.calculations
+    if calculations.sample_size is not None:
         st.subheader("Results")
-        sample_size = st.session_state.prd_data['calculations']['sample_size']
-        duration = st.session_state.prd_data['calculations']['duration']
+        sample_size = calculations.sample_size
+        duration = calculations.duration
         st.info(f"**Required Sample Size per Variant:** {sample_size:,}")
-        st.info(f"**Estimated Experiment Duration:** {duration} days")
-        st.button("Continue to Final Review", on_click=next_stage, key="to_review")
+        if intro_data.get("metric_type", "Proportion") == "Proportion" and uses_exact_proportion_test(
+            intro_data.get("current_value", 50.0), calculations.min_detectable_effect, calculations.confidence, calculations.power
+        ):
+            st.caption("Sized for an exact test: so few conversions are expected that the normal approximation is unreliable.")
+        st.info(f"**Estimated Experiment Duration:** {describe_duration(duration) if FORECAST_AVAILABLE else f'{duration} days'}")
+        if FORECAST_AVAILABLE:
+            _, end_date = plan_duration(calculations, intro_data)
+            if end_date and calculations.start_date:
+                st.caption(f"Runs {calculations.start_date} to {end_date.isoformat()}. {describe_forecast(calculations_forecast(calculations, intro_data))}.")
+        if SEQUENTIAL_AVAILABLE and calculations.sequential:
+            render_sequential_plan(calculations.sequential, sample_size)
+        # Changing stage needs a full app rerun, which a callback inside a fragment would not trigger.
+        if st.button("Continue to Final Review", key="to_review"):
+            next_stage()
 
 
-def render_final_review_page():
-    st.header("Step 5: Final Review & Export 🎉")
-    st.info("Your complete PRD is ready. Review, polish, and export.")
+@st.cache_data(max_entries=64)
+def bayesian_decision_times(metric_type, baseline, std_dev, min_detectable_effect, daily_users, max_days, probability, loss):
+    """Simulated time-to-decision with the MDE as the true effect and with no effect, plus the share decided by each day."""
+    results = {}
+    for scenario, effect in (("Effect = MDE", None), ("No effect", 0)):
+        simulation = simulate_time_to_decision(
+            metric_type, baseline, min_detectable_effect, daily_users, max_days,
+            std_dev=std_dev, true_effect=effect, probability_threshold=probability, loss_threshold=loss,
+        )
+        decided = [simulation.decided_by(day) for day in range(1, max_days + 1)]
+        results[scenario] = (simulation.summary, decided)
+    return results
+
+
+def render_bayesian_panel(intro_data):
+    """Bayesian time-to-decision planning and a live posterior comparison; runs inside the calculations fragment."""
+    metric_type = intro_data.get("metric_type", "Proportion")
+    baseline = intro_data.get("current_value", 50.0)
+    std_dev = intro_data.get("std_dev")
+    daily_users = int(intro_data.get("dau", 10000) * st.session_state.calc_coverage / 100 / 2)
+
+    st.markdown("**Time to Decision**")
+    st.caption(
+        "Simulates experiments day by day and stops each once the leading arm is probably best "
+        "and picking it would cost less than the loss tolerance. Uses the intro's DAU, the coverage and the MDE above."
+    )
+    col1, col2, col3 = st.columns(3)
+    col1.slider("Decision Threshold: P(Best) (%)", 80, 99, 95, 1, key="bayes_probability")
+    col2.number_input("Loss Tolerance (% of baseline)", min_value=0.01, max_value=10.0, value=0.1, step=0.05, key="bayes_loss")
+    col3.number_input("Maximum Run (days)", min_value=7, max_value=365, value=56, step=7, key="bayes_max_days")
+    try:
+        results = bayesian_decision_times(
+            metric_type, baseline, std_dev, st.session_state.calc_mde, daily_users, st.session_state.bayes_max_days,
+            st.session_state.bayes_probability / 100, st.session_state.bayes_loss / 100,
+        )
+    except ValueError as e:
+        st.error(f"Error in simulation: {e}")
+    else:
+        effect, null = results["Effect = MDE"][0], results["No effect"][0]
+        days = lambda value: f"{value:.0f} day{'s' if value != 1 else ''}" if value != float("inf") else f"> {st.session_state.bayes_max_days} days"
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Median Days to Decision", days(effect["median_days"]))
+        col2.metric("80% Decided By", days(effect["p80_days"]))
+        col3.metric("Ships Variant (effect = MDE)", f"{effect['ship_share']:.0%}")
+        col4.metric("Ships Variant (no effect)", f"{null['ship_share']:.0%}", help="How often an experiment without a real effect would still ship the variant.")
+        curve = pd.DataFrame([
+            {"day": day, "decided": share, "scenario": scenario}
+            for scenario, (_, decided) in results.items() for day, share in enumerate(decided, start=1)
+        ])
+        st.altair_chart(alt.Chart(curve).mark_line().encode(
+            x=alt.X("day:Q", title="Day"),
+            y=alt.Y("decided:Q", title="Share decided", axis=alt.Axis(format="%")),
+            color=alt.Color("scenario:N", title=None),
+        ))
+
+    st.markdown("**Monitor Live Results**")
+    control_col, variant_col = st.columns(2)
+    if metric_type == "Proportion":
+        control_users = control_col.number_input("Control Users", min_value=0, value=0, step=100, key="bayes_control_n")
+        control_hits = control_col.number_input("Control Conversions", min_value=0, value=0, step=10, key="bayes_control_x")
+        variant_users = variant_col.number_input("Variant Users", min_value=0, value=0, step=100, key="bayes_variant_n")
+        variant_hits = variant_col.number_input("Variant Conversions", min_value=0, value=0, step=10, key="bayes_variant_x")
+        if not (control_users and variant_users):
+            return
+        if control_hits > control_users or variant_hits > variant_users:
+            st.warning("Conversions cannot exceed users.")
+            return
+        control = BetaPosterior().update(control_hits, control_users)
+        variant = BetaPosterior().update(variant_hits, variant_users)
+        unit = lambda value: f"{value * 100:.3f} pp"
+    else:
+        control_users = control_col.number_input("Control Users", min_value=0, value=0, step=100, key="bayes_control_n")
+        control_mean = control_col.number_input("Control Mean", value=float(baseline), key="bayes_control_mean")
+        control_sd = control_col.number_input("Control Std Dev", min_value=0.0, value=float(std_dev or 1.0), key="bayes_control_sd")
+        variant_users = variant_col.number_input("Variant Users", min_value=0, value=0, step=100, key="bayes_variant_n")
+        variant_mean = variant_col.number_input("Variant Mean", value=float(baseline), key="bayes_variant_mean")
+        variant_sd = variant_col.number_input("Variant Std Dev", min_value=0.0, value=float(std_dev or 1.0), key="bayes_variant_sd")
+        if control_users < 2 or variant_users < 2 or not (control_sd and variant_sd):
+            return
+        control = NormalInverseGamma().update(control_users, control_mean, control_sd)
+        variant = NormalInverseGamma().update(variant_users, variant_mean, variant_sd)
+        unit = lambda value: f"{value:,.4g}"
+
+    result = compare(control, variant)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("P(Variant Beats Control)", f"{result.probability_to_beat:.1%}")
+    col2.metric("Expected Loss if Shipping Variant", unit(result.expected_loss_variant))
+    col3.metric("Expected Loss if Keeping Control", unit(result.expected_loss_control))
+    st.caption(f"Computed by {result.method}.")
+
+
+def render_sequential_plan(sequential, fixed_sample_size):
+    """Interim-analysis summary and per-look boundaries for a group-sequential plan."""
+    st.markdown(f"**Interim Analyses:** {sequential['looks']} looks, {SPENDING_LABELS.get(sequential['spending'], sequential['spending'])} alpha spending")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Max Sample Size per Variant", f"{sequential['max_sample_size']:,}", f"+{(sequential['inflation'] - 1) * 100:.1f}% vs fixed", delta_color="inverse")
+    col2.metric("Expected Sample Size (if effect is real)", f"{sequential['expected_sample_size']:,}",
+                f"{(sequential['expected_sample_size'] / fixed_sample_size - 1) * 100:+.1f}% vs fixed", delta_color="inverse")
+    expected_duration = sequential["expected_duration"]
+    col3.metric("Expected Duration", f"{expected_duration:,} days" if expected_duration is not None else "Beyond forecast")
+    st.dataframe(
+        pd.DataFrame(sequential["schedule"]).rename(columns={
+            "look": "Look", "sample_size": "Sample Size", "day": "Day", "z_boundary": "Z Boundary",
+            "p_value": "Nominal p", "stop_probability": "P(Stop Here | Effect)",
+        }),
+        hide_index=True,
+        column_config={
+            "Z Boundary": st.column_config.NumberColumn(format="%.3f"),
+            "Nominal p": st.column_config.NumberColumn(format="%.4f"),
+            "P(Stop Here | Effect)": st.column_config.NumberColumn(format="%.2f"),
+        },
+    )
+    st.caption("Stop for significance at a look when |Z| reaches its boundary (equivalently, p falls below the nominal threshold).")
+    if any(look["day"] is None for look in sequential["schedule"]):
+        st.warning("Looks without a day fall beyond the traffic forecast horizon and would never be reached.")
+
+
+@st.cache_data(max_entries=8)
+def plan_portfolio_csv(data):
+    """Sizes an uploaded portfolio once per distinct file; returns the plan and its CSV export."""
+    plan = plan_portfolio(read_portfolio_csv(io.BytesIO(data)))
+    return plan, plan.to_csv(index=False).encode()
+
+
+@st.fragment
+def render_portfolio_planner():
+    """Bulk sizing for a CSV of experiments; uploads rerun only this fragment."""
+    with st.expander("📚 Plan a Portfolio of Experiments"):
+        st.caption(
+            f"Upload a CSV with one experiment per row. Required columns: {', '.join(REQUIRED_COLUMNS)}; "
+            "optional: name, std_dev (continuous metrics), confidence, power, coverage, "
+            "and for scheduling, priority and exclusion_groups (experiments sharing a group never overlap; separate groups with ;)."
+        )
+        st.download_button("Download CSV Template", TEMPLATE_CSV, "portfolio_template.csv", "text/csv", key="portfolio_template")
+        upload = st.file_uploader("Experiments CSV", type="csv", key="portfolio_csv")
+        if upload is None:
+            return
+        try:
+            plan, plan_csv = plan_portfolio_csv(upload.getvalue())
+        except (ValueError, pd.errors.ParserError) as e:
+            st.error(f"Could not read the CSV: {e}")
+            return
+
+        invalid = int((plan["error"] != "").sum())
+        st.success(f"Sized {len(plan) - invalid:,} of {len(plan):,} experiments.")
+        if invalid:
+            st.warning(f"{invalid:,} rows could not be sized; see the error column.")
+        exact = int(plan["exact_test"].sum())
+        if exact:
+            st.caption(f"{exact:,} rows expect so few conversions that they were sized for an exact test (see exact_test).")
+        st.dataframe(plan, hide_index=True)
+        st.download_button("📥 Download Plan as CSV", plan_csv, "experiment_portfolio_plan.csv", "text/csv", key="portfolio_download")
+
+        if invalid < len(plan):
+            render_portfolio_schedule(upload.getvalue(), plan)
+
+
+@st.cache_data(max_entries=8)
+def schedule_portfolio_csv(data, dau):
+    """Schedules the sized experiments of an uploaded portfolio on one shared user base."""
+    plan, _ = plan_portfolio_csv(data)
+    return schedule_experiments(planned_experiments(plan), dau)
+
+
+def render_portfolio_schedule(data, plan):
+    """Gantt view of the portfolio packed onto a shared traffic calendar."""
+    st.subheader("Shared Traffic Schedule")
+    col1, col2 = st.columns(2)
+    with col1:
+        dau = st.number_input("Shared Daily Active Users", min_value=100, value=int(plan["dau"].max()), step=1000, key="portfolio_dau")
+    with col2:
+        start_date = st.date_input("Calendar Start", key="portfolio_start")
+
+    schedule = schedule_portfolio_csv(data, dau)
+    for name, reason in schedule.unscheduled:
+        st.warning(f"Could not schedule {name}: {reason}")
+    if not schedule.experiments:
+        return
+
+    timeline = schedule.to_frame(start_date)
+    one_at_a_time = int(timeline["standalone_days"].sum())
+    st.info(f"**All {len(timeline):,} experiments finish in {schedule.makespan_days:,} days** (vs. {one_at_a_time:,} days run one at a time).")
+    chart = alt.Chart(timeline).mark_bar().encode(
+        x=alt.X("start_date:T", title=None),
+        x2="end_date:T",
+        y=alt.Y("name:N", sort=None, title=None),
+        color=alt.Color("traffic_pct:Q", title="Traffic %"),
+        tooltip=["name", "start_date:T", "end_date:T", "traffic_pct", "duration_days", "standalone_days", "exclusion_groups"],
+    )
+    st.altair_chart(chart)
+    st.dataframe(timeline, hide_index=True)
+
+
+def render_calculations_page():
+    st.header("Step 4: Experiment Calculations 📊")
+    st.info("""
+        Verify the inputs below to calculate your required sample size and duration.
+    """)
+
+    intro_data = session_data().prd.intro
+    metric_type = intro_data.get("metric_type", "Proportion")
+
+    st.subheader("Key Metrics")
+    st.markdown(f"**Key Metric:** {intro_data.get('key_metric', 'N/A')}")
+    st.markdown(f"**Metric Type:** {metric_type}")
+    st.markdown(f"**Current Value:** {intro_data.get('current_value', 50.0)}")
+    if metric_type == "Continuous":
+        st.markdown(f"**Standard Deviation:** {intro_data.get('std_dev', 'N/A')}")
+
+    render_calculation_inputs(intro_data)
+
+    if PORTFOLIO_AVAILABLE:
+        render_portfolio_planner()
 
-    prd = st.session_state.prd_data
+
+@st.fragment
+def render_executive_summary():
+    prd = session_data().prd
 
     if st.session_state.editing_section == "executive_summary":
         edit_summary_dialog()
@@ -606,68 +1054,112 @@ def render_final_review_page():
         with col2:
             st.button("✏️", key="edit_summary", on_click=set_editing_section, args=("executive_summary",))
         
-        st.markdown(f"**Business Goal:** {prd['intro_data'].get('business_goal', 'N/A')}")
-        st.markdown(f"**Hypothesis:** {prd['hypothesis'].get('Statement', 'N/A')}")
-        st.markdown(f"**Success Criteria:** Target {prd['intro_data'].get('key_metric', 'N/A')} → {prd['intro_data'].get('target_value', 'N/A')}")
-        if prd['intro_data'].get('user_persona'):
-            st.markdown(f"**Target User Persona:** {prd['intro_data']['user_persona']}")
+        st.markdown(f"**Business Goal:** {prd.intro.get('business_goal', 'N/A')}")
+        st.markdown(f"**Hypothesis:** {prd.hypothesis.get('Statement', 'N/A')}")
+        st.markdown(f"**Success Criteria:** Target {prd.intro.get('key_metric', 'N/A')} → {prd.intro.get('target_value', 'N/A')}")
+        if prd.intro.user_persona:
+            st.markdown(f"**Target User Persona:** {prd.intro.user_persona}")
+
+
+@st.fragment
+def render_risk_card(i):
+    """Renders one editable risk; editing it reruns only this card."""
+    r = session_data().prd.risks[i]
+    if st.session_state.editing_risk == i:
+        edit_risk_dialog(i)
+    with st.container(border=True):
+        col1, col2 = st.columns([10, 1])
+        with col1:
+            st.subheader(f"Risk {i+1}")
+            st.markdown(f"**Description:** {r.risk}")
+            st.markdown(f"**Mitigation:** {r.mitigation}")
+        with col2:
+            st.button("✏️", key=f"edit_risk_{i}", on_click=set_editing_risk, args=(i,))
 
-    st.subheader("PRD Sections")
-    for key, content in prd.get('prd_sections', {}).items():
-        display_label = key.replace("_", " ").title()
-        if st.session_state.editing_section == key:
-            edit_section_dialog(key)
-        with st.container(border=True):
-            col1, col2 = st.columns([10, 1])
-            with col1:
-                st.subheader(display_label)
-            with col2:
-                st.button("✏️", key=f"edit_review_{key}", on_click=set_editing_section, args=(key,))
-            st.markdown(format_content_for_display(content))
 
-    with st.container(border=True):
-        st.subheader("Experiment Metrics Dashboard 📊")
-        cols = st.columns(3)
-        cols[0].metric("Confidence", f"{int(prd['calculations'].get('confidence', 0)*100)}%")
-        cols[1].metric("Power", f"{int(prd['calculations'].get('power', 0)*100)}%")
-        cols[2].metric("Min. Detectable Effect", f"{prd['calculations'].get('min_detectable_effect', 'N/A')}%")
-        cols[0].metric("Target Value", f"{prd['intro_data'].get('target_value', 'N/A')}")
-        cols[1].metric("Sample Size", f"{prd['calculations'].get('sample_size', 'N/A'):,}", "per variant")
-        cols[2].metric("Duration", f"{prd['calculations'].get('duration', 'N/A')} days")
+@st.fragment
+def render_risks_and_export():
+    """Risk generation, risk cards and PDF export, which appears once risks exist."""
+    prd = session_data().prd
 
     with st.container(border=True):
         st.subheader("Risks & Next Steps ⚠️")
 
-        def generate_risks():
-            with st.spinner("Generating contextual risks..."):
-                risk_data = {**prd['intro_data'], "hypothesis": prd['hypothesis'].get('Statement')}
-                generated_risks = generate_content(st.secrets["GROQ_API_KEY"], risk_data, "risks")
-                if "error" in generated_risks:
-                    st.error(generated_risks["error"])
-                else:
-                    st.session_state.prd_data["risks"] = generated_risks.get("risks", [])
-        
-        st.button("Generate Risks & Next Steps", on_click=generate_risks)
-
-        for i, r in enumerate(st.session_state.prd_data.get("risks", [])):
-            if st.session_state.editing_risk == i:
-                edit_risk_dialog(i)
-            with st.container(border=True):
-                col1, col2 = st.columns([10, 1])
-                with col1:
-                    st.subheader(f"Risk {i+1}")
-                    st.markdown(f"**Description:** {r['risk']}")
-                    st.markdown(f"**Mitigation:** {r['mitigation']}")
-                with col2:
-                    st.button("✏️", key=f"edit_risk_{i}", on_click=set_editing_risk, args=(i,))
-
-    if st.session_state.prd_data.get("risks"):
+        if st.button("Generate Risks & Next Steps"):
+            start_job("risks", prd.prompt_view(include_hypothesis=False, hypothesis=prd.hypothesis.statement))
+        render_job("risks", "Generating contextual risks", apply_risks)
+
+        for i in range(len(prd.risks)):
+            render_risk_card(i)
+
+    if STORE_AVAILABLE and st.button("💾 Save PRD", key="save_prd"):
+        save_current_prd()
+
+    if prd.risks:
         st.subheader("Download PRD")
-        pdf_bytes = create_pdf(prd)
-        st.download_button("📥 Download PRD as PDF", pdf_bytes, "AB_Testing_PRD.pdf", "application/pdf")
+        st.download_button("📥 Download PRD as PDF", build_pdf(prd.to_bytes()), "AB_Testing_PRD.pdf", "application/pdf")
+
+
+@st.fragment
+def render_metrics_dashboard():
+    prd = session_data().prd
+    with st.container(border=True):
+        st.subheader("Experiment Metrics Dashboard 📊")
+        cols = st.columns(3)
+        cols[0].metric("Confidence", f"{int(prd.calculations.get('confidence', 0)*100)}%")
+        cols[1].metric("Power", f"{int(prd.calculations.get('power', 0)*100)}%")
+        cols[2].metric("Min. Detectable Effect", f"{prd.calculations.get('min_detectable_effect', 'N/A')}%")
+        cols[0].metric("Target Value", f"{prd.intro.get('target_value', 'N/A')}")
+        cols[1].metric("Sample Size", f"{prd.calculations.get('sample_size', 'N/A'):,}", "per variant")
+        cols[2].metric("Duration", f"{prd.calculations.get('duration', 'N/A')} days")
+
+
+def render_final_review_page():
+    st.header("Step 5: Final Review & Export 🎉")
+    st.info("Your complete PRD is ready. Review, polish, and export.")
+
+    render_executive_summary()
+
+    st.subheader("PRD Sections")
+    for key in session_data().prd.sections:
+        render_prd_section(key, "edit_review")
+
+    render_metrics_dashboard()
+    render_risks_and_export()
+
+
+def is_admin():
+    """The admin view is opened with ?admin=<ADMIN_TOKEN>; without a configured token it stays closed."""
+    token = st.secrets.get("ADMIN_TOKEN") or os.environ.get("ADMIN_TOKEN")
+    return bool(token) and st.query_params.get("admin") == token
+
+
+def render_admin_page():
+    """Server-wide session memory: budget use, spills and restores, and every session's footprint."""
+    st.header("Session Memory 🧠")
+    governor = get_session_governor()
+    stats = governor.stats()
+    cols = st.columns(4)
+    cols[0].metric("Sessions", f"{stats['sessions']:,}", f"{stats['spilled_sessions']:,} spilled", delta_color="off")
+    cols[1].metric("Resident", f"{stats['resident_bytes'] / 2**20:,.1f} MB",
+                   f"{stats['resident_bytes'] / stats['budget_bytes']:.0%} of {stats['budget_bytes'] / 2**20:,.0f} MB", delta_color="off")
+    cols[2].metric("On Disk", f"{stats['snapshot_bytes'] / 2**20:,.1f} MB", f"{stats['snapshots']:,} snapshots", delta_color="off")
+    cols[3].metric("Spills / Restores", f"{stats['spills']:,} / {stats['restores']:,}",
+                   f"{stats['evictions']:,} over budget, {stats['expired']:,} expired", delta_color="off")
+    if governor.store is None:
+        st.warning("The PRD store is unavailable, so sessions are accounted but never spilled.")
+    elif st.button("Spill Idle Sessions Now", key="admin_sweep"):
+        governor.sweep()
+        st.rerun()
+    st.dataframe(pd.DataFrame(governor.sessions()), hide_index=True)
 
 
 # --- Main Rendering Logic ---
+get_session_governor().attach(st.session_state.session_key, st.session_state.session_data)
+if is_admin():
+    render_admin_page()
+    st.stop()
+
 render_header()
 render_topbar()
 
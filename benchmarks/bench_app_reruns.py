@@ -0,0 +1,190 @@
+"""
+Measures rerun latency and payload size per UI interaction with Streamlit's AppTest.
+
+Each interaction is replayed twice: as a full-script rerun (how every click behaved
+before the stage renderers used fragments) and as the fragment-scoped rerun the
+browser now requests. Latency is the script execution time, excluding AppTest's
+own per-run setup; payload is the serialized size of the ForwardMsgs a run emits.
+AppTest compiles the script afresh for every run, which a server does once per
+process, so all runs share one script cache to leave compilation out of the figures.
+
+    python benchmarks/bench_app_reruns.py
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.runtime.scriptrunner.script_runner import ScriptRunner
+from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import local_script_runner
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+from utils.models import PRD
+from utils.session_governor import SessionData
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+REPEATS = 10
+SAVED_PRDS = 2000
+SEARCHES = ["activation", "onboarding progress", "checkout", "retention email", "goal gradient"]
+
+SAMPLE_PRD = {
+    "intro_data": {
+        "business_goal": "Increase new user activation",
+        "key_metric": "Signup to first action conversion rate",
+        "product_area": "Onboarding",
+        "metric_type": "Proportion",
+        "current_value": 40.0,
+        "target_value": 44.0,
+        "dau": 20000,
+        "product_type": "Mobile App",
+    },
+    "hypothesis": {"Statement": "Showing progress during onboarding lifts activation.", "Rationale": "Goal gradient.", "Behavioral Basis": "Goal gradient effect."},
+    "prd_sections": {
+        "Problem_Statement": "New users drop off before completing their first action. " * 20,
+        "Goal_and_Success_Metrics": "Lift activation by 10% relative. " * 20,
+        "Implementation_Plan": [f"Step {i}: build and ship the change. " * 5 for i in range(8)],
+    },
+    "calculations": {"confidence": 0.95, "power": 0.8, "coverage": 50, "min_detectable_effect": 5.0, "sample_size": 15000, "duration": 3},
+    "risks": [{"risk": f"Risk {i}. " * 15, "mitigation": f"Mitigation {i}. " * 15} for i in range(3)],
+}
+
+_runners = []
+_script_seconds = []
+_original_run = LocalScriptRunner.run
+_original_run_script = ScriptRunner._run_script
+_script_cache = ScriptCache()
+
+
+def _recording_run(self, *args, **kwargs):
+    _runners.append(self)
+    return _original_run(self, *args, **kwargs)
+
+
+def _timed_run_script(self, rerun_data):
+    start = time.perf_counter()
+    try:
+        return _original_run_script(self, rerun_data)
+    finally:
+        _script_seconds.append(time.perf_counter() - start)
+
+
+def last_run_payload():
+    """Total serialized bytes of the messages emitted by the most recent run."""
+    runner = _runners[-1]
+    return sum(data["forward_msg"].ByteSize() for data in runner.event_data if "forward_msg" in data)
+
+
+def fragment_of(widget_id):
+    """Looks up the fragment a widget was rendered in from the last run's deltas."""
+    for data in _runners[-1].event_data:
+        msg = data.get("forward_msg")
+        if msg is None or not msg.HasField("delta") or not msg.delta.HasField("new_element"):
+            continue
+        element = msg.delta.new_element
+        proto = getattr(element, element.WhichOneof("type"))
+        if getattr(proto, "id", None) == widget_id:
+            return msg.delta.fragment_id or None
+    return None
+
+
+@contextmanager
+def fragment_rerun(fragment_id):
+    """Makes the next AppTest run request a rerun of one fragment, as the browser does."""
+    def rerun_data(**kwargs):
+        return RerunData(fragment_id_queue=[fragment_id], **kwargs)
+
+    with mock.patch.object(local_script_runner, "RerunData", rerun_data):
+        yield
+
+
+def new_app(stage):
+    at = AppTest.from_file(APP, default_timeout=30)
+    at.secrets["GROQ_API_KEY"] = "benchmark"
+    at.session_state["stage"] = stage
+    at.session_state["session_data"] = SessionData(PRD.from_dict(SAMPLE_PRD))
+    at.run()
+    return at
+
+
+def measure(label, stage, interact):
+    """`interact(at, i)` applies one interaction and returns the widget it touched."""
+    results = {}
+    for mode in ("full", "fragment"):
+        at = new_app(stage)
+        timings, payloads = [], []
+        for i in range(REPEATS):
+            widget = interact(at, i)
+            fragment_id = fragment_of(widget.id) if mode == "fragment" else None
+            if fragment_id:
+                with fragment_rerun(fragment_id):
+                    at.run()
+            else:
+                at.run()
+            timings.append(_script_seconds[-1] * 1000)
+            payloads.append(last_run_payload())
+            assert not at.exception, [e.value for e in at.exception]
+        results[mode] = (statistics.median(timings), int(statistics.median(payloads)))
+
+    (full_ms, full_bytes), (frag_ms, frag_bytes) = results["full"], results["fragment"]
+    print(
+        f"{label:<34} full rerun {full_ms:7.1f} ms {full_bytes:8,} B | "
+        f"fragment rerun {frag_ms:7.1f} ms {frag_bytes:8,} B | {full_ms / frag_ms:4.1f}x faster"
+    )
+
+
+def seed_store(path):
+    """Fills the store the intro page searches with variations of the sample PRD."""
+    from utils.prd_store import PRDStore  # imported once PRD_STORE_PATH is set, which it reads on import
+
+    store = PRDStore(path)
+    areas = ["Onboarding", "Checkout", "Retention", "Search"]
+    for i in range(SAVED_PRDS):
+        prd = dict(SAMPLE_PRD, intro_data=dict(SAMPLE_PRD["intro_data"], product_area=areas[i % len(areas)]))
+        store.save(prd)
+    store.close()
+
+
+def main():
+    with (
+        tempfile.TemporaryDirectory() as tmp,
+        mock.patch.object(LocalScriptRunner, "run", _recording_run),
+        mock.patch.object(ScriptRunner, "_run_script", _timed_run_script),
+        mock.patch.object(local_script_runner, "ScriptCache", lambda: _script_cache),
+    ):
+        os.environ["PRD_STORE_PATH"] = os.path.join(tmp, "bench.db")
+        seed_store(os.environ["PRD_STORE_PATH"])
+
+        measure(
+            "Intro: search saved PRDs",
+            "Intro",
+            lambda at, i: at.text_input(key="saved_prd_query").input(SEARCHES[i % len(SEARCHES)]),
+        )
+
+        measure(
+            "Calculations: move a slider",
+            "Calculations",
+            lambda at, i: at.slider(key="calc_confidence").set_value(90 + i % 5),
+        )
+        measure(
+            "PRD: open a section editor",
+            "PRD",
+            lambda at, i: at.button(key="edit_Problem_Statement").click(),
+        )
+        measure(
+            "Review: open a risk editor",
+            "Review",
+            lambda at, i: at.button(key="edit_risk_1").click(),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Runs the batched PRD pipeline against a local mock LLM endpoint and compares it with
+generating the same PRDs one at a time. Injected API failures exercise per-item error
+isolation; a second run over the same checkpoint must finish exactly the failed items,
+restarting each at the stage that failed.
+
+    python benchmarks/bench_batch.py --items 200 --latency 0.3 --failure-rate 0.02
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PORT = 8765
+os.environ["GROQ_API_URL"] = f"http://127.0.0.1:{PORT}/v1/chat/completions"  # read when api_handler is imported
+
+from utils import pipeline
+from utils.batch import STAGES, read_checkpoint, run_batch
+
+AREAS = ["Onboarding", "Checkout", "Search", "Notifications", "Pricing", "Profile", "Feed", "Referrals"]
+FILLER = "Users hesitate at this step because the value of continuing is not yet clear to them. "
+
+
+class MockLLM(ThreadingHTTPServer):
+    """Answers chat completions by prompt type after a jittered delay; fails a share of calls with HTTP 500."""
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, latency, failure_rate, seed=0):
+        super().__init__(("127.0.0.1", PORT), _MockHandler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self):
+        with self._lock:
+            return self._rng.uniform(0.5, 1.5) * self.latency, self._rng.random() < self.failure_rate
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        prompt = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["messages"][1]["content"]
+        if "generate 3 strong hypotheses" in prompt:
+            kind = "hypotheses"
+            out = {f"Hypothesis {i}": {"Statement": FILLER, "Rationale": FILLER * 2, "Behavioral Basis": FILLER} for i in (1, 2)}
+        elif "Draft PRD sections" in prompt:
+            kind = "prd_sections"
+            out = {"Problem_Statement": FILLER * 6, "Goal_and_Success_Metrics": FILLER * 4, "Implementation_Plan": [FILLER] * 6}
+        elif "Enrich this custom" in prompt:
+            kind = "enrich_hypothesis"
+            out = {"Statement": FILLER, "Rationale": FILLER * 2, "Behavioral Basis": FILLER}
+        else:
+            kind = "risks"
+            out = {"risks": [{"risk": FILLER, "mitigation": FILLER}] * 3}
+        delay, fail = self.server.draw()
+        time.sleep(delay)
+        with self.server._lock:
+            self.server.calls[kind] += 1
+        if fail:
+            data, status = b'{"error": "overloaded"}', 500
+        else:
+            data, status = json.dumps({"choices": [{"message": {"content": json.dumps(out)}}]}).encode(), 200
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def synthetic_specs(n, seed=0):
+    rng = random.Random(seed)
+    specs = []
+    for i in range(n):
+        proportion = rng.random() < 0.7
+        specs.append({
+            "id": f"idea-{i:04d}",
+            "intro_data": {
+                "business_goal": f"Improve {rng.choice(AREAS).lower()} idea {i}",
+                "key_metric": "Conversion rate" if proportion else "Revenue per user",
+                "product_area": rng.choice(AREAS),
+                "metric_type": "Proportion" if proportion else "Continuous",
+                "current_value": round(rng.uniform(5, 60), 1) if proportion else round(rng.uniform(2, 20), 2),
+                "std_dev": None if proportion else round(rng.uniform(5, 30), 2),
+                "target_value": 0,
+                "dau": rng.choice([5_000, 20_000, 100_000]),
+                "product_type": "Mobile App",
+            },
+            "hypothesis": {"custom": f"Simplifying step {i} lifts conversion"} if rng.random() < 0.2 else {"select": rng.choice([1, 2])},
+            "calculations": {"min_detectable_effect": rng.choice([2.0, 5.0, 10.0]), "sequential_looks": rng.choice([1, 1, 3])},
+        })
+    return specs
+
+
+def print_report(label, report):
+    print(f"\n{label}: {report.done - report.resumed} done, {report.failed} failed, {report.resumed} resumed "
+          f"in {report.elapsed_seconds:.1f}s -> {report.items_per_minute:,.0f} items/min")
+    print(f"{'stage':>14}{'workers':>9}{'processed':>11}{'failed':>8}{'mean':>9}{'utilisation':>13}")
+    for name, stage in report.stages.items():
+        print(f"{name:>14}{stage['workers']:>9}{stage['processed']:>11}{stage['failed']:>8}"
+              f"{stage['mean_seconds'] * 1000:>7.0f}ms{stage['utilisation']:>13.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--baseline-items", type=int, default=10, help="PRDs generated one at a time for comparison.")
+    parser.add_argument("--latency", type=float, default=0.3, help="Mean mock LLM latency in seconds.")
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    parser.add_argument("--pdf", action="store_true", help="Include the PDF stage.")
+    args = parser.parse_args()
+
+    server = MockLLM(args.latency, 0.0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    specs = synthetic_specs(args.items)
+
+    start = time.perf_counter()
+    for spec in specs[:args.baseline_items]:
+        pipeline.run_prd("mock", spec, include_pdf=args.pdf)
+    sequential = args.baseline_items / (time.perf_counter() - start) * 60
+    print(f"one at a time (run_prd): {sequential:,.1f} items/min over {args.baseline_items} items")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = os.path.join(tmp, "checkpoint.jsonl")
+        pdf_dir = os.path.join(tmp, "pdfs") if args.pdf else None
+
+        server.failure_rate = args.failure_rate
+        server.calls.clear()
+        first = run_batch("mock", specs, checkpoint, pdf_dir)
+        print_report("batch", first)
+        print(f"speed-up over one at a time: {first.items_per_minute / sequential:.1f}x; LLM calls: {dict(server.calls)}")
+
+        failed = {r["id"]: r["stage"] for r in read_checkpoint(checkpoint).values() if r["status"] == "failed"}
+        server.failure_rate = 0.0
+        server.calls.clear()
+        resumed = run_batch("mock", specs, checkpoint, pdf_dir)
+        print_report("resume", resumed)
+
+        # Each retried item repeats only its failed stage and the LLM stages after it.
+        llm_calls = {"hypotheses": "hypotheses", "prd_sections": "prd_sections", "risks": "risks"}
+        expected = Counter()
+        for stage in failed.values():
+            for later in STAGES[STAGES.index(stage):]:
+                if later in llm_calls:
+                    expected[llm_calls[later]] += 1
+        calls = Counter({k: v for k, v in server.calls.items() if k != "enrich_hypothesis"})
+        records = read_checkpoint(checkpoint)
+        assert resumed.failed == 0 and resumed.done == args.items, resumed
+        assert resumed.resumed == args.items - len(failed), (resumed.resumed, len(failed))
+        assert all(r["status"] == "done" for r in records.values()) and len(records) == args.items
+        assert calls == expected, (calls, expected)
+        print(f"resume retried {len(failed)} items from their failed stage; LLM calls {dict(server.calls)}; "
+              f"checkpoint holds {len(records)} finished PRDs")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
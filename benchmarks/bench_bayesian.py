@@ -0,0 +1,71 @@
+"""
+Checks the Bayesian comparisons (closed form vs chunked sampling, and the normal
+approximation used by the time-to-decision simulation) and times each path.
+
+    python benchmarks/bench_bayesian.py --cases 50
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bayesian import BetaPosterior, NormalInverseGamma, compare, simulate_time_to_decision, _compare_sampling, _normal_decision_metrics
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=int, default=50)
+    parser.add_argument("--draws", type=int, default=1_000_000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    closed_ms, sampled_ms, beat_error, loss_error, normal_error = [], [], [], [], []
+    for _ in range(args.cases):
+        users = int(rng.integers(500, 50_000))
+        rate = rng.uniform(0.01, 0.3)
+        control = BetaPosterior().update(rng.binomial(users, rate), users)
+        variant = BetaPosterior().update(rng.binomial(users, rate * rng.uniform(0.95, 1.08)), users)
+        exact, ms = timed(compare, control, variant)
+        closed_ms.append(ms)
+        sampled, ms = timed(_compare_sampling, control, variant, args.draws, 1)
+        sampled_ms.append(ms)
+        beat_error.append(abs(exact.probability_to_beat - sampled.probability_to_beat))
+        # Losses can be vanishingly small, so their error is measured in posterior standard deviations.
+        spread = np.sqrt(control.variance + variant.variance)
+        loss_error.append(abs(exact.expected_loss_variant - sampled.expected_loss_variant) / spread)
+        beat, _, _ = _normal_decision_metrics(variant.mean - control.mean, control.variance + variant.variance)
+        normal_error.append(abs(float(beat) - exact.probability_to_beat))
+
+    print(f"Beta-Binomial, {args.cases} cases with 500-50,000 users per arm")
+    print(f"  closed form        median {np.median(closed_ms):7.2f} ms")
+    print(f"  sampling ({args.draws:,})  median {np.median(sampled_ms):7.2f} ms")
+    print(f"  |P(beat) closed - sampled|         max {max(beat_error):.4f}")
+    print(f"  |loss closed - sampled| / posterior sd max {max(loss_error):.4f}")
+    print(f"  |P(beat) closed - normal approx|   max {max(normal_error):.4f}")
+
+    control = NormalInverseGamma().update(5_000, 50.0, 10.0)
+    variant = NormalInverseGamma().update(5_000, 50.3, 10.0)
+    result, ms = timed(compare, control, variant)
+    print(f"\nNormal-Inverse-Gamma, 200,000 draws: {ms:.1f} ms, P(beat) {result.probability_to_beat:.4f}")
+
+    print(f"\n{'metric':>11}{'users/day':>11}{'days':>6}{'time':>10}{'median days':>13}{'ship (MDE)':>12}{'ship (null)':>13}")
+    for metric, baseline, std_dev in (("Proportion", 10.0, None), ("Continuous", 50.0, 40.0)):
+        for daily_users, max_days in ((1_000, 56), (10_000, 28), (50_000, 90)):
+            effect, ms = timed(simulate_time_to_decision, metric, baseline, 5, daily_users, max_days, std_dev=std_dev)
+            null = simulate_time_to_decision(metric, baseline, 5, daily_users, max_days, std_dev=std_dev, true_effect=0)
+            print(f"{metric:>11}{daily_users:>11,}{max_days:>6}{ms:>8.1f}ms{effect.summary['median_days']:>13}"
+                  f"{effect.summary['ship_share']:>12.1%}{null.summary['ship_share']:>13.1%}")
+
+
+if __name__ == "__main__":
+    main()
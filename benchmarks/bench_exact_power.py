@@ -0,0 +1,66 @@
+"""
+Checks rare-event sample sizes against brute-force simulation and times the exact engine.
+
+For each scenario, experiments are simulated at the normal-approximation n and at the
+exact-engine n. The exact conditional test, which keeps its level however few conversions
+there are, is run on each, along with the pooled z-test.
+
+    python benchmarks/bench_exact_power.py --simulations 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.stats import binom
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.calculations import calculate_sample_size_proportion, exact_power_proportion_array
+
+# (baseline %, relative MDE %)
+SCENARIOS = [(0.1, 200), (0.1, 100), (0.1, 50), (0.01, 100), (0.001, 150), (1.0, 60), (0.1, -50)]
+ALPHA, POWER = 0.05, 0.8
+
+
+def simulated_rejections(n, p1, p2, simulations, rng):
+    """Rejection rates of the exact conditional test and the pooled two-proportion z-test."""
+    control = rng.binomial(n, p1, simulations)
+    variant = rng.binomial(n, p2, simulations)
+    events = control + variant
+    upper = binom.isf(ALPHA / 2, events, 0.5) + 1
+    exact = ((variant >= upper) | (variant <= events - upper)).mean()
+    pooled = events / (2 * n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.abs(variant - control) / np.sqrt(pooled * (1 - pooled) * 2 * n)
+    return exact, (z >= 1.959964).mean()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--simulations", type=int, default=200_000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    print(f"{'baseline':>9}{'mde':>6}{'events':>8}{'normal n':>14}{'exact n':>14}{'time':>9}"
+          f"{'z-test @ normal n':>19}{'exact test @ normal n':>23}{'exact test @ exact n':>22}{'model':>8}{'type I':>8}")
+    for baseline, mde in SCENARIOS:
+        p1, p2 = baseline / 100, baseline / 100 * (1 + mde / 100)
+        normal_n = calculate_sample_size_proportion(baseline, mde, 1 - ALPHA, POWER, method="normal")
+        start = time.perf_counter()
+        exact_n = calculate_sample_size_proportion(baseline, mde, 1 - ALPHA, POWER, method="exact")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        at_normal, z_at_normal = simulated_rejections(normal_n, p1, p2, args.simulations, rng)
+        at_exact, _ = simulated_rejections(exact_n, p1, p2, args.simulations, rng)
+        type_one, _ = simulated_rejections(exact_n, p1, p1, args.simulations, rng)
+        model = exact_power_proportion_array(exact_n, p1, p2, ALPHA)[0]
+        assert abs(at_exact - model) < 5 * np.sqrt(POWER * (1 - POWER) / args.simulations) + 1e-3
+        assert type_one <= ALPHA + 3 * np.sqrt(ALPHA * (1 - ALPHA) / args.simulations)
+        print(f"{baseline:>8}%{mde:>5}%{normal_n * p1:>8.0f}{normal_n:>14,}{exact_n:>14,}{elapsed_ms:>7.1f}ms"
+              f"{z_at_normal:>19.3f}{at_normal:>23.3f}{at_exact:>22.3f}{model:>8.3f}{type_one:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Checks seasonal duration forecasts against simulated weekly-cyclic traffic and times the
+cumulative-sum + searchsorted engine against a day-by-day loop.
+
+    python benchmarks/bench_forecasting.py --targets 100000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.calculations import calculate_duration
+from utils.forecasting import DAUForecast, fit_dau_forecast, forecast_duration
+
+WEEKLY = np.array([1.15, 1.1, 1.05, 1.0, 0.95, 0.8, 0.85])  # Monday..Sunday
+COVERAGE = 50
+START = date(2026, 11, 2)
+
+
+def simulated_traffic(days, seed=0):
+    """Trending, weekly-cyclic DAU with multiplicative noise, starting 120 days before START."""
+    index = pd.date_range(START - pd.Timedelta(days=120), periods=days)
+    factors = WEEKLY / WEEKLY.mean()
+    trend = 20_000 + 25 * np.arange(days)
+    noise = np.random.default_rng(seed).normal(1, 0.03, days)
+    return pd.Series(trend * factors[index.weekday] * noise, index=index)
+
+
+def actual_duration(sample_size, future):
+    """Days until the simulated future traffic actually enrolls 2 x sample_size users."""
+    return int(np.searchsorted(np.cumsum(future.to_numpy() * COVERAGE / 100), 2 * sample_size) + 1)
+
+
+def loop_duration(sample_size, forecast):
+    """The engine's answer computed one day at a time, for timing."""
+    enrolled, days = 0.0, 0
+    while enrolled < 2 * sample_size:
+        enrolled += forecast.predict(START + timedelta(days=days), 1)[0] * COVERAGE / 100
+        days += 1
+    return days
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--targets", type=int, default=100_000)
+    args = parser.parse_args()
+
+    traffic = simulated_traffic(120 + 400)
+    history, future = traffic.iloc[:120], traffic.iloc[120:]
+    forecast = fit_dau_forecast(history)
+    average_dau = history.mean()  # what a constant-DAU estimate would typically use
+
+    print("duration error vs simulated traffic (days)")
+    print(f"  {'sample size':>12}{'actual':>8}{'constant DAU':>14}{'seasonal':>10}")
+    for sample_size in (5_000, 20_000, 60_000, 150_000, 400_000):
+        actual = actual_duration(sample_size, future)
+        constant = calculate_duration(sample_size, average_dau, COVERAGE)
+        seasonal = forecast_duration(sample_size, forecast, COVERAGE, START)
+        print(f"  {sample_size:>12,}{actual:>8}{constant - actual:>+14}{seasonal - actual:>+10}")
+
+    targets = np.random.default_rng(1).integers(1_000, 500_000, args.targets)
+    start = time.perf_counter()
+    vectorized = forecast_duration(targets, forecast, COVERAGE, START)
+    vectorized_ms = (time.perf_counter() - start) * 1000
+
+    sample = targets[:200]
+    start = time.perf_counter()
+    looped = [loop_duration(n, forecast) for n in sample]
+    loop_ms = (time.perf_counter() - start) * 1000 / len(sample) * len(targets)
+    assert list(vectorized[:200].astype(int)) == looped
+
+    flat = DAUForecast.flat(20_000)
+    assert all(forecast_duration(n, flat, COVERAGE) == calculate_duration(n, 20_000, COVERAGE) for n in sample)
+
+    print(f"\n{len(targets):,} durations: vectorized {vectorized_ms:.1f} ms | day-by-day loop {loop_ms:,.0f} ms (extrapolated)")
+
+
+if __name__ == "__main__":
+    main()
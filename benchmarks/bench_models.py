@@ -0,0 +1,96 @@
+"""
+Compares the typed PRD model with the legacy nested-dict `prd_data` it replaced:
+resident memory per session and (de)serialization time across many sessions.
+
+    python benchmarks/bench_models.py --sessions 5000
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.models import PRD
+
+
+def legacy_prd(i):
+    """A fully filled-in PRD as the app used to keep it, with per-session text."""
+    return {
+        "intro_data": {
+            "business_goal": f"Increase new user activation {i}",
+            "key_metric": "Signup to first action conversion rate",
+            "product_area": "Onboarding",
+            "metric_type": "Proportion",
+            "current_value": 40.0 + i % 10,
+            "target_value": 44.0 + i % 10,
+            "dau": 20000 + i,
+            "product_type": "Mobile App",
+            "user_persona": f"Busy professionals, cohort {i}",
+            "app_description": "A habit tracking app.",
+        },
+        "hypothesis": {
+            "Statement": f"Showing progress during onboarding lifts activation ({i}).",
+            "Rationale": "Users who see how close they are to finishing are more likely to finish.",
+            "Behavioral Basis": "Goal gradient effect.",
+        },
+        "prd_sections": {
+            "Problem_Statement": f"New users drop off before completing their first action ({i}). " * 6,
+            "Goal_and_Success_Metrics": f"Lift activation by 10% relative ({i}). " * 6,
+            "Implementation_Plan": [f"Step {s}: build and ship change {i}." for s in range(6)],
+        },
+        "calculations": {"confidence": 0.95, "power": 0.8, "coverage": 50, "min_detectable_effect": 5.0, "sample_size": 15000 + i, "duration": 14},
+        "risks": [{"risk": f"Risk {r} for session {i}.", "mitigation": f"Mitigation {r} for session {i}."} for r in range(3)],
+    }
+
+
+def measure_memory(build, n):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [build(i) for i in range(n)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return sessions, used / n
+
+
+def timed(fn, items):
+    start = time.perf_counter()
+    out = [fn(item) for item in items]
+    return out, (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=5000)
+    args = parser.parse_args()
+    n = args.sessions
+
+    dicts, dict_bytes = measure_memory(legacy_prd, n)
+    models, model_bytes = measure_memory(lambda i: PRD.from_dict(legacy_prd(i)), n)
+    del dicts
+    dicts = [m.to_dict() for m in models]
+
+    print(f"{n:,} sessions")
+    print(f"  memory per session: dict {dict_bytes:,.0f} B | model {model_bytes:,.0f} B ({1 - model_bytes / dict_bytes:.0%} less)")
+
+    formats = [
+        ("dict   pickle", dicts, pickle.dumps, pickle.loads),
+        ("dict   json  ", dicts, json.dumps, json.loads),
+        ("model  json  ", models, PRD.to_json, PRD.from_json),
+        ("model  binary", models, PRD.to_bytes, PRD.from_bytes),
+    ]
+    print(f"  {'format':<14}{'size':>9}{'dump':>12}{'load':>12}")
+    for label, items, dump, load in formats:
+        blobs, dump_us = timed(dump, items)
+        _, load_us = timed(load, blobs)
+        size = sum(len(b) for b in blobs) / n
+        print(f"  {label:<14}{size:>7,.0f} B{dump_us:>9.1f} us{load_us:>9.1f} us")
+
+    assert all(PRD.from_bytes(m.to_bytes()) == m for m in models[:100])
+
+
+if __name__ == "__main__":
+    main()
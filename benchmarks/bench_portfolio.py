@@ -0,0 +1,91 @@
+"""
+Times portfolio sizing on a synthetic CSV against looping the single-experiment calculators.
+A share of the proportion rows are rare events (baselines under 1%, large MDEs), which are
+sized for the exact rare-event test.
+
+    python benchmarks/bench_portfolio.py --rows 100000 --rare-share 0.3
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.calculations import calculate_sample_size_proportion, calculate_sample_size_continuous, calculate_duration
+from utils.portfolio import read_portfolio_csv, plan_portfolio
+
+LOOP_ROWS = 2000
+REPEATS = 5
+
+
+def synthetic_csv(rows, rare_share, seed=0):
+    rng = np.random.default_rng(seed)
+    continuous = rng.random(rows) < 0.3
+    rare = ~continuous & (rng.random(rows) < rare_share)
+    proportion_baseline = np.where(rare, rng.uniform(0.01, 1, rows), rng.uniform(0.5, 60, rows))
+    df = pd.DataFrame({
+        "name": [f"Experiment {i}" for i in range(rows)],
+        "metric_type": np.where(continuous, "Continuous", "Proportion"),
+        "baseline": np.where(continuous, rng.uniform(1, 50, rows), proportion_baseline).round(2),
+        "std_dev": np.where(continuous, rng.uniform(1, 30, rows).round(2), np.nan),
+        "mde": np.where(rare, rng.choice([20, 30, 50, 75, 100], rows), rng.choice([1, 2, 3, 5, 10], rows)),
+        "confidence": rng.choice([90, 95, 99], rows),
+        "power": rng.choice([80, 90], rows),
+        "dau": rng.integers(1_000, 2_000_000, rows),
+        "coverage": rng.choice([10, 25, 50, 100], rows),
+    })
+    return df.to_csv(index=False).encode()
+
+
+def loop_plan(df):
+    """The pre-portfolio way: one scalar calculator call per row."""
+    out = []
+    for row in df.itertuples(index=False):
+        if row.metric_type == "Proportion":
+            n = calculate_sample_size_proportion(row.baseline, row.mde, row.confidence / 100, row.power / 100)
+        else:
+            n = calculate_sample_size_continuous(row.baseline, row.std_dev, row.mde, row.confidence / 100, row.power / 100)
+        out.append((n, calculate_duration(n, row.dau, row.coverage)))
+    return out
+
+
+def median_ms(fn):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--rare-share", type=float, default=0.3, help="Share of proportion rows that are rare events.")
+    args = parser.parse_args()
+
+    data = synthetic_csv(args.rows, args.rare_share)
+    read_ms, df = median_ms(lambda: read_portfolio_csv(io.BytesIO(data)))
+    plan_ms, plan = median_ms(lambda: plan_portfolio(df))
+    loop_ms, looped = median_ms(lambda: loop_plan(df.head(LOOP_ROWS)))
+
+    # The vectorized pass must agree with the scalar calculators row for row.
+    expected = [(int(n), int(d)) for n, d in looped]
+    actual = list(zip(plan["sample_size"].head(LOOP_ROWS).astype(int), plan["duration_days"].head(LOOP_ROWS).astype(int)))
+    assert expected == actual, "vectorized plan disagrees with the scalar calculators"
+
+    print(f"{args.rows:,} experiments ({len(data) / 1e6:.1f} MB CSV, {int(plan['exact_test'].sum()):,} sized for the exact test)")
+    print(f"  parse CSV         {read_ms:8.1f} ms")
+    print(f"  vectorized sizing {plan_ms:8.1f} ms")
+    print(f"  parse + sizing    {read_ms + plan_ms:8.1f} ms")
+    print(f"  scalar loop       {loop_ms / LOOP_ROWS * args.rows:8.1f} ms (extrapolated from {LOOP_ROWS:,} rows)")
+
+
+if __name__ == "__main__":
+    main()
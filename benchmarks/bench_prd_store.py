@@ -0,0 +1,90 @@
+"""
+Seeds a PRD store with synthetic PRDs and times full-text search, with and without a
+product-area filter. Fails if either misses the p95 budget.
+
+    python benchmarks/bench_prd_store.py --rows 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.prd_store import PRDStore
+
+AREAS = ["Onboarding", "Checkout", "Search", "Notifications", "Pricing", "Profile", "Feed", "Referrals"]
+METRICS = ["Conversion rate", "ARPDAU", "D7 retention", "Session length", "Click-through rate"]
+WORDS = (
+    "users friction onboarding checkout trust social proof urgency scarcity streak reward "
+    "personalised reminder default anchoring discount trial upgrade paywall tutorial badge "
+    "progress loss aversion habit notification copy layout simplify reduce steps clarity "
+    "motivation engagement retention churn referral invite share premium bundle price"
+).split()
+SEARCH_BUDGET_MS = 50  # p95
+QUERIES = ["social proof", "loss aversion checkout", "streak reward", "paywall", "reduce friction onboarding", "referral invite"]
+
+
+def sentence(rng, n=18):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def synthetic_prd(rng):
+    return {
+        "intro_data": {
+            "business_goal": sentence(rng, 6),
+            "product_area": rng.choice(AREAS),
+            "key_metric": rng.choice(METRICS),
+            "metric_type": rng.choice(["Proportion", "Continuous"]),
+        },
+        "hypothesis": {"Statement": sentence(rng), "Rationale": sentence(rng), "Behavioral Basis": sentence(rng, 8)},
+        "prd_sections": {
+            "Problem_Statement": sentence(rng, 40),
+            "Goal_and_Success_Metrics": sentence(rng, 30),
+            "Implementation_Plan": [sentence(rng, 10) for _ in range(4)],
+        },
+        "calculations": {},
+        "risks": [{"risk": sentence(rng, 12), "mitigation": sentence(rng, 12)} for _ in range(3)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PRDStore(os.path.join(tmp, "bench.db"))
+
+        start = time.perf_counter()
+        for offset in range(0, args.rows, 10_000):
+            store.save_many(synthetic_prd(rng) for _ in range(min(10_000, args.rows - offset)))
+        print(f"seeded {store.count():,} PRDs in {time.perf_counter() - start:.1f}s")
+
+        for label, product_area in (("search", None), ("search in area", "Checkout")):
+            timings = []
+            for i in range(args.queries):
+                query = QUERIES[i % len(QUERIES)]
+                t0 = time.perf_counter()
+                results = store.search(query, limit=20, product_area=product_area)
+                timings.append((time.perf_counter() - t0) * 1000)
+                assert results and all(r["snippet"] for r in results), query
+                assert product_area is None or {r["product_area"] for r in results} == {product_area}, query
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"{label}: median {statistics.median(timings):.2f} ms, p95 {p95:.2f} ms, max {timings[-1]:.2f} ms")
+            assert p95 < SEARCH_BUDGET_MS, f"{label} p95 {p95:.1f} ms exceeds the {SEARCH_BUDGET_MS} ms budget"
+
+        t0 = time.perf_counter()
+        store.list_recent(limit=20, product_area="Checkout")
+        print(f"list by product area: {(time.perf_counter() - t0) * 1000:.2f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
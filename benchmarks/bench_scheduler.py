@@ -0,0 +1,74 @@
+"""
+Times the traffic-aware scheduler on synthetic portfolios and checks the schedules it builds.
+
+Makespan is compared with running experiments one at a time and with the traffic
+lower bound (total users needed / DAU), which ignores exclusions and coverage caps.
+
+    python benchmarks/bench_scheduler.py --sizes 100 300 500 1000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.scheduler import PlannedExperiment, schedule_experiments
+
+DAU = 200_000
+GROUPS = ["checkout", "onboarding", "search", "pricing", "feed", "home", "notifications", "referrals"]
+
+
+def synthetic_portfolio(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        PlannedExperiment(
+            name=f"Experiment {i}",
+            sample_size=rng.randint(2_000, 400_000),
+            coverage=rng.choice([10, 25, 50, 100]),
+            priority=rng.randint(0, 3),
+            exclusion_groups=tuple(rng.sample(GROUPS, rng.randint(0, 2))),
+        )
+        for i in range(n)
+    ]
+
+
+def check(schedule, experiments):
+    """No day above 100% of DAU, coverage caps respected, exclusion groups never overlap."""
+    coverage = {e.name: e.coverage for e in experiments}
+    load = {}
+    for e in schedule.experiments:
+        assert e.traffic_pct <= coverage[e.name]
+        for day in range(e.start_day, e.end_day):
+            load[day] = load.get(day, 0) + e.traffic_pct
+    assert max(load.values()) <= 100 + 1e-9
+    booked = {}
+    for e in schedule.experiments:
+        for group in e.exclusion_groups:
+            booked.setdefault(group, []).append((e.start_day, e.end_day))
+    for intervals in booked.values():
+        intervals.sort()
+        assert all(a[1] <= b[0] for a, b in zip(intervals, intervals[1:]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 500, 1000])
+    args = parser.parse_args()
+
+    print(f"{'experiments':>11}{'time':>10}{'makespan':>10}{'one at a time':>15}{'lower bound':>13}")
+    for n in args.sizes:
+        experiments = synthetic_portfolio(n, seed=n)
+        start = time.perf_counter()
+        schedule = schedule_experiments(experiments, DAU)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        check(schedule, experiments)
+
+        sequential = sum(e.standalone_days for e in schedule.experiments)
+        lower_bound = sum(2 * e.sample_size for e in experiments) / DAU
+        print(f"{n:>11,}{elapsed_ms:>8.0f} ms{schedule.makespan_days:>6,} days{sequential:>10,} days{lower_bound:>8,.0f} days")
+
+
+if __name__ == "__main__":
+    main()
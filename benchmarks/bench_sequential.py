@@ -0,0 +1,72 @@
+"""
+Times group-sequential design computation and checks the boundaries against published
+values and a Monte Carlo simulation of the sequential test.
+
+    python benchmarks/bench_sequential.py --simulations 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.special import ndtri
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sequential import MAX_LOOKS, SPENDING_FUNCTIONS, design_group_sequential
+
+# Two-sided alpha = 0.05, five equally spaced looks (Jennison & Turnbull 2000, table 7.6; gsDesign).
+PUBLISHED = {
+    "obrien_fleming": [4.8769, 3.3569, 2.6803, 2.2898, 2.0310],
+    "pocock": [2.4380, 2.4268, 2.4102, 2.3966, 2.3860],
+}
+
+
+def simulate(design, drift, simulations, seed=0):
+    """Rejection rate and mean information fraction at stopping, from simulated Brownian paths."""
+    rng = np.random.default_rng(seed)
+    t = np.asarray(design.information_fractions)
+    increments = rng.standard_normal((simulations, design.looks)) * np.sqrt(np.diff(t, prepend=0.0)) + drift * np.diff(t, prepend=0.0)
+    z = np.cumsum(increments, axis=1) / np.sqrt(t)
+    crossed = np.abs(z) >= np.asarray(design.z_boundaries)
+    rejected = crossed.any(axis=1)
+    stop_look = np.where(rejected, crossed.argmax(axis=1), design.looks - 1)
+    return rejected.mean(), (t[stop_look] * design.inflation).mean()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--simulations", type=int, default=200_000)
+    parser.add_argument("--power", type=float, default=0.8)
+    args = parser.parse_args()
+
+    print(f"{'spending':>15}{'looks':>6}{'cold':>9}{'inflation':>11}{'E[n]/n H1':>11}{'type I (sim)':>14}{'power (sim)':>13}{'E[n]/n (sim)':>14}")
+    for spending in SPENDING_FUNCTIONS:
+        for looks in range(2, MAX_LOOKS + 1):
+            design_group_sequential.cache_clear()
+            start = time.perf_counter()
+            design = design_group_sequential(looks, 0.05, args.power, spending)
+            cold_ms = (time.perf_counter() - start) * 1000
+
+            fixed_drift = ndtri(1 - 0.05 / 2) + ndtri(args.power)
+            drift = fixed_drift * np.sqrt(design.inflation)
+            type_one, _ = simulate(design, 0.0, args.simulations, seed=looks)
+            power, fraction = simulate(design, drift, args.simulations, seed=100 + looks)
+            print(f"{spending:>15}{looks:>6}{cold_ms:>7.1f}ms{design.inflation:>11.4f}{design.expected_fraction_h1:>11.4f}"
+                  f"{type_one:>14.4f}{power:>13.4f}{fraction:>14.4f}")
+
+    for spending, published in PUBLISHED.items():
+        design = design_group_sequential(5, 0.05, args.power, spending)
+        error = max(abs(a - b) for a, b in zip(design.z_boundaries, published))
+        assert error < 1e-3, (spending, design.z_boundaries)
+        print(f"\n{spending}: 5-look boundaries within {error:.1e} of published values")
+
+    start = time.perf_counter()
+    for _ in range(10_000):
+        design_group_sequential(5, 0.05, args.power, "obrien_fleming")
+    print(f"memoized lookup: {(time.perf_counter() - start) * 100:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
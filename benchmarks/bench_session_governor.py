@@ -0,0 +1,153 @@
+"""
+Load-tests the session governor: thousands of sessions arrive, work briefly and go idle,
+on a simulated clock. Compares heap held by session state with and without a memory
+budget, and times spilling, sweeping and the lazy restore a returning user pays for.
+
+    python benchmarks/bench_session_governor.py --sessions 5000 --budget-mb 8
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.models import PRD
+from utils.prd_store import PRDStore
+from utils.session_governor import SessionData, SessionGovernor
+
+WORDS = (
+    "users friction onboarding checkout trust social proof urgency scarcity streak reward "
+    "personalised reminder default anchoring discount trial upgrade paywall tutorial badge "
+    "progress loss aversion habit notification copy layout simplify reduce steps clarity"
+).split()
+ARRIVAL_SECONDS = 2   # one new session every two simulated seconds
+ACTIVE_SECONDS = 120  # each works this long before going idle
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def sentence(rng, n=18):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def working_state(rng):
+    """A session's PRD at the Review stage, with a forecast and interim schedule, plus its hypotheses."""
+    prd = PRD.from_dict({
+        "intro_data": {"business_goal": sentence(rng, 6), "key_metric": "Conversion rate", "product_area": "Checkout",
+                       "metric_type": "Proportion", "current_value": 40.0, "target_value": 44.0, "dau": 20000},
+        "hypothesis": {"Statement": sentence(rng), "Rationale": sentence(rng), "Behavioral Basis": sentence(rng, 8)},
+        "prd_sections": {
+            "Problem_Statement": sentence(rng, 120),
+            "Goal_and_Success_Metrics": sentence(rng, 80),
+            "Implementation_Plan": [sentence(rng, 25) for _ in range(8)],
+        },
+        "calculations": {
+            "confidence": 0.95, "power": 0.8, "coverage": 50, "min_detectable_effect": 5.0, "sample_size": 15000, "duration": 14,
+            "dau_forecast": [{"date": f"2026-01-{d % 28 + 1:02d}", "dau": rng.uniform(9000, 11000)} for d in range(60)],
+            "sequential": {"looks": 4, "schedule": [{"look": k, "sample_size": 4000 * k, "z_boundary": 2.0} for k in range(1, 5)]},
+        },
+        "risks": [{"risk": sentence(rng, 20), "mitigation": sentence(rng, 20)} for _ in range(4)],
+    })
+    hypotheses = {f"Hypothesis {i}": {"Statement": sentence(rng), "Rationale": sentence(rng), "Behavioral Basis": sentence(rng, 8)} for i in range(3)}
+    return prd, hypotheses
+
+
+def simulate(governor, clock, sessions, seed=0):
+    """
+    Sessions arrive, are rerun a few times while active, then idle. Returns the session
+    handles and the mean time per attach (one per script run).
+    """
+    states, reruns = random.Random(seed), random.Random(seed + 1)
+    handles, timings = {}, []
+    for i in range(sessions):
+        clock.now = i * ARRIVAL_SECONDS
+        key = f"{i:032x}"
+        prd, hypotheses = working_state(states)
+        handles[key] = SessionData(prd, hypotheses)
+        # This session's first run, then reruns from sessions that are still active.
+        active = reruns.sample(range(max(0, i - ACTIVE_SECONDS // ARRIVAL_SECONDS), i + 1), k=min(3, i + 1))
+        for other in [i, *active]:
+            start = time.perf_counter()
+            governor.attach(f"{other:032x}", handles[f"{other:032x}"])
+            timings.append(time.perf_counter() - start)
+    return handles, statistics.fmean(timings)
+
+
+def run(sessions, budget_bytes, store_path=None):
+    """
+    Replays the arrivals twice: traced for heap held (tracemalloc slows the run down
+    severalfold), then untraced on a fresh store for time per attach.
+    """
+    results = []
+    for traced in (True, False):
+        clock = FakeClock()
+        store = PRDStore(f"{store_path}.{traced}") if store_path else None
+        governor = SessionGovernor(store=store, budget_bytes=budget_bytes, clock=clock)
+        if traced:
+            tracemalloc.start()
+        handles, attach = simulate(governor, clock, sessions)
+        if traced:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        results.append((governor, clock, handles))
+    return (*results[-1], attach, current, peak)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=5_000)
+    parser.add_argument("--budget-mb", type=float, default=8)
+    parser.add_argument("--restores", type=int, default=500)
+    args = parser.parse_args()
+    budget = int(args.budget_mb * 2**20)
+
+    _, _, _, attach, current, peak = run(args.sessions, budget)
+    print(f"{'':>12}{'heap':>10}{'peak':>10}{'resident':>10}{'spilled':>9}{'attach':>10}")
+    print(f"{'ungoverned':>12}{current / 2**20:>8.1f}MB{peak / 2**20:>8.1f}MB{args.sessions:>10,}{0:>9,}{attach * 1e6:>8.0f}us")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        governor, clock, handles, attach, current, peak = run(args.sessions, budget, os.path.join(tmp, "bench.db"))
+        store = governor.store
+        stats = governor.stats()
+        print(f"{'governed':>12}{current / 2**20:>8.1f}MB{peak / 2**20:>8.1f}MB{stats['resident_sessions']:>10,}"
+              f"{stats['spilled_sessions']:>9,}{attach * 1e6:>8.0f}us")
+        print(f"\naccounted resident: {stats['resident_bytes'] / 2**20:.1f} MB of {budget / 2**20:.0f} MB budget; "
+              f"{stats['evictions']:,} evictions; snapshots on disk: {stats['snapshot_bytes'] / 2**20:.1f} MB "
+              f"({stats['snapshot_bytes'] / max(stats['snapshots'], 1) / 1024:.1f} KB each)")
+
+        clock.now += governor.idle_seconds
+        start = time.perf_counter()
+        governor.sweep()
+        swept = governor.stats()
+        print(f"idle sweep: {(time.perf_counter() - start) * 1000:.0f} ms, {swept['resident_sessions']:,} sessions left resident")
+
+        # Returning users: every access restores lazily and must give back the same state.
+        states = random.Random(0)
+        originals = {f"{i:032x}": working_state(states) for i in range(args.sessions)}
+        rng = random.Random(1)
+        latencies = []
+        for key in rng.sample(sorted(handles), min(args.restores, len(handles))):
+            start = time.perf_counter()
+            prd = handles[key].prd
+            latencies.append(time.perf_counter() - start)
+            assert prd.to_dict() == originals[key][0].to_dict() and handles[key].hypotheses == originals[key][1], key
+        latencies.sort()
+        print(f"restore: median {statistics.median(latencies) * 1000:.2f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f} ms over {len(latencies):,} returning sessions "
+              f"(state verified)")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
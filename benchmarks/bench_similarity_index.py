@@ -0,0 +1,80 @@
+"""
+Fills the hypothesis similarity index with synthetic intro forms, then times lookups
+interleaved with adds, as sessions generate new hypotheses while others search.
+
+    python benchmarks/bench_similarity_index.py --entries 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.similarity_index import SimilarityIndex
+
+GOAL_WORDS = (
+    "increase decrease new user activation retention revenue engagement checkout conversion trial upgrade "
+    "subscription onboarding completion referral invites sharing search success cart abandonment "
+    "notification opt in streak habit premium paywall bundle pricing page feed scroll depth"
+).split()
+METRIC_WORDS = "rate conversion d1 d7 d30 retention arpdau sessions per user minutes click through".split()
+# Long tail of product-specific vocabulary, drawn with Zipf-like frequencies.
+TAIL_WORDS = [f"term{i}" for i in range(3000)]
+TAIL_WEIGHTS = [1 / (i + 1) for i in range(len(TAIL_WORDS))]
+
+
+def synthetic_intro(rng, areas):
+    return {
+        "business_goal": " ".join(
+            [rng.choice(GOAL_WORDS) for _ in range(rng.randint(2, 4))]
+            + rng.choices(TAIL_WORDS, weights=TAIL_WEIGHTS, k=rng.randint(3, 6))
+        ),
+        "key_metric": " ".join(rng.choice(METRIC_WORDS) for _ in range(3)),
+        "product_area": rng.choice(areas),
+        "metric_type": "Proportion",
+    }
+
+
+def run(entries, areas, queries, rng):
+    index = SimilarityIndex(threshold=0.6)
+    stored = [synthetic_intro(rng, areas) for _ in range(entries)]
+    start = time.perf_counter()
+    index.add_many((intro, {"Hypothesis 1": {"Statement": "..."}}) for intro in stored)  # as the app warms it from the store
+    load = time.perf_counter() - start
+
+    timings = []
+    for i in range(queries):
+        added = synthetic_intro(rng, areas)
+        stored.append(added)
+        index.add(added, {"Hypothesis 1": {"Statement": "..."}})  # every query follows an add
+        probe = dict(rng.choice(stored)) if i % 2 else synthetic_intro(rng, areas)
+        t0 = time.perf_counter()
+        index.query(probe)
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    stats = index.stats()
+    print(
+        f"{entries:,} entries / {len(areas)} product areas, {queries:,} adds interleaved: "
+        f"median {statistics.median(timings):.3f} ms, p95 {p95:.3f} ms, max {timings[-1]:.3f} ms, "
+        f"hit rate {stats['hit_rate']:.0%}; bulk load {load:.1f} s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    run(args.entries, [f"Area {i}" for i in range(50)], args.queries, rng)
+    # Worst case: every entry shares one product area and metric type.
+    run(args.entries, ["Onboarding"], args.queries, rng)
+
+
+if __name__ == "__main__":
+    main()
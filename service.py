@@ -0,0 +1,314 @@
+"""
+Headless HTTP API and CLI for PRD generation, without the Streamlit UI.
+
+    python service.py serve --port 8080 --workers 8 --queue 32
+    python service.py run spec.yaml --json prd.json --pdf prd.pdf
+    python service.py batch ideas.jsonl --checkpoint prds.jsonl --pdf-dir pdfs --concurrency risks=16
+
+The Groq API key is read from the GROQ_API_KEY environment variable.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from utils import batch, pipeline
+from utils.pdf_generator import create_pdf
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 16
+RESULT_TIMEOUT = 300
+
+
+# --- Worker Pool ---
+class QueueFullError(Exception):
+    """Raised when the pool already holds as many jobs as it has workers plus queue slots."""
+
+
+class WorkerPool:
+    """
+    A fixed number of worker threads with a bounded queue in front of them.
+    Submissions beyond capacity are rejected immediately rather than piling up,
+    so callers can apply backpressure (HTTP 503 + Retry-After).
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prd-worker")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    def submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise QueueFullError(f"All {self.workers} workers and {self.queue_size} queue slots are busy.")
+        with self._lock:
+            self._in_flight += 1
+        future = self._executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+# --- Routes ---
+# Each route takes (api_key, request body) and returns a JSON-serializable dict or PDF bytes.
+LLM_ROUTES = {
+    "/v1/hypotheses": lambda key, body: pipeline.generate_hypotheses(key, body["intro_data"]),
+    "/v1/enrich": lambda key, body: pipeline.enrich_hypothesis(key, body["intro_data"], body["custom_hypothesis"]),
+    "/v1/sections": lambda key, body: pipeline.generate_prd_sections(key, body["intro_data"], body["hypothesis"]),
+    "/v1/risks": lambda key, body: {"risks": pipeline.generate_risks(key, body["intro_data"], body["hypothesis"])},
+    "/v1/prd": lambda key, body: pipeline.run_prd(key, body),
+}
+# Cheap, CPU-bound routes still go through the pool so a burst of PDFs cannot starve the server.
+LOCAL_ROUTES = {
+    "/v1/calculations": lambda key, body: pipeline.build_calculations(body["intro_data"], **pipeline.calculation_params(body.get("calculations"))),
+    "/v1/pdf": lambda key, body: create_pdf(body["prd"]),
+}
+
+
+def json_safe(value):
+    """Replaces non-finite floats (e.g. an unbounded duration) with null, which standard JSON can carry."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {k: json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(v) for v in value]
+    return value
+
+
+def render_pdf(route):
+    """Wraps a route returning {"prd": ...} so the PDF is rendered on the pool worker too."""
+    return lambda key, body: create_pdf(route(key, body)["prd"])
+
+
+class PRDRequestHandler(BaseHTTPRequestHandler):
+    server_version = "PRDService/1.0"
+    pool = None
+    api_key = None
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        payload = body if isinstance(body, bytes) else json.dumps(json_safe(body), allow_nan=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/v1/health":
+            self._send(200, {"status": "ok", "pool": self.pool.stats()})
+        else:
+            self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        route = LLM_ROUTES.get(url.path) or LOCAL_ROUTES.get(url.path)
+        if route is None:
+            self._send(404, {"error": "Not found"})
+            return
+        if url.path in LLM_ROUTES and not self.api_key:
+            self._send(500, {"error": "GROQ_API_KEY is not configured on the server."})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            self._send(400, {"error": "Request body must be valid JSON."})
+            return
+        if not isinstance(body, dict):
+            self._send(400, {"error": "Request body must be a JSON object."})
+            return
+
+        wants_pdf = url.path == "/v1/pdf" or parse_qs(url.query).get("format") == ["pdf"]
+        if url.path == "/v1/prd" and wants_pdf:
+            route = render_pdf(route)
+        try:
+            future = self.pool.submit(route, self.api_key, body)
+            result = future.result(timeout=RESULT_TIMEOUT)
+        except QueueFullError as e:
+            self._send(503, {"error": str(e)}, headers={"Retry-After": "5"})
+            return
+        except FutureTimeoutError:
+            self._send(504, {"error": "Generation timed out."})
+            return
+        except KeyError as e:
+            self._send(400, {"error": f"Missing field: {e.args[0]}"})
+            return
+        except ValueError as e:
+            self._send(400, {"error": str(e)})
+            return
+        except pipeline.PipelineError as e:
+            self._send(502, {"error": str(e), "step": e.step})
+            return
+        except Exception as e:
+            self.log_error("Unhandled error on %s: %r", url.path, e)
+            self._send(500, {"error": "Internal server error."})
+            return
+
+        if wants_pdf:
+            self._send(200, result, content_type="application/pdf")
+        else:
+            self._send(200, result)
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"[{self.log_date_time_string()}] {format % args}\n")
+
+
+def serve(host, port, workers, queue_size):
+    pool = WorkerPool(workers, queue_size)
+    handler = type("Handler", (PRDRequestHandler,), {"pool": pool, "api_key": os.environ.get("GROQ_API_KEY")})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving PRD API on http://{host}:{port} with {workers} workers, queue of {queue_size}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.shutdown()
+
+
+# --- CLI ---
+def load_spec(path):
+    """Loads a PRD spec from JSON, or YAML when PyYAML is installed."""
+    with open(path) as f:
+        text = f.read()
+    if path.endswith((".yaml", ".yml")):
+        if yaml is None:
+            raise SystemExit("PyYAML is required for YAML specs: pip install pyyaml")
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+def run(spec_path, json_path=None, pdf_path=None):
+    api_key = os.environ.get("GROQ_API_KEY")
+    if not api_key:
+        raise SystemExit("Set GROQ_API_KEY to generate PRDs.")
+    try:
+        result = pipeline.run_prd(api_key, load_spec(spec_path), include_pdf=bool(pdf_path))
+    except pipeline.PipelineError as e:
+        raise SystemExit(f"Generation failed at {e}")
+
+    if pdf_path:
+        with open(pdf_path, "wb") as f:
+            f.write(result.pop("pdf"))
+    output = json.dumps(result, indent=2)
+    if json_path:
+        with open(json_path, "w") as f:
+            f.write(output)
+    elif not pdf_path:
+        print(output)
+
+
+def load_specs(path):
+    """Loads a list of PRD specs: JSON Lines (one spec per line), or a JSON/YAML list."""
+    if path.endswith(".jsonl"):
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    specs = load_spec(path)
+    if not isinstance(specs, list):
+        raise SystemExit(f"{path} must contain a list of specs.")
+    return specs
+
+
+def parse_concurrency(values):
+    """["risks=16", ...] -> {"risks": 16}"""
+    concurrency = {}
+    for value in values or []:
+        stage, _, workers = value.partition("=")
+        if stage not in batch.STAGES or not workers.isdigit():
+            raise SystemExit(f"--concurrency expects STAGE=WORKERS with STAGE one of {', '.join(batch.STAGES)}.")
+        concurrency[stage] = int(workers)
+    return concurrency
+
+
+def run_batch(specs_path, checkpoint_path, pdf_dir=None, concurrency=None):
+    api_key = os.environ.get("GROQ_API_KEY")
+    if not api_key:
+        raise SystemExit("Set GROQ_API_KEY to generate PRDs.")
+
+    def progress(item):
+        detail = f"failed at {item.failed_stage}: {item.error}" if item.status == batch.FAILED else "done"
+        print(f"{item.id}: {detail}", file=sys.stderr)
+
+    report = batch.run_batch(api_key, load_specs(specs_path), checkpoint_path, pdf_dir, parse_concurrency(concurrency), progress)
+    print(json.dumps(report.to_dict(), indent=2))
+    if report.failed:
+        sys.exit(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless A/B test PRD generation.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_cmd = commands.add_parser("serve", help="Run the HTTP API.")
+    serve_cmd.add_argument("--host", default="127.0.0.1")
+    serve_cmd.add_argument("--port", type=int, default=8080)
+    serve_cmd.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    serve_cmd.add_argument("--queue", type=int, default=DEFAULT_QUEUE_SIZE, help="Jobs allowed to wait for a worker.")
+
+    run_cmd = commands.add_parser("run", help="Generate one PRD from a YAML/JSON spec.")
+    run_cmd.add_argument("spec")
+    run_cmd.add_argument("--json", dest="json_path", help="Write the PRD as JSON here (default: stdout).")
+    run_cmd.add_argument("--pdf", dest="pdf_path", help="Write the PRD as PDF here.")
+
+    batch_cmd = commands.add_parser("batch", help="Generate PRDs for a list of specs, resumably.")
+    batch_cmd.add_argument("specs", help="JSON Lines file with one spec per line, or a JSON/YAML list.")
+    batch_cmd.add_argument("--checkpoint", required=True, help="JSONL file results are appended to; rerun to resume.")
+    batch_cmd.add_argument("--pdf-dir", help="Also render each PRD to <pdf-dir>/<id>.pdf.")
+    batch_cmd.add_argument("--concurrency", action="append", metavar="STAGE=WORKERS",
+                           help=f"Workers for a stage (repeatable); stages: {', '.join(batch.STAGES)}.")
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        serve(args.host, args.port, args.workers, args.queue)
+    elif args.command == "batch":
+        run_batch(args.specs, args.checkpoint, args.pdf_dir, args.concurrency)
+    else:
+        run(args.spec, args.json_path, args.pdf_path)
+
+
+if __name__ == "__main__":
+    main()
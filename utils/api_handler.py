@@ -3,6 +3,11 @@ import json
 import re
 import requests
 
+# --- Endpoint Configuration ---
+# Overridable so headless runs and benchmarks can target a local or mock endpoint.
+API_URL = os.environ.get("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+REQUEST_TIMEOUT = float(os.environ.get("GROQ_REQUEST_TIMEOUT", "60"))
+
 # --- Safe JSON Parse Helper ---
 def safe_json_parse(raw_text):
     try:
@@ -23,9 +28,10 @@ def generate_content(api_key, data, mode="hypotheses"):
     """
     Calls Groq API for various content generation tasks.
     - mode: "hypotheses", "prd_sections", "enrich_hypothesis", "risks"
+    - data: any mapping; prompt views (e.g. a ChainMap over PRD records) are only materialized here.
     """
     try:
-        url = "https://api.groq.com/openai/v1/chat/completions"
+        url = API_URL
         user_prompt = ""
 
         # --- Build Prompt based on mode ---
@@ -41,7 +47,7 @@ def generate_content(api_key, data, mode="hypotheses"):
             user_prompt = f"""
             Based on the A/B test inputs, generate 3 strong hypotheses.You are the world's best product manager especiallising in product sense and product intuition. You understand user pschology to the fullest. You are a master retention and monetization expert.
             For each input think deeply and give highly perosnalised response to the inputs.            
-            Inputs: {json.dumps(data, indent=2)}
+            Inputs: {json.dumps(data, indent=2, default=dict)}
             Each hypothesis should be a JSON object with "Statement", "Rationale", and "Behavioral Basis".
             Return a single JSON object with keys "Hypothesis 1" and "Hypothesis 2".
             Do not use any special character that could mess up json parsing in your answer whatsoever.
@@ -58,7 +64,7 @@ def generate_content(api_key, data, mode="hypotheses"):
             user_prompt = f"""
             You are the world's best product manager especiallising in product sense and product intuition. You understand user pschology to the fullest. You are a master retention and monetization expert.
             For each input think deeply and give highly perosnalised response to the inputs.
-            Draft PRD sections for this hypothesis and context: {json.dumps(data, indent=2)}
+            Draft PRD sections for this hypothesis and context: {json.dumps(data, indent=2, default=dict)}
             You MUST return a single JSON object. 
             The keys of this object MUST be exactly "Problem_Statement", "Goal_and_Success_Metrics", and "Implementation_Plan".
             The value for "Problem_Statement" and "Goal_and_Success_Metrics" should be a string.
@@ -78,7 +84,7 @@ def generate_content(api_key, data, mode="hypotheses"):
             You are the world's best product manager especiallising in product sense and product intuition. You understand user pschology to the fullest. You are a master retention and monetization expert.
             Enrich this custom hypothesis: "{data.get('custom_hypothesis')}"
             Use the following context to make it more specific and relevant.
-            Context: {json.dumps(data, indent=2)}
+            Context: {json.dumps(data, indent=2, default=dict)}
             Return JSON with: "Statement", "Rationale", "Behavioral Basis". The "Statement" should be the enriched version of the custom hypothesis.
             Do not use any special character that could mess up json parsing in your answer whatsoever.
             """
@@ -123,7 +129,7 @@ def generate_content(api_key, data, mode="hypotheses"):
             "response_format": {"type": "json_object"}
         }
 
-        response = requests.post(url, headers=headers, json=payload)
+        response = requests.post(url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
         if response.status_code != 200:
             return {"error": f"API Error {response.status_code}: {response.text}"}
 
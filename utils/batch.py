@@ -0,0 +1,319 @@
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+
+from utils import pipeline
+from utils.pdf_generator import create_pdf
+
+# --- Batch Configuration ---
+# Workers per stage. LLM stages wait on the network, so they get many; calculations and
+# PDF rendering hold the GIL and gain little beyond a couple of threads.
+DEFAULT_CONCURRENCY = {
+    "hypotheses": 8,
+    "hypothesis": 4,
+    "prd_sections": 8,
+    "calculations": 2,
+    "risks": 8,
+    "pdf": 2,
+}
+STAGES = tuple(DEFAULT_CONCURRENCY)
+QUEUE_FACTOR = 2  # each stage queues at most this many items per worker, bounding memory
+
+DONE, FAILED = "done", "failed"
+_STOP = object()
+
+
+# --- Items ---
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+def item_id(spec):
+    """A spec's "id", or a hash of its content so unchanged inputs keep their id across runs."""
+    if isinstance(spec, dict) and spec.get("id") is not None:
+        return str(spec["id"])
+    return _digest(spec)
+
+
+def spec_error(spec):
+    """Why a spec cannot be run, or None; such items fail at the "spec" stage without running."""
+    if not isinstance(spec, dict):
+        return f"Spec must be a JSON object, not {type(spec).__name__}."
+    if not isinstance(spec.get("intro_data"), dict):
+        return "Spec needs an \"intro_data\" object."
+    return None
+
+
+def pdf_filename(item_id):
+    """
+    A safe file name for an item's PDF. Ids that are not plain names (path separators,
+    "..", other characters) are sanitized, and a hash of the id keeps them distinct.
+    """
+    name = re.sub(r"[^A-Za-z0-9_-]+", "_", item_id).strip("_")[:100]
+    if name != item_id or not name:
+        name = f"{name}-{_digest(item_id)}" if name else _digest(item_id)
+    return f"{name}.pdf"
+
+
+@dataclass
+class BatchItem:
+    """One PRD moving through the stages; `state` collects each finished stage's output."""
+    id: str
+    spec: dict
+    state: dict = field(default_factory=dict)
+    status: str = None
+    error: str = None
+    failed_stage: str = None
+
+    def prd(self):
+        """The finished PRD, shaped like pipeline.run_prd's."""
+        return {
+            "intro_data": self.spec["intro_data"],
+            "hypothesis": self.state["hypothesis"],
+            "prd_sections": self.state["prd_sections"],
+            "calculations": self.state["calculations"],
+            "risks": self.state["risks"],
+        }
+
+    def to_record(self):
+        """The checkpoint line: the PRD once done, else the stages finished so far and the error."""
+        record = {"id": self.id, "status": self.status}
+        if self.status == DONE:
+            record.update(prd=self.prd(), hypotheses=self.state["hypotheses"])
+            if "pdf" in self.state:
+                record["pdf"] = self.state["pdf"]
+        else:
+            record.update(stage=self.failed_stage, error=self.error, state=self.state)
+        return record
+
+
+def read_checkpoint(path):
+    """
+    Latest record per item id from a JSONL checkpoint. A torn last line, left by a run
+    killed mid-write, is ignored; that item simply runs again.
+    """
+    records = {}
+    if not path or not os.path.exists(path):
+        return records
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record["id"]] = record
+    return records
+
+
+# --- Stages ---
+# Each takes (api_key, item, options) and stores its output under its own name in item.state.
+def _hypotheses(api_key, item, options):
+    spec = item.spec
+    custom = (spec.get("hypothesis") or {}).get("custom")
+    return {} if custom else pipeline.generate_hypotheses(api_key, spec["intro_data"])
+
+
+def _hypothesis(api_key, item, options):
+    return pipeline.choose_hypothesis(api_key, item.spec["intro_data"], item.state["hypotheses"], item.spec.get("hypothesis") or {})
+
+
+def _prd_sections(api_key, item, options):
+    return pipeline.generate_prd_sections(api_key, item.spec["intro_data"], item.state["hypothesis"])
+
+
+def _calculations(api_key, item, options):
+    return pipeline.build_calculations(item.spec["intro_data"], **pipeline.calculation_params(item.spec.get("calculations")))
+
+
+def _risks(api_key, item, options):
+    return pipeline.generate_risks(api_key, item.spec["intro_data"], item.state["hypothesis"])
+
+
+def _pdf(api_key, item, options):
+    path = os.path.join(options["pdf_dir"], pdf_filename(item.id))
+    with open(path, "wb") as f:
+        f.write(create_pdf(item.prd()))
+    return path
+
+
+STAGE_FUNCTIONS = {
+    "hypotheses": _hypotheses,
+    "hypothesis": _hypothesis,
+    "prd_sections": _prd_sections,
+    "calculations": _calculations,
+    "risks": _risks,
+    "pdf": _pdf,
+}
+
+
+class _Stage:
+    """A queue and its worker threads; workers pass items on, or straight to the results if they fail."""
+
+    def __init__(self, name, workers, run, on_done):
+        self.name = name
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=workers * QUEUE_FACTOR)
+        self.processed = self.failed = 0
+        self.busy_seconds = 0.0
+        self._run = run
+        self._on_done = on_done
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"batch-{name}-{i}", daemon=True) for i in range(workers)
+        ]
+        self.next = None
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        for _ in self._threads:
+            self.queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                return
+            if self.name not in item.state:  # finished by an earlier, interrupted run
+                start = time.perf_counter()
+                try:
+                    item.state[self.name] = self._run(item)
+                except Exception as e:
+                    item.status, item.error, item.failed_stage = FAILED, str(e), self.name
+                with self._lock:
+                    self.busy_seconds += time.perf_counter() - start
+                    self.processed += 1
+                    self.failed += item.status == FAILED
+            if item.status == FAILED or self.next is None:
+                item.status = item.status or DONE
+                self._on_done(item)
+            else:
+                self.next.queue.put(item)
+
+
+@dataclass
+class BatchReport:
+    items: int
+    done: int
+    failed: int
+    resumed: int            # already done in the checkpoint, not run again
+    elapsed_seconds: float
+    stages: dict            # name -> workers, processed, failed, busy_seconds, mean_seconds, utilisation
+
+    @property
+    def items_per_minute(self):
+        ran = self.done + self.failed - self.resumed
+        return ran / self.elapsed_seconds * 60 if self.elapsed_seconds else 0.0
+
+    def to_dict(self):
+        return {
+            "items": self.items, "done": self.done, "failed": self.failed, "resumed": self.resumed,
+            "elapsed_seconds": self.elapsed_seconds, "items_per_minute": self.items_per_minute, "stages": self.stages,
+        }
+
+
+# --- Batch Run ---
+def run_batch(api_key, specs, checkpoint_path=None, pdf_dir=None, concurrency=None, on_item=None):
+    """
+    Generates a PRD for every spec (the run_prd spec format, optionally with an "id") by
+    streaming them through one queue per stage: hypotheses -> hypothesis (select or enrich)
+    -> prd_sections -> calculations -> risks -> pdf (only with `pdf_dir`). Every stage has
+    its own workers (`concurrency` overrides DEFAULT_CONCURRENCY per stage), so LLM calls
+    of different items overlap while queues stay bounded.
+
+    A failing item is recorded and skipped; the others carry on. Specs that are not
+    objects with an "intro_data" object fail at the "spec" stage without running. Each
+    finished item is appended to the JSONL `checkpoint_path` as it completes. Rerunning
+    with the same checkpoint skips items already done and restarts failed ones at the
+    stage that failed, reusing what earlier stages produced. `on_item(item)` is called as
+    each item finishes.
+    """
+    workers = {**DEFAULT_CONCURRENCY, **(concurrency or {})}
+    names = [name for name in STAGES if name != "pdf" or pdf_dir]
+    if pdf_dir:
+        os.makedirs(pdf_dir, exist_ok=True)
+    options = {"pdf_dir": pdf_dir}
+
+    checkpoint = read_checkpoint(checkpoint_path)
+    items, rejected, seen, resumed = [], [], set(), 0
+    for spec in specs:
+        item = BatchItem(item_id(spec), spec)
+        if item.id in seen:
+            continue
+        seen.add(item.id)
+        error = spec_error(spec)
+        if error:
+            item.status, item.error, item.failed_stage = FAILED, error, "spec"
+            rejected.append(item)
+            continue
+        previous = checkpoint.get(item.id)
+        if previous and previous["status"] == DONE:
+            resumed += 1
+            continue
+        if previous:
+            item.state = previous.get("state") or {}
+        items.append(item)
+
+    results = queue.Queue()
+    for item in rejected:
+        results.put(item)
+    stages = [
+        _Stage(name, max(int(workers[name]), 1), lambda item, run=STAGE_FUNCTIONS[name]: run(api_key, item, options), results.put)
+        for name in names
+    ]
+    for stage, following in zip(stages, stages[1:]):
+        stage.next = following
+
+    start = time.perf_counter()
+    for stage in stages:
+        stage.start()
+    feeder = threading.Thread(target=lambda: [stages[0].queue.put(item) for item in items], name="batch-feeder", daemon=True)
+    feeder.start()
+
+    done = failed = 0
+    output = open(checkpoint_path, "a") if checkpoint_path else None
+    try:
+        for _ in range(len(rejected) + len(items)):
+            item = results.get()
+            if output:
+                output.write(json.dumps(item.to_record(), default=str) + "\n")
+                output.flush()
+            done += item.status == DONE
+            failed += item.status == FAILED
+            if on_item:
+                on_item(item)
+    finally:
+        if output:
+            output.close()
+    feeder.join()
+    for stage in stages:
+        stage.stop()
+    elapsed = time.perf_counter() - start
+
+    return BatchReport(
+        items=len(seen),
+        done=done + resumed,
+        failed=failed,
+        resumed=resumed,
+        elapsed_seconds=elapsed,
+        stages={
+            stage.name: {
+                "workers": stage.workers,
+                "processed": stage.processed,
+                "failed": stage.failed,
+                "busy_seconds": stage.busy_seconds,
+                "mean_seconds": stage.busy_seconds / stage.processed if stage.processed else 0.0,
+                "utilisation": stage.busy_seconds / (stage.workers * elapsed) if elapsed else 0.0,
+            }
+            for stage in stages
+        },
+    )
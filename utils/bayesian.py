@@ -0,0 +1,247 @@
+import math
+from dataclasses import dataclass, field
+
+import numpy as np
+from scipy.special import betaln, ndtr
+
+# --- Bayesian Configuration ---
+DEFAULT_DRAWS = 200_000      # posterior draws per comparison when no closed form applies
+SAMPLE_CHUNK = 50_000        # draws are taken in chunks of this size to bound memory
+CLOSED_FORM_MAX_TERMS = 200_000  # the exact Beta sums take one term per success
+DEFAULT_SIMULATIONS = 1_000
+
+
+# --- Posteriors ---
+
+@dataclass(frozen=True)
+class BetaPosterior:
+    """Beta-Binomial model of a conversion rate; the default prior is uniform, Beta(1, 1)."""
+    alpha: float = 1.0
+    beta: float = 1.0
+
+    def update(self, successes, trials):
+        return BetaPosterior(self.alpha + successes, self.beta + trials - successes)
+
+    @property
+    def mean(self):
+        return self.alpha / (self.alpha + self.beta)
+
+    @property
+    def variance(self):
+        total = self.alpha + self.beta
+        return self.alpha * self.beta / (total ** 2 * (total + 1))
+
+    def sample(self, rng, size):
+        return rng.beta(self.alpha, self.beta, size)
+
+
+@dataclass(frozen=True)
+class NormalInverseGamma:
+    """
+    Normal-Inverse-Gamma model of a metric's mean with unknown variance. The default prior
+    is the reference prior (all parameters 0), which needs at least two observations.
+    The posterior of the mean is Student-t with 2 * alpha degrees of freedom.
+    """
+    mu: float = 0.0
+    kappa: float = 0.0
+    alpha: float = 0.0
+    beta: float = 0.0
+
+    def update(self, n, mean, std_dev):
+        """Posterior after `n` observations with sample `mean` and `std_dev`."""
+        kappa = self.kappa + n
+        return NormalInverseGamma(
+            mu=(self.kappa * self.mu + n * mean) / kappa,
+            kappa=kappa,
+            alpha=self.alpha + n / 2,
+            beta=self.beta + 0.5 * (n - 1) * std_dev ** 2 + self.kappa * n * (mean - self.mu) ** 2 / (2 * kappa),
+        )
+
+    @property
+    def mean(self):
+        return self.mu
+
+    @property
+    def scale(self):
+        """Scale of the Student-t posterior of the mean."""
+        return math.sqrt(self.beta / (self.alpha * self.kappa))
+
+    def sample(self, rng, size):
+        return self.mu + self.scale * rng.standard_t(2 * self.alpha, size)
+
+
+# --- Comparisons ---
+
+@dataclass(frozen=True)
+class Comparison:
+    """
+    Decision metrics for a variant against control. Expected losses are in metric units:
+    the average shortfall from picking an arm if it is in fact the worse one.
+    """
+    probability_to_beat: float
+    expected_loss_variant: float  # E[max(control - variant, 0)]: the risk of shipping the variant
+    expected_loss_control: float  # E[max(variant - control, 0)]: the risk of keeping control
+    method: str                   # "closed form" or "sampling"
+
+
+def _probability_greater(a, b, c, d):
+    """
+    P(X > Y) for X ~ Beta(a, b), Y ~ Beta(c, d), integer `a`: Evan Miller's exact sum,
+    one vectorized term per unit of `a`, in log space.
+    """
+    i = np.arange(int(a))
+    terms = betaln(c + i, d + b) - np.log(b + i) - betaln(1 + i, b) - betaln(c, d)
+    return float(np.exp(terms).sum())
+
+
+def _has_closed_form(control, variant):
+    return (
+        isinstance(control, BetaPosterior) and isinstance(variant, BetaPosterior)
+        and float(control.alpha).is_integer() and float(variant.alpha).is_integer()
+        and max(control.alpha, variant.alpha) + 1 <= CLOSED_FORM_MAX_TERMS
+    )
+
+
+def _compare_closed_form(control, variant):
+    # Size-biasing: E[A * 1{A > B}] = E[A] * P(A+ > B) with A+ ~ Beta(alpha_A + 1, beta_A).
+    a, b = control, variant
+    a_plus, b_plus = BetaPosterior(a.alpha + 1, a.beta), BetaPosterior(b.alpha + 1, b.beta)
+    beat = _probability_greater(b.alpha, b.beta, a.alpha, a.beta)
+    loss_variant = a.mean * _probability_greater(a_plus.alpha, a_plus.beta, b.alpha, b.beta) \
+        - b.mean * _probability_greater(a.alpha, a.beta, b_plus.alpha, b_plus.beta)
+    loss_control = b.mean * _probability_greater(b_plus.alpha, b_plus.beta, a.alpha, a.beta) \
+        - a.mean * _probability_greater(b.alpha, b.beta, a_plus.alpha, a_plus.beta)
+    return Comparison(min(max(beat, 0.0), 1.0), max(loss_variant, 0.0), max(loss_control, 0.0), "closed form")
+
+
+def _compare_sampling(control, variant, draws, seed):
+    rng = np.random.default_rng(seed)
+    wins = loss_variant = loss_control = 0.0
+    for start in range(0, draws, SAMPLE_CHUNK):
+        size = min(SAMPLE_CHUNK, draws - start)
+        difference = variant.sample(rng, size) - control.sample(rng, size)
+        wins += np.count_nonzero(difference > 0)
+        loss_variant += np.maximum(-difference, 0).sum()
+        loss_control += np.maximum(difference, 0).sum()
+    return Comparison(float(wins / draws), float(loss_variant / draws), float(loss_control / draws), "sampling")
+
+
+def compare(control, variant, draws=DEFAULT_DRAWS, seed=0):
+    """
+    Probability that the variant beats control and the expected loss of each choice.
+    Two Beta posteriors with whole-number alphas use the exact closed forms; anything
+    else falls back to Monte Carlo over `draws` posterior samples, taken in fixed-size
+    chunks with a fixed seed so repeated calls agree.
+    """
+    if _has_closed_form(control, variant):
+        return _compare_closed_form(control, variant)
+    return _compare_sampling(control, variant, draws, seed)
+
+
+# --- Time-to-Decision Simulation ---
+
+@dataclass
+class DecisionSimulation:
+    """Outcome of simulated experiments: the day each reached a decision (inf if none) and what it chose."""
+    days: np.ndarray
+    shipped: np.ndarray
+    max_days: int
+    true_effect: float = 0.0  # relative, as a percentage
+    summary: dict = field(init=False)
+
+    def __post_init__(self):
+        decided = np.isfinite(self.days)
+        self.summary = {
+            "decided_share": float(decided.mean()),
+            "ship_share": float((decided & self.shipped).mean()),
+            # Order statistics rather than interpolation, so undecided (infinite) runs stay infinite.
+            "median_days": float(np.quantile(self.days, 0.5, method="inverted_cdf")),
+            "p80_days": float(np.quantile(self.days, 0.8, method="inverted_cdf")),
+        }
+
+    def decided_by(self, day):
+        """Share of simulated experiments that had decided by `day`."""
+        return float((self.days <= day).mean())
+
+
+def _normal_decision_metrics(mean_difference, variance):
+    """P(variant > control) and both expected losses for a normal posterior of the difference."""
+    sd = np.sqrt(variance)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = mean_difference / sd
+    density = np.exp(-0.5 * z ** 2) / math.sqrt(2 * math.pi)
+    beat = ndtr(z)
+    loss_control = mean_difference * beat + sd * density
+    loss_variant = loss_control - mean_difference
+    return beat, loss_variant, loss_control
+
+
+def simulate_time_to_decision(metric_type, baseline, min_detectable_effect, daily_users, max_days,
+                              std_dev=None, true_effect=None, probability_threshold=0.95,
+                              loss_threshold=0.001, simulations=DEFAULT_SIMULATIONS, seed=0):
+    """
+    Simulates `simulations` experiments day by day, each arm enrolling `daily_users` a day,
+    and records when each would stop: the first day the leading arm has at least
+    `probability_threshold` chance of being better and an expected loss under
+    `loss_threshold` (a fraction of the baseline). `baseline` and `min_detectable_effect`
+    follow the frequentist calculators (percentages for proportions, relative MDE in %);
+    the variant's true effect defaults to the MDE. Pass `true_effect=0` to see how often
+    an experiment without an effect would wrongly ship.
+
+    Every simulated experiment and day is evaluated at once on (simulations, days) arrays.
+    Posteriors are moment-matched to normals, which is accurate once each arm has a few
+    hundred users; use `compare` for exact analysis of observed data.
+    """
+    if daily_users < 1:
+        raise ValueError("At least one user per arm per day is needed to simulate an experiment.")
+    rng = np.random.default_rng(seed)
+    true_effect = min_detectable_effect if true_effect is None else true_effect
+    days = np.arange(1, max_days + 1)
+    n = days * daily_users
+    shape = (simulations, max_days)
+
+    if metric_type == "Proportion":
+        p_control = baseline / 100.0
+        p_variant = min(p_control * (1 + true_effect / 100.0), 1.0)
+        if not 0 < p_control < 1:
+            raise ValueError("Current value must be between 0 and 100 for proportion metrics.")
+        prior = BetaPosterior()
+        moments = []
+        for p in (p_control, p_variant):
+            successes = np.cumsum(rng.binomial(daily_users, p, shape), axis=1)
+            alpha, beta = prior.alpha + successes, prior.beta + n - successes
+            total = alpha + beta
+            moments.append((alpha / total, alpha * beta / (total ** 2 * (total + 1))))
+        scale = p_control
+    else:
+        if not std_dev or std_dev <= 0:
+            raise ValueError("Standard deviation must be greater than 0 for continuous metrics.")
+        mu_control = baseline
+        mu_variant = baseline * (1 + true_effect / 100.0)
+        moments = []
+        for mu in (mu_control, mu_variant):
+            # Daily sufficient statistics: the day's sum is normal, its within-day sum of squares scaled chi-square.
+            day_sum = rng.normal(mu * daily_users, std_dev * math.sqrt(daily_users), shape)
+            day_squares = std_dev ** 2 * rng.chisquare(max(daily_users - 1, 1), shape) + day_sum ** 2 / daily_users
+            mean = np.cumsum(day_sum, axis=1) / n
+            sum_sq = np.maximum(np.cumsum(day_squares, axis=1) - n * mean ** 2, 0.0)
+            # Reference-prior NIG: the posterior of the mean is t with variance beta / (kappa * (alpha - 1)),
+            # i.e. sum_sq / (n * (n - 2)).
+            moments.append((mean, sum_sq / (n * np.maximum(n - 2, 1))))
+        scale = abs(baseline) or 1.0
+
+    (mean_control, var_control), (mean_variant, var_variant) = moments
+    beat, loss_variant, loss_control = _normal_decision_metrics(mean_variant - mean_control, var_control + var_variant)
+    tolerance = loss_threshold * scale
+    ship = (beat >= probability_threshold) & (loss_variant <= tolerance)
+    keep = (1 - beat >= probability_threshold) & (loss_control <= tolerance)
+    stop = ship | keep
+
+    stopped = stop.any(axis=1)
+    first = stop.argmax(axis=1)
+    return DecisionSimulation(
+        days=np.where(stopped, days[first], np.inf),
+        shipped=stopped & ship[np.arange(simulations), first],
+        max_days=max_days,
+        true_effect=true_effect,
+    )
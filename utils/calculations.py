@@ -1,74 +1,248 @@
 import math
-from scipy.stats import norm
+from functools import lru_cache
 
-def calculate_sample_size_proportion(current_value: float, min_detectable_effect: float, confidence: float, power: float) -> int:
-    """
-    Calculates sample size for proportion-based metrics (e.g., conversion rates).
-    Uses a two-proportion z-test formula.
-    """
-    if current_value <= 0 or current_value >= 100:
-        raise ValueError("Current value must be between 0 and 100 for proportion metrics.")
-    
-    # Convert percentages to proportions
-    p1 = current_value / 100.0
-    p2 = p1 * (1 + min_detectable_effect / 100.0)
+import numpy as np
+from scipy.special import logsumexp
+from scipy.stats import binom, norm, poisson
+
+# --- Rare-Event Configuration ---
+EXACT_EVENT_THRESHOLD = 100  # expected control conversions below which proportions are sized exactly
+EXACT_MAX_RATE = 0.05        # the exact engine's Poisson model needs rare events in both arms
+EXACT_TAIL_SDS = 7           # event counts further than this from their mean are ignored
+
+# --- Array Cores ---
+# The formulas below accept scalars or NumPy arrays, so one call can size a whole
+# portfolio of experiments. They do not validate inputs; the scalar wrappers and
+# the portfolio planner do that before calling them.
 
-    if p2 >= 1.0:
-        p2 = 0.999 # Clamp to avoid math domain errors
+def _z_scores(confidence, power):
+    z_alpha = norm.ppf(1 - (1 - np.asarray(confidence, dtype=float)) / 2)
+    z_beta = norm.ppf(np.asarray(power, dtype=float))
+    return z_alpha, z_beta
 
+def _normal_sample_size_proportion(p1, p2, confidence, power):
+    """Two-proportion z-test sample size per variant from rates, element-wise."""
     # Pooled probability
     p_pooled = (p1 + p2) / 2
 
-    # Z-scores
-    z_alpha = norm.ppf(1 - (1 - confidence) / 2)
-    z_beta = norm.ppf(power)
+    z_alpha, z_beta = _z_scores(confidence, power)
 
     # Formula components
-    numerator = (z_alpha * math.sqrt(2 * p_pooled * (1 - p_pooled)) +
-                 z_beta * math.sqrt(p1 * (1 - p1) + p2 * (1 - p2))) ** 2
+    numerator = (z_alpha * np.sqrt(2 * p_pooled * (1 - p_pooled)) +
+                 z_beta * np.sqrt(p1 * (1 - p1) + p2 * (1 - p2))) ** 2
     denominator = (p2 - p1) ** 2
 
-    if denominator == 0:
-        return float('inf')
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sample_size = np.ceil(numerator / denominator)
+    return np.where(denominator == 0, np.inf, sample_size)
 
-    return math.ceil(numerator / denominator)
+def _rates(current_value, min_detectable_effect):
+    # Convert percentages to proportions
+    p1 = np.asarray(current_value, dtype=float) / 100.0
+    p2 = p1 * (1 + np.asarray(min_detectable_effect, dtype=float) / 100.0)
+    return p1, p2
 
-def calculate_sample_size_continuous(mean: float, std_dev: float, min_detectable_effect: float, confidence: float, power: float) -> int:
+def _uses_exact(p1, p2, normal_sample_size):
+    return (np.maximum(p1, p2) <= EXACT_MAX_RATE) & (normal_sample_size * p1 < EXACT_EVENT_THRESHOLD)
+
+def calculate_sample_size_proportion_array(current_value, min_detectable_effect, confidence, power, method="auto"):
     """
-    Calculates sample size for continuous metrics (e.g., ARPDAU, time on page).
-    Uses a two-sample t-test formula.
+    Sample size per variant for proportion metrics, element-wise.
+    "normal" uses the two-proportion z-test formula; "exact" sizes the exact conditional
+    test for rare events; "auto" uses the exact engine where few conversions are expected
+    (see EXACT_EVENT_THRESHOLD), since the normal approximation is unreliable there.
+    Returns floats: whole numbers, inf where the effect is zero, nan where the target
+    rate falls outside (0, 100%).
     """
-    if std_dev <= 0:
-        raise ValueError("Standard deviation must be greater than 0 for continuous metrics.")
+    p1, p2 = _rates(current_value, min_detectable_effect)
+    p1, p2, confidence, power = np.broadcast_arrays(p1, p2, np.asarray(confidence, dtype=float), np.asarray(power, dtype=float))
+    valid = (p2 > 0) & (p2 < 1)
+    sample_size = np.where(valid, _normal_sample_size_proportion(p1, np.where(valid, p2, p1), confidence, power), np.nan)
 
-    # Z-scores
-    z_alpha = norm.ppf(1 - (1 - confidence) / 2)
-    z_beta = norm.ppf(power)
+    if method == "auto":
+        exact = valid & np.isfinite(sample_size) & _uses_exact(p1, p2, sample_size)
+    elif method == "exact":
+        exact = valid & np.isfinite(sample_size)
+    elif method == "normal":
+        return sample_size
+    else:
+        raise ValueError(f"Unknown sample size method '{method}'.")
+    if exact.any():
+        sample_size = sample_size.copy()
+        sample_size[exact] = _exact_sample_size(p1[exact], p2[exact], 1 - confidence[exact], power[exact], sample_size[exact])
+    return sample_size
 
-    # Absolute minimum detectable effect
-    delta = mean * (min_detectable_effect / 100.0)
+def uses_exact_proportion_test_array(current_value, min_detectable_effect, confidence, power):
+    """Whether "auto" sizing uses the exact rare-event engine, element-wise."""
+    p1, p2 = _rates(current_value, min_detectable_effect)
+    valid = (p2 > 0) & (p2 < 1)
+    sample_size = _normal_sample_size_proportion(p1, np.where(valid, p2, p1), confidence, power)
+    return valid & np.isfinite(sample_size) & _uses_exact(p1, p2, sample_size)
 
-    if delta == 0:
-        return float('inf')
+def calculate_sample_size_continuous_array(mean, std_dev, min_detectable_effect, confidence, power):
+    """
+    Two-sample t-test sample size per variant, element-wise.
+    Returns floats: whole numbers, or inf where the effect is zero.
+    """
+    z_alpha, z_beta = _z_scores(confidence, power)
+
+    # Absolute minimum detectable effect
+    delta = np.asarray(mean, dtype=float) * (np.asarray(min_detectable_effect, dtype=float) / 100.0)
 
     # Formula
-    numerator = 2 * (std_dev ** 2) * ((z_alpha + z_beta) ** 2)
+    numerator = 2 * (np.asarray(std_dev, dtype=float) ** 2) * ((z_alpha + z_beta) ** 2)
     denominator = delta ** 2
-    
-    return math.ceil(numerator / denominator)
 
-def calculate_duration(sample_size: int, daily_active_users: int, coverage: float) -> int:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sample_size = np.ceil(numerator / denominator)
+    return np.where(denominator == 0, np.inf, sample_size)
+
+def calculate_duration_array(sample_size, daily_active_users, coverage):
     """
-    Estimates the duration of the A/B test in days.
+    Experiment duration in days, element-wise; inf where the sample size is
+    infinite or no users are eligible.
     """
-    if sample_size == float('inf'):
-        return float('inf')
-        
-    total_sample_size = sample_size * 2  # control + variant
-    eligible_users_per_day = daily_active_users * (coverage / 100.0)
+    total_sample_size = np.asarray(sample_size, dtype=float) * 2  # control + variant
+    eligible_users_per_day = np.asarray(daily_active_users, dtype=float) * (np.asarray(coverage, dtype=float) / 100.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        duration = np.maximum(1, np.ceil(total_sample_size / eligible_users_per_day))
+    return np.where(eligible_users_per_day <= 0, np.inf, duration)
+
+# --- Exact Rare-Event Power ---
+# With rare events, the conversions in both arms are close to Poisson. Given K conversions in
+# total, the variant's share is Binomial(K, p2 / (p1 + p2)), and Binomial(K, 1/2) when there is
+# no effect, so the exact test is a binomial test on that split. Its power mixes the binomial
+# tails over K ~ Poisson(n (p1 + p2)), so the cost depends on the expected number of
+# conversions rather than on n.
+
+@lru_cache(maxsize=32)
+def _critical_values(alpha, size):
+    """Smallest variant share rejecting H0 (two-sided, alpha / 2 per tail) for K = 0 .. size - 1."""
+    return binom.isf(alpha / 2, np.arange(size), 0.5) + 1
+
+def exact_power_proportion_array(sample_size, p1, p2, alpha):
+    """
+    Power of the exact conditional test with `sample_size` users per variant, element-wise.
+    Tail probabilities and Poisson weights are combined in log space.
+    """
+    n, p1, p2, alpha = (np.atleast_1d(np.asarray(v, dtype=float)) for v in np.broadcast_arrays(sample_size, p1, p2, alpha))
+    return _exact_power(n * (p1 + p2), p2 / (p1 + p2), alpha)
+
+def _exact_power(mean, share, alpha):
+    """Exact power from the expected conversions in both arms, the variant's share of them and alpha."""
+    width = np.ceil(EXACT_TAIL_SDS * np.sqrt(mean)).astype(int) + 10
+    # Rows are grouped by grid width (to within a factor of two), so one large row does not widen every row's grid.
+    buckets = np.frexp(width)[1]
+    power = np.empty(len(mean))
+    for bucket in np.unique(buckets):
+        rows = buckets == bucket
+        power[rows] = _exact_power_grid(mean[rows], share[rows], alpha[rows], int(width[rows].max()))
+    return power
+
+def _exact_power_grid(mean, share, alpha, width):
+    k = np.maximum(np.floor(mean) - width, 0)[:, None] + np.arange(2 * width + 1)
 
-    if eligible_users_per_day <= 0:
-        return float('inf')
+    size = 1 << int(k.max()).bit_length()  # table sizes are powers of two so the cache is reused
+    upper = np.empty_like(k)
+    for a in np.unique(alpha):
+        rows = alpha == a
+        upper[rows] = _critical_values(float(a), size)[k[rows].astype(int)]
 
-    duration = math.ceil(total_sample_size / eligible_users_per_day)
-    return max(1, duration)
+    share = share[:, None]
+    log_reject = np.logaddexp(binom.logsf(upper - 1, k, share), binom.logcdf(k - upper, k, share))
+    return np.exp(logsumexp(poisson.logpmf(k, mean[:, None]) + log_reject, axis=1))
+
+def _exact_sample_size(p1, p2, alpha, power, guess):
+    """
+    Smallest n whose exact power reaches `power`, element-wise.
+
+    Power depends on n only through the expected conversions n (p1 + p2), given the
+    variant's share p2 / (p1 + p2) and alpha. The share depends on the MDE alone, so rows
+    with the same MDE, alpha and power share one power curve in the expected conversions.
+    Bisection finds each curve's crossing once, for all curves together; every row's n
+    is the crossing over its p1 + p2, rounded up, unless n - 1 falls inside the final
+    bracket; those few rows check n - 1 exactly, so the result is the minimal n.
+    """
+    events = p1 + p2
+    share = p2 / events
+    # Shares of equal MDEs differ in the last bits with the baseline; grouping ignores that.
+    curves, curve = np.unique(np.stack([np.round(share, 12), alpha, power], axis=1), axis=0, return_inverse=True)
+    curve = curve.ravel()
+    c_share, c_alpha, c_power = curves.T
+    seed, step = np.zeros(len(curves)), np.full(len(curves), np.inf)
+    np.maximum.at(seed, curve, guess * events)
+    np.minimum.at(step, curve, events)
+
+    # The exact test is conservative, so the answer is usually a few percent above the normal guess.
+    lo, hi = seed * 0.95, seed * 1.15
+    while True:
+        short = _exact_power(hi, c_share, c_alpha) < c_power
+        if not short.any():
+            break
+        lo, hi = np.where(short, hi, lo), np.where(short, hi * 2, hi)
+    while True:
+        enough = _exact_power(lo, c_share, c_alpha) >= c_power
+        if not enough.any():
+            break
+        lo, hi = np.where(enough, lo / 2, lo), np.where(enough, lo, hi)
+    # Narrower than every row's p1 + p2, a final bracket holds at most one candidate n per row;
+    # dividing by the rows per curve keeps the rows that need an exact check to about one per curve.
+    tolerance = step / (2 * np.bincount(curve, minlength=len(curves)))
+    open_ = hi - lo > tolerance
+    while open_.any():
+        mid = (lo[open_] + hi[open_]) / 2
+        enough = _exact_power(mid, c_share[open_], c_alpha[open_]) >= c_power[open_]
+        hi[open_] = np.where(enough, mid, hi[open_])
+        lo[open_] = np.where(enough, lo[open_], mid)
+        open_ = hi - lo > tolerance
+
+    n = np.maximum(np.ceil(hi[curve] / events), 1)
+    unsure = ((n - 1) * events >= lo[curve]) & (n > 1)
+    if unsure.any():
+        below = n[unsure] - 1
+        n[unsure] = np.where(
+            _exact_power(below * events[unsure], share[unsure], alpha[unsure]) >= power[unsure], below, n[unsure]
+        )
+    return n
+
+def _to_int(value):
+    value = float(value)
+    return value if math.isinf(value) else int(value)
+
+# --- Single Experiment ---
+
+def calculate_sample_size_proportion(current_value: float, min_detectable_effect: float, confidence: float, power: float,
+                                     method: str = "auto") -> int:
+    """
+    Calculates sample size for proportion-based metrics (e.g., conversion rates).
+    Uses a two-proportion z-test formula, or the exact rare-event engine when few
+    conversions are expected (see calculate_sample_size_proportion_array).
+    """
+    if current_value <= 0 or current_value >= 100:
+        raise ValueError("Current value must be between 0 and 100 for proportion metrics.")
+    target = current_value * (1 + min_detectable_effect / 100.0)
+    if target <= 0 or target >= 100:
+        raise ValueError("Current value adjusted by the minimum detectable effect must stay between 0 and 100.")
+
+    return _to_int(calculate_sample_size_proportion_array(current_value, min_detectable_effect, confidence, power, method))
+
+def uses_exact_proportion_test(current_value: float, min_detectable_effect: float, confidence: float, power: float) -> bool:
+    """Whether "auto" sizing of this proportion metric uses the exact rare-event engine."""
+    return bool(uses_exact_proportion_test_array(current_value, min_detectable_effect, confidence, power))
+
+def calculate_sample_size_continuous(mean: float, std_dev: float, min_detectable_effect: float, confidence: float, power: float) -> int:
+    """
+    Calculates sample size for continuous metrics (e.g., ARPDAU, time on page).
+    Uses a two-sample t-test formula.
+    """
+    if std_dev <= 0:
+        raise ValueError("Standard deviation must be greater than 0 for continuous metrics.")
+
+    return _to_int(calculate_sample_size_continuous_array(mean, std_dev, min_detectable_effect, confidence, power))
+
+def calculate_duration(sample_size: int, daily_active_users: int, coverage: float) -> int:
+    """
+    Estimates the duration of the A/B test in days.
+    """
+    return _to_int(calculate_duration_array(sample_size, daily_active_users, coverage))
@@ -0,0 +1,204 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.calculations import calculate_duration_array
+
+# --- Forecast Configuration ---
+MIN_HISTORY_DAYS = 14    # two full weeks, so every weekday is seen at least twice
+MAX_HORIZON_DAYS = 36500  # a century; longer durations under a non-flat forecast are reported as infinite
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+@dataclass
+class DAUForecast:
+    """
+    Daily active users as a linear trend times a weekday factor:
+    dau(d) = max(0, level + slope * days_since(origin)) * weekday_factors[d.weekday()].
+    """
+    origin: date
+    level: float
+    slope: float = 0.0
+    weekday_factors: tuple = (1.0,) * 7
+    history_days: int = 0
+
+    @classmethod
+    def flat(cls, dau, origin=None):
+        """A constant-DAU forecast: what `calculate_duration` assumes."""
+        return cls(origin=origin or date.today(), level=float(dau))
+
+    @property
+    def is_flat(self):
+        return self.slope == 0 and all(f == 1 for f in self.weekday_factors)
+
+    def predict(self, start_date, days):
+        """Forecast DAU for `days` consecutive days from `start_date`."""
+        offset = (start_date - self.origin).days
+        t = np.arange(offset, offset + days)
+        trend = np.maximum(self.level + self.slope * t, 0.0)
+        factors = np.asarray(self.weekday_factors)[(start_date.weekday() + np.arange(days)) % 7]
+        return trend * factors
+
+    def to_dict(self):
+        return {
+            "origin": self.origin.isoformat(),
+            "level": self.level,
+            "slope": self.slope,
+            "weekday_factors": list(self.weekday_factors),
+            "history_days": self.history_days,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            origin=date.fromisoformat(data["origin"]),
+            level=float(data["level"]),
+            slope=float(data.get("slope", 0.0)),
+            weekday_factors=tuple(data.get("weekday_factors") or (1.0,) * 7),
+            history_days=int(data.get("history_days", 0)),
+        )
+
+
+# --- Fitting ---
+def read_dau_history(source):
+    """
+    Reads a DAU history CSV (path or file-like) with a date column and a DAU column
+    into a daily Series. Gaps are interpolated; raises ValueError if it cannot be used.
+    """
+    df = pd.read_csv(source)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    if "date" not in df.columns or "dau" not in df.columns:
+        raise ValueError("DAU history needs 'date' and 'dau' columns.")
+    series = pd.Series(
+        pd.to_numeric(df["dau"], errors="coerce").to_numpy(),
+        index=pd.to_datetime(df["date"], errors="coerce"),
+    )
+    series = series[series.index.notna()].dropna().sort_index()
+    return series.groupby(level=0).mean()
+
+
+def fit_dau_forecast(history):
+    """
+    Fits weekday seasonality and a linear trend to a daily DAU Series indexed by date.
+    A 7-day centred moving average gives a first trend; weekday factors are the mean
+    ratio of actuals to it, normalised to average 1; the trend is then refit on the
+    deseasonalised series.
+    """
+    history = history.asfreq("D").interpolate(limit_direction="both")
+    if len(history) < MIN_HISTORY_DAYS:
+        raise ValueError(f"At least {MIN_HISTORY_DAYS} days of DAU history are needed for a forecast.")
+
+    values = history.to_numpy(dtype=float)
+    t = np.arange(len(values))
+    weekdays = history.index.weekday.to_numpy()
+
+    smooth = pd.Series(values).rolling(7, center=True).mean().to_numpy()
+    known = ~np.isnan(smooth)
+    slope, level = np.polyfit(t[known], smooth[known], 1)
+
+    trend = np.maximum(level + slope * t, 1e-9)
+    factors = np.bincount(weekdays, weights=values / trend, minlength=7) / np.bincount(weekdays, minlength=7)
+    factors /= factors.mean()
+
+    slope, level = np.polyfit(t, values / factors[weekdays], 1)
+    return DAUForecast(
+        origin=history.index[0].date(),
+        level=float(level),
+        slope=float(slope),
+        weekday_factors=tuple(float(f) for f in factors),
+        history_days=len(values),
+    )
+
+
+# --- Duration ---
+def forecast_duration(sample_size, forecast, coverage, start_date=None, whole_weeks=False):
+    """
+    Days until the experiment has enrolled 2 x `sample_size` users (control + variant),
+    accumulating forecast eligible users day by day from `start_date` (default today).
+    Vectorized over `sample_size`: the daily forecast is cumulated once and every target
+    is located with one searchsorted. A flat forecast uses the closed form instead, so it
+    matches `calculate_duration` exactly at any length; otherwise returns inf where
+    MAX_HORIZON_DAYS is not enough.
+    """
+    start_date = start_date or date.today()
+    targets = 2 * np.asarray(sample_size, dtype=float)
+    finite = np.isfinite(targets)
+
+    if forecast.is_flat:
+        days = np.where(finite, calculate_duration_array(np.where(finite, targets / 2, 0.0), max(forecast.level, 0.0), coverage), np.inf)
+        return _finish_duration(days, whole_weeks)
+
+    goal = targets[finite].max(initial=0.0)
+
+    # Grow the horizon geometrically until the largest target is covered.
+    horizon = 64
+    while True:
+        cumulative = np.cumsum(forecast.predict(start_date, horizon) * (coverage / 100.0))
+        if cumulative[-1] >= goal or horizon >= MAX_HORIZON_DAYS:
+            break
+        horizon = min(horizon * 4, MAX_HORIZON_DAYS)
+
+    # The relative tolerance absorbs cumsum rounding, so a flat forecast matches ceil(total / daily) exactly.
+    days = np.searchsorted(cumulative, np.where(finite, targets, 0.0) * (1 - 1e-12)) + 1.0
+    days = np.where(finite & (days <= horizon), days, np.inf)
+    return _finish_duration(days, whole_weeks)
+
+
+def _finish_duration(days, whole_weeks):
+    if whole_weeks:
+        days = np.ceil(days / 7) * 7
+    if days.ndim == 0:
+        return int(days) if np.isfinite(days) else float("inf")
+    return days
+
+
+def calculations_forecast(calculations, intro_data):
+    """The forecast a set of calculations was (or will be) made with: the stored fit, else flat intro DAU."""
+    if calculations.get("dau_forecast"):
+        return DAUForecast.from_dict(calculations["dau_forecast"])
+    return DAUForecast.flat(intro_data.get("dau", 10000))
+
+
+def plan_duration(calculations, intro_data):
+    """
+    Duration and end date for stored calculations, recomputed with the same engine that
+    produced them, so the Calculations page and the PDF always agree.
+    Returns (days, end_date); end_date is None when the duration is infinite.
+    """
+    sample_size = calculations.get("sample_size")
+    if sample_size is None:
+        return None, None
+    start_date = date.fromisoformat(calculations["start_date"]) if calculations.get("start_date") else date.today()
+    days = forecast_duration(
+        sample_size,
+        calculations_forecast(calculations, intro_data),
+        calculations.get("coverage", 100),
+        start_date,
+        bool(calculations.get("whole_weeks")),
+    )
+    try:
+        end_date = start_date + timedelta(days=days - 1) if days != float("inf") else None
+    except OverflowError:  # a flat forecast can run past the calendar's year 9999
+        end_date = None
+    return days, end_date
+
+
+def describe_duration(days):
+    """Duration for display; infinite means the forecast never reaches the sample within MAX_HORIZON_DAYS."""
+    if days == float("inf"):
+        return f"over {MAX_HORIZON_DAYS:,} days (traffic never reaches the sample within the forecast horizon)"
+    return f"{days:,} days"
+
+
+def describe_forecast(forecast):
+    """One-line summary of a fitted forecast for the UI and PDF."""
+    if not forecast.history_days:
+        return f"Constant {forecast.level:,.0f} DAU"
+    peak = WEEKDAYS[int(np.argmax(forecast.weekday_factors))]
+    low = WEEKDAYS[int(np.argmin(forecast.weekday_factors))]
+    return (
+        f"Fitted on {forecast.history_days} days of DAU history: trend {forecast.slope:+,.0f} users/day, "
+        f"busiest on {peak} ({max(forecast.weekday_factors):.2f}x), quietest on {low} ({min(forecast.weekday_factors):.2f}x)"
+    )
@@ -0,0 +1,139 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Queue Configuration ---
+DEFAULT_WORKERS = 16
+DEFAULT_SESSION_LIMIT = 2
+FINISHED_JOB_TTL = 600  # seconds a finished, never-collected job is kept
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class JobLimitError(Exception):
+    """Raised when a session already has its maximum number of active jobs."""
+
+
+class Job:
+    """Handle for one background job. Only the queue mutates it."""
+
+    __slots__ = ("id", "session_id", "kind", "status", "result", "error", "created_at", "finished_at", "_future", "_released")
+
+    def __init__(self, session_id, kind):
+        self.id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.kind = kind
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._future = None
+        self._released = False  # set once the call has returned (or will never run)
+
+    @property
+    def done(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+
+class JobQueue:
+    """
+    Runs blocking generation calls on a shared thread pool so the Streamlit
+    script thread never waits on LLM I/O. Callers get a Job handle back and
+    poll it; results of cancelled jobs are discarded.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, session_limit=DEFAULT_SESSION_LIMIT):
+        self.session_limit = session_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generation-job")
+        self._jobs = {}
+        self._active = {}  # session id -> calls queued or still running, cancelled ones included
+        self._lock = threading.Lock()
+
+    def submit(self, session_id, kind, fn, *args, **kwargs):
+        """Queues `fn(*args, **kwargs)` for a session and returns its Job handle."""
+        with self._lock:
+            self._prune()
+            # A cancelled call keeps its worker busy until it returns, so it still counts here.
+            if self._active.get(session_id, 0) >= self.session_limit:
+                raise JobLimitError(f"Please wait: at most {self.session_limit} generations can run at once.")
+            job = Job(session_id, kind)
+            self._jobs[job.id] = job
+            self._active[session_id] = self._active.get(session_id, 0) + 1
+        job._future = self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _release(self, job):
+        """Frees the job's slot in its session's limit; caller holds the lock."""
+        if job._released:
+            return
+        job._released = True
+        remaining = self._active[job.session_id] - 1
+        if remaining:
+            self._active[job.session_id] = remaining
+        else:
+            del self._active[job.session_id]
+
+    def _run(self, job, fn, args, kwargs):
+        try:
+            with self._lock:
+                if job.status == CANCELLED:
+                    return
+                job.status = RUNNING
+            try:
+                result, error = fn(*args, **kwargs), None
+            except Exception as e:
+                result, error = None, str(e)
+            with self._lock:
+                if job.status == CANCELLED:
+                    return
+                job.result, job.error = result, error
+                job.status = FAILED if error else DONE
+                job.finished_at = time.time()
+        finally:
+            with self._lock:
+                self._release(job)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancels a job. Queued jobs never start; a running call cannot be interrupted
+        mid-request, so its result is dropped when it returns.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return
+            job.status = CANCELLED
+            job.finished_at = time.time()
+        if job._future is not None and job._future.cancel():
+            with self._lock:
+                self._release(job)  # never started, so _run will not release it
+
+    def cancel_session(self, session_id):
+        with self._lock:
+            job_ids = [j.id for j in self._jobs.values() if j.session_id == session_id and not j.done]
+        for job_id in job_ids:
+            self.cancel(job_id)
+
+    def forget(self, job_id):
+        """Drops a job once its result has been collected."""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def _prune(self):
+        # Sessions that close mid-job never collect their results.
+        cutoff = time.time() - FINISHED_JOB_TTL
+        for job_id in [j.id for j in self._jobs.values() if j.done and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0, CANCELLED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
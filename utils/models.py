@@ -0,0 +1,257 @@
+import json
+from collections import ChainMap
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import ClassVar, Optional, Union
+
+# --- Schema ---
+# Bump when a field is added, removed or reinterpreted, and teach `_migrate` how to upgrade.
+# Version 0 is the untyped `prd_data` dict the app used before this model existed.
+SCHEMA_VERSION = 3
+BINARY_MAGIC = b"PRD"
+_BINARY_ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+
+class _Record:
+    """
+    Shared behaviour for the slotted records below. `KEYS` maps the external
+    (legacy dict / LLM JSON) key of each field to its attribute, so records can
+    still be read and written with the keys the prompts and PDF use.
+    Fields left as None count as absent.
+    """
+
+    __slots__ = ()
+    KEYS: ClassVar[dict] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # KEYS lists every field in declaration order, so one getter packs a whole record.
+        cls._pack = attrgetter(*cls.KEYS.values())
+
+    @classmethod
+    def from_dict(cls, data):
+        data = data or {}
+        return cls(**{attr: data[key] for key, attr in cls.KEYS.items() if data.get(key) is not None})
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def items(self):
+        return [(key, value) for key, value in zip(self.KEYS, self._pack(self)) if value is not None]
+
+    def keys(self):
+        return [key for key, _ in self.items()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def get(self, key, default=None):
+        attr = self.KEYS.get(key)
+        value = getattr(self, attr) if attr else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        setattr(self, self.KEYS[key], value)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __bool__(self):
+        return any(value is not None for value in self._pack(self))
+
+    def to_tuple(self):
+        return self._pack(self)
+
+    @classmethod
+    def from_tuple(cls, values):
+        return cls(*values)
+
+
+@dataclass(slots=True)
+class IntroData(_Record):
+    business_goal: Optional[str] = None
+    key_metric: Optional[str] = None
+    product_area: Optional[str] = None
+    metric_type: Optional[str] = None
+    current_value: Optional[float] = None
+    target_value: Optional[float] = None
+    dau: Optional[int] = None
+    product_type: Optional[str] = None
+    user_persona: Optional[str] = None
+    app_description: Optional[str] = None
+    std_dev: Optional[float] = None
+
+    KEYS: ClassVar[dict] = {name: name for name in (
+        "business_goal", "key_metric", "product_area", "metric_type", "current_value", "target_value",
+        "dau", "product_type", "user_persona", "app_description", "std_dev",
+    )}
+
+
+@dataclass(slots=True)
+class Hypothesis(_Record):
+    statement: Optional[str] = None
+    rationale: Optional[str] = None
+    behavioral_basis: Optional[str] = None
+
+    KEYS: ClassVar[dict] = {"Statement": "statement", "Rationale": "rationale", "Behavioral Basis": "behavioral_basis"}
+
+
+@dataclass(slots=True)
+class PRDSections(_Record):
+    problem_statement: Optional[str] = None
+    goal_and_success_metrics: Optional[str] = None
+    implementation_plan: Optional[Union[list, str]] = None
+
+    KEYS: ClassVar[dict] = {
+        "Problem_Statement": "problem_statement",
+        "Goal_and_Success_Metrics": "goal_and_success_metrics",
+        "Implementation_Plan": "implementation_plan",
+    }
+
+
+@dataclass(slots=True)
+class Calculations(_Record):
+    confidence: Optional[float] = None
+    power: Optional[float] = None
+    coverage: Optional[float] = None
+    min_detectable_effect: Optional[float] = None
+    sample_size: Optional[Union[int, float]] = None
+    duration: Optional[Union[int, float]] = None
+    start_date: Optional[str] = None  # ISO date the duration is forecast from
+    whole_weeks: Optional[bool] = None
+    dau_forecast: Optional[dict] = None  # utils.forecasting.DAUForecast.to_dict(); absent means constant DAU
+    sequential: Optional[dict] = None  # utils.sequential.sequential_plan(); absent means a single final analysis
+
+    KEYS: ClassVar[dict] = {name: name for name in (
+        "confidence", "power", "coverage", "min_detectable_effect", "sample_size", "duration",
+        "start_date", "whole_weeks", "dau_forecast", "sequential",
+    )}
+
+
+@dataclass(slots=True)
+class Risk(_Record):
+    risk: str = ""
+    mitigation: str = ""
+
+    KEYS: ClassVar[dict] = {"risk": "risk", "mitigation": "mitigation"}
+
+
+@dataclass(slots=True)
+class PRD:
+    """The whole document a session works on; replaces the loose `prd_data` dict."""
+
+    intro: IntroData = field(default_factory=IntroData)
+    hypothesis: Hypothesis = field(default_factory=Hypothesis)
+    sections: PRDSections = field(default_factory=PRDSections)
+    calculations: Calculations = field(default_factory=Calculations)
+    risks: list = field(default_factory=list)
+
+    # --- Prompt views ---
+    def prompt_view(self, include_hypothesis=True, **extra):
+        """
+        A read-only mapping over intro data (and the hypothesis) for prompt building.
+        Replaces `{**intro_data, **hypothesis}`: nothing is copied until the prompt is rendered.
+        """
+        maps = [extra] if extra else []
+        if include_hypothesis:
+            maps.append(self.hypothesis)
+        maps.append(self.intro)
+        return ChainMap(*maps)
+
+    # --- Dict / JSON ---
+    def to_dict(self):
+        """The legacy `prd_data` shape, as used by the PDF generator, the store and the API."""
+        return {
+            "schema_version": SCHEMA_VERSION,
+            "intro_data": self.intro.to_dict(),
+            "hypothesis": self.hypothesis.to_dict(),
+            "prd_sections": self.sections.to_dict(),
+            "calculations": self.calculations.to_dict(),
+            "risks": [r.to_dict() for r in self.risks],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        data = _migrate(dict(data or {}))
+        return cls(
+            intro=IntroData.from_dict(data.get("intro_data")),
+            hypothesis=Hypothesis.from_dict(data.get("hypothesis")),
+            sections=PRDSections.from_dict(data.get("prd_sections")),
+            calculations=Calculations.from_dict(data.get("calculations")),
+            risks=[Risk.from_dict(r) for r in data.get("risks") or []],
+        )
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+    # --- Binary ---
+    def to_bytes(self):
+        """
+        Compact snapshot for caching and persisting session state: positional field
+        tuples as UTF-8 JSON behind a magic/version header. The encoding is the same on
+        every Python version, and loading only ever builds plain JSON values.
+        """
+        body = (
+            self.intro.to_tuple(),
+            self.hypothesis.to_tuple(),
+            self.sections.to_tuple(),
+            self.calculations.to_tuple(),
+            tuple(r.to_tuple() for r in self.risks),
+        )
+        return BINARY_MAGIC + bytes([SCHEMA_VERSION]) + _BINARY_ENCODER.encode(body).encode()
+
+    @classmethod
+    def from_bytes(cls, payload):
+        """
+        Loads a `to_bytes` snapshot. Raises ValueError, and nothing else, if the payload
+        is not a snapshot, comes from another schema version, or is truncated or corrupt.
+        """
+        if payload[:3] != BINARY_MAGIC or len(payload) < 4:
+            raise ValueError("Not a PRD snapshot.")
+        version = payload[3]
+        if version != SCHEMA_VERSION:
+            # Snapshots are short-lived (sessions); older ones are not upgraded in place.
+            raise ValueError(f"PRD snapshot schema v{version} does not match v{SCHEMA_VERSION}.")
+        try:
+            intro, hypothesis, sections, calculations, risks = parts = json.loads(payload[4:])
+            if not all(isinstance(part, list) for part in (*parts, *risks)):
+                raise TypeError("every record must be a JSON array")
+            return cls(
+                intro=IntroData.from_tuple(intro),
+                hypothesis=Hypothesis.from_tuple(hypothesis),
+                sections=PRDSections.from_tuple(sections),
+                calculations=Calculations.from_tuple(calculations),
+                risks=[Risk.from_tuple(r) for r in risks],
+            )
+        except (ValueError, TypeError) as e:  # bad JSON or UTF-8, or fields of the wrong shape
+            raise ValueError(f"Corrupt PRD snapshot: {e}") from e
+
+
+def _migrate(data):
+    """Upgrades a serialized PRD dict to the current schema version."""
+    version = data.get("schema_version", 0)
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"PRD schema v{version} is newer than supported (v{SCHEMA_VERSION}).")
+    # v0 -> v1: same keys, only the version marker is new.
+    # v1 -> v2: calculations gained optional forecast fields; old documents simply lack them.
+    # v2 -> v3: likewise for the optional group-sequential plan.
+    data["schema_version"] = SCHEMA_VERSION
+    return data
+
+
+__all__ = [
+    "SCHEMA_VERSION", "PRD", "IntroData", "Hypothesis", "PRDSections", "Calculations", "Risk",
+]
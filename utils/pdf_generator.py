@@ -6,6 +6,9 @@ from reportlab.lib import colors
 from reportlab.platypus.flowables import HRFlowable
 from io import BytesIO
 
+from utils.forecasting import plan_duration, calculations_forecast, describe_forecast, describe_duration
+from utils.sequential import SPENDING_LABELS
+
 # --- Custom Page Template with Header and Footer ---
 class ProfessionalPageTemplate(PageTemplate):
     def __init__(self, id, pagesize=letter):
@@ -97,7 +100,42 @@ def create_pdf(prd):
     elements.append(Paragraph(f"<b>Minimum Detectable Effect:</b> {mde}", styles['Body']))
     elements.append(Paragraph(f"<b>Target Value:</b> {target_value}", styles['Body']))
     elements.append(Paragraph(f"<b>Sample Size (per variant):</b> {sample_size_str}", styles['Body']))
-    elements.append(Paragraph(f"<b>Duration:</b> {calc.get('duration', 'N/A')} days", styles['Body']))
+    # Recomputed with the same forecast engine as the Calculations page, so both always agree.
+    duration, end_date = plan_duration(calc, intro)
+    if duration is None:
+        duration_str = "N/A"
+    elif end_date and calc.get('start_date'):
+        duration_str = f"{describe_duration(duration)} ({calc.get('start_date')} to {end_date.isoformat()})"
+    else:
+        duration_str = describe_duration(duration)
+    elements.append(Paragraph(f"<b>Duration:</b> {duration_str}", styles['Body']))
+    if duration is not None:
+        elements.append(Paragraph(f"<b>Traffic Forecast:</b> {describe_forecast(calculations_forecast(calc, intro))}", styles['Body']))
+    sequential = calc.get('sequential')
+    if sequential:
+        elements.append(Spacer(1, 0.1 * inch))
+        elements.append(Paragraph(
+            f"<b>Interim Analyses:</b> {sequential['looks']} looks with {SPENDING_LABELS.get(sequential['spending'], sequential['spending'])} "
+            f"alpha spending. Maximum sample size {sequential['max_sample_size']:,} per variant "
+            f"(+{(sequential['inflation'] - 1) * 100:.1f}%); expected {sequential['expected_sample_size']:,} "
+            + (f"and about {sequential['expected_duration']:,} days if the effect is real."
+               if sequential['expected_duration'] is not None else "but the final look falls beyond the traffic forecast horizon."),
+            styles['Body'],
+        ))
+        rows = [["Look", "Sample Size", "Day", "Z Boundary", "Nominal p"]] + [
+            [look['look'], f"{look['sample_size']:,}", look['day'] if look['day'] is not None else "Beyond forecast",
+             f"{look['z_boundary']:.3f}", f"{look['p_value']:.4f}"]
+            for look in sequential['schedule']
+        ]
+        table = Table(rows, hAlign='LEFT')
+        table.setStyle(TableStyle([
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.grey),
+            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+        ]))
+        elements.append(Spacer(1, 0.05 * inch))
+        elements.append(table)
     elements.append(hr)
 
     # --- Risks & Next Steps ---
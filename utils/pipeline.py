@@ -0,0 +1,153 @@
+from collections import ChainMap
+from datetime import date
+
+import pandas as pd
+
+from utils.api_handler import generate_content
+from utils.calculations import calculate_sample_size_proportion, calculate_sample_size_continuous
+from utils.pdf_generator import create_pdf
+from utils.forecasting import fit_dau_forecast, plan_duration, calculations_forecast, forecast_duration
+from utils.sequential import design_group_sequential, sequential_plan
+
+# --- Defaults (mirror the Calculations page sliders) ---
+DEFAULT_CALCULATION_PARAMS = {
+    "confidence": 0.95,
+    "power": 0.80,
+    "coverage": 50,
+    "min_detectable_effect": 5.0,
+}
+
+
+class PipelineError(Exception):
+    """Raised when a generation step fails, carrying the step name."""
+
+    def __init__(self, step, message):
+        super().__init__(f"{step}: {message}")
+        self.step = step
+
+
+# --- Single Steps ---
+# Prompt inputs are ChainMap views over the caller's dicts; nothing is copied per call.
+def _generate(api_key, data, mode):
+    result = generate_content(api_key, data, mode)
+    if "error" in result:
+        raise PipelineError(mode, result["error"])
+    return result
+
+
+def generate_hypotheses(api_key, intro_data):
+    return _generate(api_key, intro_data, "hypotheses")
+
+
+def enrich_hypothesis(api_key, intro_data, custom_hypothesis):
+    return _generate(api_key, ChainMap({"custom_hypothesis": custom_hypothesis}, intro_data), "enrich_hypothesis")
+
+
+def generate_prd_sections(api_key, intro_data, hypothesis):
+    return _generate(api_key, ChainMap(hypothesis, intro_data), "prd_sections")
+
+
+def generate_risks(api_key, intro_data, hypothesis):
+    risk_data = ChainMap({"hypothesis": hypothesis.get("Statement")}, intro_data)
+    return _generate(api_key, risk_data, "risks").get("risks", [])
+
+
+def build_calculations(intro_data, confidence, power, coverage, min_detectable_effect,
+                       dau_forecast=None, start_date=None, whole_weeks=False,
+                       sequential_looks=1, sequential_spending="obrien_fleming"):
+    """
+    Computes sample size and duration for the PRD's key metric.
+    `confidence` and `power` are fractions; `coverage` and `min_detectable_effect` are percentages.
+    The duration accumulates forecast eligible users from `start_date` (default today): a fitted
+    `dau_forecast` when given, else the intro's constant DAU.
+    With `sequential_looks` > 1, a group-sequential plan with interim analyses is added.
+    """
+    current_value = intro_data.get("current_value", 50.0)
+    if intro_data.get("metric_type", "Proportion") == "Proportion":
+        sample_size = calculate_sample_size_proportion(current_value, min_detectable_effect, confidence, power)
+    else:
+        sample_size = calculate_sample_size_continuous(current_value, intro_data.get("std_dev"), min_detectable_effect, confidence, power)
+
+    calculations = {
+        "confidence": confidence,
+        "power": power,
+        "coverage": coverage,
+        "min_detectable_effect": min_detectable_effect,
+        "sample_size": sample_size,
+        "start_date": (start_date or date.today()).isoformat(),
+        "whole_weeks": bool(whole_weeks),
+    }
+    if dau_forecast is not None:
+        calculations["dau_forecast"] = dau_forecast.to_dict()
+    calculations["duration"], _ = plan_duration(calculations, intro_data)
+
+    if sequential_looks > 1 and calculations["duration"] != float("inf"):
+        design = design_group_sequential(int(sequential_looks), round(1 - confidence, 6), power, sequential_spending)
+        forecast = calculations_forecast(calculations, intro_data)
+        start = date.fromisoformat(calculations["start_date"])
+        calculations["sequential"] = sequential_plan(
+            design, sample_size, lambda sizes: forecast_duration(sizes, forecast, coverage, start, whole_weeks)
+        )
+    return calculations
+
+
+def calculation_params(overrides=None):
+    """
+    build_calculations keyword arguments from a spec's "calculations" block: the defaults above,
+    plus optional "start_date" (ISO), "whole_weeks", "dau_history" ([{"date", "dau"}, ...]),
+    "sequential_looks" and "sequential_spending" ("obrien_fleming" or "pocock").
+    """
+    overrides = overrides or {}
+    params = {key: overrides.get(key, default) for key, default in DEFAULT_CALCULATION_PARAMS.items()}
+    if overrides.get("start_date"):
+        params["start_date"] = date.fromisoformat(overrides["start_date"])
+    params["whole_weeks"] = bool(overrides.get("whole_weeks"))
+    params["sequential_looks"] = int(overrides.get("sequential_looks", 1))
+    params["sequential_spending"] = overrides.get("sequential_spending", "obrien_fleming")
+    if overrides.get("dau_history"):
+        history = pd.DataFrame(overrides["dau_history"])
+        params["dau_forecast"] = fit_dau_forecast(pd.Series(history["dau"].to_numpy(dtype=float), index=pd.to_datetime(history["date"])))
+    return params
+
+
+# --- Full Run ---
+def choose_hypothesis(api_key, intro_data, hypotheses, spec):
+    """
+    Picks the hypothesis for the PRD from a spec:
+    {"custom": "..."} enriches a custom hypothesis, {"select": n} picks the n-th generated one (1-based).
+    """
+    if spec.get("custom"):
+        return enrich_hypothesis(api_key, intro_data, spec["custom"])
+    options = [h for h in hypotheses.values() if isinstance(h, dict)]
+    if not options:
+        raise PipelineError("hypotheses", "No hypotheses were generated.")
+    index = int(spec.get("select", 1)) - 1
+    if not 0 <= index < len(options):
+        raise PipelineError("hypotheses", f"Cannot select hypothesis {index + 1} of {len(options)}.")
+    return options[index]
+
+
+def run_prd(api_key, spec, include_pdf=False):
+    """
+    Runs the whole PRD flow headlessly from a spec:
+    {"intro_data": {...}, "hypothesis": {"select": 1} | {"custom": "..."}, "calculations": {...}}.
+    Returns a PRD dict shaped like the app's `prd_data`, plus the generated hypotheses.
+    """
+    intro_data = spec["intro_data"]
+    hypothesis_spec = spec.get("hypothesis") or {}
+
+    hypotheses = {} if hypothesis_spec.get("custom") else generate_hypotheses(api_key, intro_data)
+    hypothesis = choose_hypothesis(api_key, intro_data, hypotheses, hypothesis_spec)
+    params = calculation_params(spec.get("calculations"))
+
+    prd = {
+        "intro_data": intro_data,
+        "hypothesis": hypothesis,
+        "prd_sections": generate_prd_sections(api_key, intro_data, hypothesis),
+        "calculations": build_calculations(intro_data, **params),
+        "risks": generate_risks(api_key, intro_data, hypothesis),
+    }
+    result = {"prd": prd, "hypotheses": hypotheses}
+    if include_pdf:
+        result["pdf"] = create_pdf(prd)
+    return result
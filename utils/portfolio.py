@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+from utils.calculations import (
+    calculate_sample_size_proportion_array,
+    calculate_sample_size_continuous_array,
+    calculate_duration_array,
+    uses_exact_proportion_test_array,
+)
+from utils.scheduler import PlannedExperiment
+
+# --- CSV Format ---
+# One experiment per row. Confidence, power and coverage default to the Calculations
+# page sliders; confidence and power may be given as fractions (0.95) or percentages (95).
+# Priority and exclusion groups (separated by ";") are only used when scheduling.
+REQUIRED_COLUMNS = ["metric_type", "baseline", "mde", "dau"]
+OPTIONAL_COLUMNS = {
+    "name": "", "std_dev": np.nan, "confidence": 95, "power": 80, "coverage": 50, "priority": 0, "exclusion_groups": "",
+}
+NUMERIC_COLUMNS = ["baseline", "std_dev", "mde", "confidence", "power", "dau", "coverage", "priority"]
+COLUMN_ALIASES = {
+    "experiment": "name",
+    "current_value": "baseline",
+    "min_detectable_effect": "mde",
+    "standard_deviation": "std_dev",
+    "daily_active_users": "dau",
+    "exclusion_group": "exclusion_groups",
+}
+
+TEMPLATE_CSV = (
+    "name,metric_type,baseline,std_dev,mde,confidence,power,dau,coverage,priority,exclusion_groups\n"
+    "Checkout social proof,Proportion,3.2,,5,95,80,120000,50,2,checkout\n"
+    "Checkout urgency banner,Proportion,3.2,,5,95,80,120000,50,1,checkout\n"
+    "Onboarding progress bar,Proportion,40,,3,95,80,120000,100,1,onboarding\n"
+    "Paywall price anchor,Continuous,1.8,4.5,4,90,80,120000,25,0,pricing;checkout\n"
+)
+
+
+def read_portfolio_csv(source):
+    """Reads a portfolio CSV (path or file-like) and normalizes its columns; raises ValueError if required columns are missing."""
+    df = pd.read_csv(source)
+    df.columns = [str(c).strip().lower().replace(" ", "_") for c in df.columns]
+    df = df.rename(columns=COLUMN_ALIASES)
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}.")
+    for column, default in OPTIONAL_COLUMNS.items():
+        if column not in df.columns:
+            df[column] = default
+    for column in NUMERIC_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+        if column in OPTIONAL_COLUMNS:
+            df[column] = df[column].fillna(OPTIONAL_COLUMNS[column])  # blank cells take the default too
+    for column in ("name", "exclusion_groups"):
+        df[column] = df[column].fillna("").astype(str)
+    return df
+
+
+def _as_fraction(values):
+    return np.where(values > 1, values / 100.0, values)
+
+
+def plan_portfolio(df):
+    """
+    Sizes every experiment in one vectorized pass.
+    Returns a copy of `df` with sample_size (per variant), duration_days, exact_test and
+    error columns; rows that fail validation keep their inputs, with no size and the reason
+    in `error`. Proportions expecting few conversions are sized for the exact rare-event
+    test, like the Calculations page does; `exact_test` marks those rows.
+    """
+    metric = df["metric_type"].astype(str).str.strip().str.lower().to_numpy()
+    baseline = df["baseline"].to_numpy(dtype=float)
+    std_dev = df["std_dev"].to_numpy(dtype=float)
+    mde = df["mde"].to_numpy(dtype=float)
+    confidence = _as_fraction(df["confidence"].to_numpy(dtype=float))
+    power = _as_fraction(df["power"].to_numpy(dtype=float))
+    dau = df["dau"].to_numpy(dtype=float)
+    coverage = df["coverage"].to_numpy(dtype=float)
+
+    is_proportion = metric == "proportion"
+    is_continuous = metric == "continuous"
+
+    # First matching reason wins, mirroring the checks of the single-experiment calculators.
+    conditions = [
+        ~(is_proportion | is_continuous),
+        np.isnan(baseline) | np.isnan(mde) | np.isnan(confidence) | np.isnan(power) | np.isnan(dau) | np.isnan(coverage),
+        is_proportion & ((baseline <= 0) | (baseline >= 100)),
+        is_proportion & ((baseline * (1 + mde / 100) <= 0) | (baseline * (1 + mde / 100) >= 100)),
+        is_continuous & ~(std_dev > 0),
+        (confidence <= 0) | (confidence >= 1) | (power <= 0) | (power >= 1),
+        mde == 0,
+        is_continuous & (baseline == 0),
+        (dau <= 0) | (coverage <= 0),
+    ]
+    reasons = [
+        "Metric type must be Proportion or Continuous.",
+        "Missing or non-numeric value.",
+        "Baseline must be between 0 and 100 for proportion metrics.",
+        "Baseline adjusted by the MDE must stay between 0 and 100.",
+        "Standard deviation must be greater than 0 for continuous metrics.",
+        "Confidence and power must be between 0 and 100%.",
+        "Minimum detectable effect must not be 0.",
+        "Baseline must not be 0 for continuous metrics, since the MDE is relative to it.",
+        "DAU and coverage must be greater than 0.",
+    ]
+    error = np.select(conditions, reasons, default="")
+    valid = error == ""
+
+    sample_size = np.full(len(df), np.nan)
+    exact_test = np.zeros(len(df), dtype=bool)
+    rows = valid & is_proportion
+    sample_size[rows] = calculate_sample_size_proportion_array(baseline[rows], mde[rows], confidence[rows], power[rows])
+    exact_test[rows] = uses_exact_proportion_test_array(baseline[rows], mde[rows], confidence[rows], power[rows])
+    rows = valid & is_continuous
+    sample_size[rows] = calculate_sample_size_continuous_array(
+        baseline[rows], std_dev[rows], mde[rows], confidence[rows], power[rows]
+    )
+    # Anything the checks above miss must still not pass as a valid plan.
+    error = np.where(valid & ~np.isfinite(sample_size), "Sample size could not be computed for these inputs.", error)
+    valid = error == ""
+
+    duration = np.full(len(df), np.nan)
+    duration[valid] = calculate_duration_array(sample_size[valid], dau[valid], coverage[valid])
+
+    plan = df.copy()
+    plan["sample_size"] = pd.array(np.where(np.isfinite(sample_size), sample_size, np.nan), dtype="Int64")
+    plan["duration_days"] = pd.array(np.where(np.isfinite(duration), duration, np.nan), dtype="Int64")
+    plan["exact_test"] = exact_test & valid
+    plan["error"] = error
+    return plan
+
+
+def planned_experiments(plan):
+    """
+    Turns the sized rows of a plan into experiments for `utils.scheduler`. A missing
+    sample size becomes NaN, which the scheduler lists as unscheduled with its reason.
+    """
+    sized = plan[plan["error"] == ""]
+    return [
+        PlannedExperiment(
+            name=row.name or f"Experiment {i + 1}",
+            sample_size=float(row.sample_size) if pd.notna(row.sample_size) else float("nan"),
+            coverage=float(row.coverage),
+            priority=int(row.priority),
+            exclusion_groups=tuple(g.strip() for g in row.exclusion_groups.split(";") if g.strip()),
+        )
+        for i, row in zip(sized.index, sized.itertuples(index=False))
+    ]
@@ -0,0 +1,335 @@
+import os
+import json
+import re
+import sqlite3
+import threading
+import time
+
+# --- Store Configuration ---
+DEFAULT_DB_PATH = os.environ.get("PRD_STORE_PATH", "prd_store.db")
+SEARCH_CANDIDATES = 1000  # matches ranked per search, newest first; bounds BM25 work on common words
+
+# Each entry upgrades the schema from the previous version. The current
+# version is tracked with SQLite's `PRAGMA user_version`.
+MIGRATIONS = {
+    1: [
+        """
+        CREATE TABLE IF NOT EXISTS prds (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            product_area TEXT,
+            key_metric TEXT,
+            metric_type TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            data TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_prds_product_area ON prds(product_area, updated_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_prds_key_metric ON prds(key_metric, updated_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_prds_updated_at ON prds(updated_at DESC)",
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS prds_fts USING fts5(
+            hypothesis, sections, risks,
+            tokenize = 'porter unicode61'
+        )
+        """,
+    ],
+    # Working state of idle Streamlit sessions, spilled by the session governor.
+    2: [
+        """
+        CREATE TABLE IF NOT EXISTS session_snapshots (
+            session_key TEXT PRIMARY KEY,
+            prd BLOB NOT NULL,
+            hypotheses TEXT,
+            spilled_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_session_snapshots_spilled_at ON session_snapshots(spilled_at)",
+    ],
+    # The enriched custom hypothesis a session may be holding, spilled alongside its PRD.
+    3: [
+        "ALTER TABLE session_snapshots ADD COLUMN custom_hypothesis TEXT",
+    ],
+}
+SCHEMA_VERSION = max(MIGRATIONS)
+
+
+# --- Helpers ---
+def _section_text(prd_sections):
+    """Flattens PRD sections (strings or lists of steps) into one searchable string."""
+    parts = []
+    for content in (prd_sections or {}).values():
+        if isinstance(content, list):
+            parts.extend(str(item) for item in content)
+        else:
+            parts.append(str(content))
+    return "\n".join(parts)
+
+
+def _hypothesis_text(prd, hypotheses=None):
+    """Collects the selected hypothesis plus any generated alternatives."""
+    hyp = prd.get("hypothesis", {}) or {}
+    parts = [hyp.get("Statement", ""), hyp.get("Rationale", ""), hyp.get("Behavioral Basis", "")]
+    for alt in (hypotheses or {}).values():
+        if isinstance(alt, dict):
+            parts.append(alt.get("Statement", ""))
+    return "\n".join(p for p in parts if p)
+
+
+def _risk_text(risks):
+    return "\n".join(f"{r.get('risk', '')} {r.get('mitigation', '')}" for r in (risks or []))
+
+
+def _title_for(prd):
+    intro = prd.get("intro_data", {}) or {}
+    statement = (prd.get("hypothesis", {}) or {}).get("Statement")
+    title = statement or intro.get("business_goal") or "Untitled PRD"
+    return title if len(title) <= 120 else title[:117] + "..."
+
+
+def _dumps_or_none(value):
+    return json.dumps(value) if value is not None else None
+
+
+def _loads_or_none(text):
+    return json.loads(text) if text else None
+
+
+def build_match_query(text):
+    """
+    Turns free text into a safe FTS5 MATCH expression in which every word must match.
+    Words are quoted so user input can never be parsed as FTS5 syntax. Prefix queries
+    are deliberately avoided: expanding them dominates search time on large stores.
+    """
+    words = re.findall(r"\w+", text or "")
+    if not words:
+        return None
+    return " AND ".join(f'"{w}"' for w in words)
+
+
+# --- Core Store ---
+class PRDStore:
+    """
+    SQLite-backed persistence for PRDs with full-text search.
+    Connections are kept per thread, so one store can be shared across Streamlit sessions.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._migrate()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self):
+        conn = self._connect()
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        if current > SCHEMA_VERSION:
+            raise RuntimeError(f"PRD store schema v{current} is newer than this app supports (v{SCHEMA_VERSION}).")
+        for version in range(current + 1, SCHEMA_VERSION + 1):
+            with conn:
+                for statement in MIGRATIONS[version]:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {version}")
+
+    @property
+    def schema_version(self):
+        return self._connect().execute("PRAGMA user_version").fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _write(self, conn, prd, hypotheses=None, prd_id=None):
+        intro = prd.get("intro_data", {}) or {}
+        document = dict(prd)
+        if hypotheses:
+            document["hypotheses"] = hypotheses
+        now = time.time()
+        row = (
+            _title_for(prd),
+            intro.get("product_area"),
+            intro.get("key_metric"),
+            intro.get("metric_type"),
+            json.dumps(document),
+        )
+        fts_row = (
+            _hypothesis_text(prd, hypotheses),
+            _section_text(prd.get("prd_sections")),
+            _risk_text(prd.get("risks")),
+        )
+
+        if prd_id is not None and conn.execute("SELECT 1 FROM prds WHERE id = ?", (prd_id,)).fetchone():
+            conn.execute(
+                "UPDATE prds SET title = ?, product_area = ?, key_metric = ?, metric_type = ?, data = ?, updated_at = ? WHERE id = ?",
+                row + (now, prd_id),
+            )
+            conn.execute("DELETE FROM prds_fts WHERE rowid = ?", (prd_id,))
+        else:
+            cur = conn.execute(
+                "INSERT INTO prds (title, product_area, key_metric, metric_type, data, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                row + (now, now),
+            )
+            prd_id = cur.lastrowid
+        conn.execute(
+            "INSERT INTO prds_fts (rowid, hypothesis, sections, risks) VALUES (?, ?, ?, ?)",
+            (prd_id,) + fts_row,
+        )
+        return prd_id
+
+    def save(self, prd, hypotheses=None, prd_id=None):
+        """
+        Inserts a PRD, or updates it in place when `prd_id` is given.
+        Returns the row id of the stored PRD.
+        """
+        conn = self._connect()
+        with conn:
+            return self._write(conn, prd, hypotheses, prd_id)
+
+    def save_many(self, prds):
+        """Inserts many PRDs in a single transaction (bulk imports and seeding)."""
+        conn = self._connect()
+        with conn:
+            return [self._write(conn, prd) for prd in prds]
+
+    def load(self, prd_id):
+        """Returns the stored PRD document, or None if it does not exist."""
+        row = self._connect().execute("SELECT data FROM prds WHERE id = ?", (prd_id,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def delete(self, prd_id):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM prds WHERE id = ?", (prd_id,))
+            conn.execute("DELETE FROM prds_fts WHERE rowid = ?", (prd_id,))
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM prds").fetchone()[0]
+
+    def iter_intro_hypotheses(self, batch_size=1000):
+        """Yields (intro_data, hypotheses) for every stored PRD that kept its generated hypotheses."""
+        cursor = self._connect().execute(
+            "SELECT json_extract(data, '$.intro_data'), json_extract(data, '$.hypotheses') FROM prds "
+            "WHERE json_extract(data, '$.hypotheses') IS NOT NULL"
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for intro_json, hypotheses_json in rows:
+                yield json.loads(intro_json or "{}"), json.loads(hypotheses_json)
+
+    def list_recent(self, limit=20, product_area=None, key_metric=None, since=None):
+        """Lists PRD summaries, newest first, optionally filtered by product area, metric and date."""
+        clauses, params = [], []
+        if product_area:
+            clauses.append("product_area = ?")
+            params.append(product_area)
+        if key_metric:
+            clauses.append("key_metric = ?")
+            params.append(key_metric)
+        if since is not None:
+            clauses.append("updated_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            f"SELECT id, title, product_area, key_metric, metric_type, updated_at FROM prds {where} ORDER BY updated_at DESC LIMIT ?",
+            params + [limit],
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def search(self, text, limit=20, product_area=None):
+        """
+        Full-text search over hypotheses, PRD sections and risks. Ranks the
+        SEARCH_CANDIDATES most recently created matching PRDs by BM25, best first, and
+        returns their summaries with a highlighted snippet.
+        """
+        match = build_match_query(text)
+        if match is None:
+            return self.list_recent(limit=limit, product_area=product_area)
+
+        # Candidates come off the FTS index in rowid order and stop at the cap, so common
+        # words never get every matching row scored. The `+` keeps SQLite from handing the
+        # product-area filter to FTS5, which would probe the index once per id.
+        area_filter = "AND +prds_fts.rowid IN (SELECT id FROM prds WHERE product_area = ?)" if product_area else ""
+        params = [match] + ([product_area] if product_area else []) + [SEARCH_CANDIDATES, limit, match]
+        rows = self._connect().execute(
+            f"""
+            WITH candidates AS (
+                SELECT prds_fts.rowid AS id, bm25(prds_fts) AS score FROM prds_fts
+                WHERE prds_fts MATCH ? {area_filter}
+                ORDER BY prds_fts.rowid DESC LIMIT ?
+            ), top AS (
+                SELECT id, score FROM candidates ORDER BY score LIMIT ?
+            )
+            SELECT p.id, p.title, p.product_area, p.key_metric, p.metric_type, p.updated_at,
+                   snippet(prds_fts, -1, '**', '**', '...', 12) AS snippet
+            FROM top
+            JOIN prds_fts ON prds_fts.rowid = top.id
+            JOIN prds p ON p.id = top.id
+            WHERE prds_fts MATCH ?
+            ORDER BY top.score
+            """,
+            params,
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    # --- Session Snapshots ---
+    def save_session_snapshot(self, session_key, prd_bytes, hypotheses=None, custom_hypothesis=None):
+        """
+        Stores (or replaces) a session's spilled working state: a PRD binary snapshot plus
+        its generated hypotheses and enriched custom hypothesis.
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO session_snapshots (session_key, prd, hypotheses, custom_hypothesis, spilled_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (session_key, prd_bytes, _dumps_or_none(hypotheses), _dumps_or_none(custom_hypothesis), time.time()),
+            )
+
+    def pop_session_snapshot(self, session_key):
+        """Removes and returns (prd_bytes, hypotheses, custom_hypothesis) for a spilled session, or None."""
+        conn = self._connect()
+        with conn:
+            row = conn.execute(
+                "SELECT prd, hypotheses, custom_hypothesis FROM session_snapshots WHERE session_key = ?", (session_key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM session_snapshots WHERE session_key = ?", (session_key,))
+        return bytes(row["prd"]), _loads_or_none(row["hypotheses"]), _loads_or_none(row["custom_hypothesis"])
+
+    def delete_session_snapshots(self, session_keys=None, before=None):
+        """Deletes the given sessions' snapshots and/or every snapshot spilled before `before`."""
+        conn = self._connect()
+        with conn:
+            if session_keys:
+                conn.executemany("DELETE FROM session_snapshots WHERE session_key = ?", [(k,) for k in session_keys])
+            if before is not None:
+                conn.execute("DELETE FROM session_snapshots WHERE spilled_at < ?", (before,))
+
+    def session_snapshot_stats(self):
+        """(count, total bytes) of spilled session snapshots."""
+        row = self._connect().execute(
+            """
+            SELECT COUNT(*),
+                   COALESCE(SUM(LENGTH(prd) + COALESCE(LENGTH(hypotheses), 0) + COALESCE(LENGTH(custom_hypothesis), 0)), 0)
+            FROM session_snapshots
+            """
+        ).fetchone()
+        return row[0], row[1]
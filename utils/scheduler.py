@@ -0,0 +1,190 @@
+import heapq
+import math
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date
+
+import pandas as pd
+
+from utils.calculations import calculate_duration
+
+# --- Scheduling Configuration ---
+SLICE_STEP = 1.0  # traffic slices are whole percentage points of DAU
+MIN_SLICE = 1.0   # smallest slice worth running an experiment on
+
+
+@dataclass
+class PlannedExperiment:
+    """An experiment to place on the calendar. `coverage` is the most traffic (% of DAU) it may take."""
+    name: str
+    sample_size: float  # per variant, as from the sample size calculators
+    coverage: float = 100.0
+    priority: int = 0
+    exclusion_groups: tuple = ()  # experiments sharing a group never run at the same time
+
+
+@dataclass
+class ScheduledExperiment:
+    name: str
+    start_day: int
+    end_day: int  # exclusive
+    traffic_pct: float
+    duration_days: int
+    standalone_days: int  # duration at full requested coverage with the calendar to itself
+    priority: int = 0
+    exclusion_groups: tuple = ()
+
+
+@dataclass
+class Schedule:
+    experiments: list = field(default_factory=list)
+    unscheduled: list = field(default_factory=list)  # (name, reason)
+
+    @property
+    def makespan_days(self):
+        return max((e.end_day for e in self.experiments), default=0)
+
+    def to_frame(self, start_date=None):
+        """One row per scheduled experiment, dated from `start_date` (default today); `end_date` is exclusive."""
+        start_date = pd.Timestamp(start_date or date.today())
+        rows = [{
+            "name": e.name,
+            "start_date": start_date + pd.Timedelta(days=e.start_day),
+            "end_date": start_date + pd.Timedelta(days=e.end_day),
+            "traffic_pct": e.traffic_pct,
+            "duration_days": e.duration_days,
+            "standalone_days": e.standalone_days,
+            "priority": e.priority,
+            "exclusion_groups": ", ".join(e.exclusion_groups),
+        } for e in sorted(self.experiments, key=lambda e: (e.start_day, e.name))]
+        return pd.DataFrame(rows, columns=[
+            "name", "start_date", "end_date", "traffic_pct", "duration_days", "standalone_days", "priority", "exclusion_groups",
+        ])
+
+
+class _TrafficCalendar:
+    """
+    Share of DAU in use over time, as a step function: `used[k]` applies from day
+    `times[k]` until `times[k + 1]` (the last step runs forever). Breakpoints are
+    found by bisection, so lookups stay logarithmic as experiments are added.
+    """
+
+    def __init__(self):
+        self.times = [0]
+        self.used = [0.0]
+
+    def _split(self, day):
+        k = bisect_right(self.times, day) - 1
+        if self.times[k] != day:
+            self.times.insert(k + 1, day)
+            self.used.insert(k + 1, self.used[k])
+            k += 1
+        return k
+
+    def reserve(self, start, end, pct):
+        i = self._split(start)
+        j = self._split(end)
+        for k in range(i, j):
+            self.used[k] += pct
+
+    def min_free(self, start, end):
+        i = bisect_right(self.times, start) - 1
+        j = bisect_left(self.times, end)
+        return 100.0 - max(self.used[i:j])
+
+
+class _ExclusionIndex:
+    """Booked intervals per exclusion group, sorted by start day."""
+
+    def __init__(self):
+        self._groups = {}
+
+    def blocked(self, groups, start, end):
+        for group in groups:
+            intervals = self._groups.get(group, ())
+            # Only intervals starting before `end` can overlap; the latest of those are checked first.
+            for k in range(bisect_left(intervals, (end,)) - 1, -1, -1):
+                if intervals[k][1] > start:
+                    return True
+        return False
+
+    def book(self, groups, start, end):
+        for group in groups:
+            intervals = self._groups.setdefault(group, [])
+            intervals.insert(bisect_left(intervals, (start, end)), (start, end))
+
+
+def _floor_slice(pct):
+    return math.floor(pct / SLICE_STEP + 1e-9) * SLICE_STEP
+
+
+def _place(experiment, dau, calendar, exclusions):
+    """
+    Earliest-finishing (start day, traffic slice) for one experiment. Candidate starts are
+    the calendar's breakpoints; at each, the largest slice that fits for the whole run wins,
+    since more traffic always means a shorter run.
+    """
+    best = None
+    for start in list(calendar.times):
+        if best and start >= best[0]:
+            break
+        pct = _floor_slice(min(experiment.coverage, calendar.min_free(start, start + 1)))
+        while pct >= MIN_SLICE:
+            duration = calculate_duration(experiment.sample_size, dau, pct)
+            end = start + duration
+            # A smaller slice only runs longer, so a conflict here rules out this start entirely.
+            if exclusions.blocked(experiment.exclusion_groups, start, end):
+                break
+            free = _floor_slice(calendar.min_free(start, end))
+            if free >= pct:
+                if best is None or end < best[0]:
+                    best = (end, start, pct, duration)
+                break
+            pct = free
+    return best
+
+
+def schedule_experiments(experiments, dau):
+    """
+    Packs experiments onto one shared user base of `dau` daily users, assigning each a
+    start day and a fixed traffic slice so no day is oversubscribed and experiments in
+    the same exclusion group never overlap.
+
+    List scheduling: experiments are taken from a priority queue (highest priority first,
+    then longest standalone run) and each is placed where it finishes earliest given what
+    is already booked.
+    """
+    if not dau or dau <= 0:
+        raise ValueError("DAU must be greater than 0 to schedule experiments.")
+
+    schedule = Schedule()
+    calendar, exclusions = _TrafficCalendar(), _ExclusionIndex()
+
+    queue = []
+    for i, experiment in enumerate(experiments):
+        if not experiment.sample_size or not math.isfinite(experiment.sample_size) or experiment.sample_size < 0:
+            schedule.unscheduled.append((experiment.name, "No finite sample size."))
+            continue
+        if experiment.coverage < MIN_SLICE:
+            schedule.unscheduled.append((experiment.name, f"Coverage must be at least {MIN_SLICE:g}%."))
+            continue
+        standalone = calculate_duration(experiment.sample_size, dau, min(experiment.coverage, 100.0))
+        heapq.heappush(queue, (-experiment.priority, -standalone, i, standalone))
+
+    while queue:
+        _, _, i, standalone = heapq.heappop(queue)
+        experiment = experiments[i]
+        end, start, pct, duration = _place(experiment, dau, calendar, exclusions)
+        calendar.reserve(start, end, pct)
+        exclusions.book(experiment.exclusion_groups, start, end)
+        schedule.experiments.append(ScheduledExperiment(
+            name=experiment.name,
+            start_day=start,
+            end_day=end,
+            traffic_pct=pct,
+            duration_days=duration,
+            standalone_days=standalone,
+            priority=experiment.priority,
+            exclusion_groups=tuple(experiment.exclusion_groups),
+        ))
+    return schedule
@@ -0,0 +1,232 @@
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+from scipy.optimize import brentq
+from scipy.special import ndtr, ndtri
+
+# --- Design Configuration ---
+MAX_LOOKS = 10
+GRID_R = 16  # Jennison & Turnbull grid density; 6r - 1 points per stage before trimming
+
+
+# Two-sided alpha is spent symmetrically: each function is the one-sided spending of
+# alpha / 2 per side, doubled.
+
+def obrien_fleming_spending(t, alpha):
+    """Lan-DeMets O'Brien-Fleming-type spending: almost no alpha early, most at the final look."""
+    # Upper tails as ndtr(-x): 1 - ndtr(x) rounds to 0 once it drops below ~1e-16.
+    return 2 * 2 * ndtr(ndtri(alpha / 4) / np.sqrt(t))
+
+
+def pocock_spending(t, alpha):
+    """Lan-DeMets Pocock-type spending: roughly equal nominal boundaries at every look."""
+    return 2 * (alpha / 2) * np.log(1 + (math.e - 1) * t)
+
+
+SPENDING_FUNCTIONS = {
+    "obrien_fleming": obrien_fleming_spending,
+    "pocock": pocock_spending,
+}
+SPENDING_LABELS = {"obrien_fleming": "O'Brien-Fleming", "pocock": "Pocock"}
+
+
+@dataclass(frozen=True)
+class SequentialDesign:
+    """
+    A two-sided group-sequential design on the standardized scale. Sample sizes are
+    fractions of the fixed-design sample size, so one design serves every metric.
+    """
+    looks: int
+    spending: str
+    alpha: float
+    power: float
+    information_fractions: tuple
+    z_boundaries: tuple        # reject H0 at look k when |Z_k| >= z_boundaries[k]
+    cumulative_alpha: tuple    # alpha spent by each look
+    inflation: float           # max sample size / fixed-design sample size
+    stop_probabilities_h1: tuple
+    expected_fraction_h1: float  # expected sample size / fixed-design sample size, under H1
+    expected_fraction_h0: float
+
+    @property
+    def nominal_p_values(self):
+        """Two-sided p-value thresholds equivalent to the z boundaries."""
+        return tuple(float(2 * ndtr(-c)) for c in self.z_boundaries)
+
+    def look_sample_sizes(self, fixed_sample_size):
+        """Cumulative per-variant sample size at each look."""
+        maximum = math.ceil(fixed_sample_size * self.inflation)
+        return [math.ceil(maximum * t) for t in self.information_fractions]
+
+    def expected_sample_size(self, fixed_sample_size, under="h1"):
+        fraction = self.expected_fraction_h1 if under == "h1" else self.expected_fraction_h0
+        return math.ceil(fixed_sample_size * fraction)
+
+
+# --- Recursive Numerical Integration ---
+# Armitage, McPherson & Rowe's recursion as laid out in Jennison & Turnbull (2000), ch. 19:
+# the sub-density of Z_k on the continuation region is carried on a grid with Simpson
+# weights, and each look's crossing probabilities are one vectorized pass over that grid.
+
+def _grid(mean, lower, upper, r=GRID_R):
+    """Grid points and Simpson weights on [lower, upper], dense near `mean` and sparse in the tails."""
+    i = np.arange(1, 6 * r)
+    x = np.where(
+        i < r, mean - 3 - 4 * np.log(r / i),
+        np.where(i <= 5 * r, mean - 3 + 3 * (i - r) / (2 * r), mean + 3 + 4 * np.log(r / np.maximum(6 * r - i, 1))),
+    )
+    x = np.concatenate(([lower], x[(x > lower) & (x < upper)], [upper]))
+    z = np.empty(2 * len(x) - 1)
+    z[0::2], z[1::2] = x, (x[:-1] + x[1:]) / 2
+    d = np.diff(x)
+    w = np.zeros_like(z)
+    w[0:-1:2] += d / 6
+    w[2::2] += d / 6
+    w[1::2] = 4 * d / 6
+    return z, w
+
+
+class _Recursion:
+    """Walks the looks of a design under drift `theta` (the expected Z at full information)."""
+
+    def __init__(self, fractions, theta):
+        self.t = fractions
+        self.theta = theta
+        self.k = 0
+        self.z = self.weighted = None
+
+    def crossing(self, c):
+        """(upper, lower) probabilities of first crossing ±c at the next look."""
+        t, k = self.t, self.k
+        if k == 0:
+            mean = self.theta * math.sqrt(t[0])
+            return float(ndtr(mean - c)), float(ndtr(-c - mean))
+        dt = t[k] - t[k - 1]
+        base = (self.z * math.sqrt(t[k - 1]) + self.theta * dt) / math.sqrt(dt)
+        scale = math.sqrt(t[k] / dt)
+        upper = self.weighted @ ndtr(base - c * scale)
+        lower = self.weighted @ ndtr(-c * scale - base)
+        return float(upper), float(lower)
+
+    def advance(self, c):
+        """Moves to the next look, keeping the sub-density of paths that did not cross ±c."""
+        t, k = self.t, self.k
+        z, w = _grid(self.theta * math.sqrt(t[k]), -c, c)
+        if k == 0:
+            density = np.exp(-0.5 * (z - self.theta * math.sqrt(t[0])) ** 2) / math.sqrt(2 * math.pi)
+        else:
+            dt = t[k] - t[k - 1]
+            base = (self.z * math.sqrt(t[k - 1]) + self.theta * dt) / math.sqrt(dt)
+            scale = math.sqrt(t[k] / dt)
+            kernel = np.exp(-0.5 * (z[:, None] * scale - base[None, :]) ** 2) * (scale / math.sqrt(2 * math.pi))
+            density = kernel @ self.weighted
+        self.z, self.weighted = z, w * density
+        self.k += 1
+
+
+def _boundaries(fractions, alpha, spending):
+    spend = SPENDING_FUNCTIONS[spending]
+    cumulative = [float(min(spend(t, alpha), alpha)) for t in fractions]
+    cumulative[-1] = alpha
+    recursion = _Recursion(fractions, 0.0)
+    boundaries, spent = [], 0.0
+    for k, target in enumerate(cumulative):
+        increment = target - spent
+        if k == 0:
+            c = float(-ndtri(increment / 2))
+        else:
+            c = brentq(lambda c: sum(recursion.crossing(c)) - increment, 0.0, 40.0, xtol=1e-10)
+        boundaries.append(c)
+        spent = target
+        if k < len(fractions) - 1:
+            recursion.advance(c)
+    return boundaries, cumulative
+
+
+def _stopping(fractions, boundaries, theta):
+    """Per-look probabilities of stopping for efficacy (upper, lower) under drift `theta`."""
+    recursion = _Recursion(fractions, theta)
+    upper, lower = [], []
+    for k, c in enumerate(boundaries):
+        u, l = recursion.crossing(c)
+        upper.append(u)
+        lower.append(l)
+        if k < len(fractions) - 1:
+            recursion.advance(c)
+    return upper, lower
+
+
+def _expected_fraction(fractions, stops, inflation):
+    stop_before_end = sum(stops[:-1])
+    return inflation * (sum(t * p for t, p in zip(fractions[:-1], stops[:-1])) + fractions[-1] * (1 - stop_before_end))
+
+
+@lru_cache(maxsize=256)
+def design_group_sequential(looks, alpha=0.05, power=0.8, spending="obrien_fleming", information_fractions=None):
+    """
+    Boundaries, sample-size inflation and expected sample sizes for a two-sided design
+    with `looks` analyses (equally spaced unless `information_fractions` is given).
+    Memoized: the design depends only on these arguments, not on the metric.
+    """
+    if spending not in SPENDING_FUNCTIONS:
+        raise ValueError(f"Unknown spending function '{spending}'.")
+    if not 1 <= looks <= MAX_LOOKS:
+        raise ValueError(f"Looks must be between 1 and {MAX_LOOKS}.")
+    if not (0 < alpha < 1 and 0 < power < 1):
+        raise ValueError("Alpha and power must be between 0 and 1.")
+    fractions = tuple(information_fractions) if information_fractions else tuple((k + 1) / looks for k in range(looks))
+    if len(fractions) != looks or fractions[-1] != 1 or any(b <= a for a, b in zip(fractions, fractions[1:])) or fractions[0] <= 0:
+        raise ValueError("Information fractions must increase strictly and end at 1.")
+
+    boundaries, cumulative = _boundaries(fractions, alpha, spending)
+
+    # Drift the fixed design needs, then the drift at which the sequential design reaches the same power.
+    fixed_drift = float(ndtri(1 - alpha / 2) + ndtri(power))
+    drift = brentq(lambda d: sum(_stopping(fractions, boundaries, d)[0]) - power, fixed_drift, fixed_drift * 2, xtol=1e-8)
+    inflation = (drift / fixed_drift) ** 2
+
+    upper, lower = _stopping(fractions, boundaries, drift)
+    stops_h1 = [u + l for u, l in zip(upper, lower)]
+    stops_h0 = [sum(p) for p in zip(*_stopping(fractions, boundaries, 0.0))]
+    return SequentialDesign(
+        looks=looks,
+        spending=spending,
+        alpha=alpha,
+        power=power,
+        information_fractions=fractions,
+        z_boundaries=tuple(boundaries),
+        cumulative_alpha=tuple(cumulative),
+        inflation=inflation,
+        stop_probabilities_h1=tuple(stops_h1),
+        expected_fraction_h1=_expected_fraction(fractions, stops_h1, inflation),
+        expected_fraction_h0=_expected_fraction(fractions, stops_h0, inflation),
+    )
+
+
+def sequential_plan(design, fixed_sample_size, days_for):
+    """
+    JSON-ready summary of a design applied to one experiment. `days_for` maps an array of
+    per-variant sample sizes to calendar days (e.g. utils.forecasting.forecast_duration).
+    A look the traffic forecast never reaches (inf days) has day None, and so does the
+    expected duration if it depends on such a look.
+    """
+    look_sizes = design.look_sample_sizes(fixed_sample_size)
+    look_days = [float(d) for d in days_for(np.array(look_sizes, dtype=float))]
+    stops = design.stop_probabilities_h1
+    reach_end = 1 - sum(stops[:-1])
+    expected_days = sum(d * p for d, p in zip(look_days[:-1], stops[:-1])) + look_days[-1] * reach_end
+    return {
+        "looks": design.looks,
+        "spending": design.spending,
+        "inflation": design.inflation,
+        "max_sample_size": look_sizes[-1],
+        "expected_sample_size": design.expected_sample_size(fixed_sample_size),
+        "expected_duration": math.ceil(expected_days) if math.isfinite(expected_days) else None,
+        "schedule": [
+            {"look": k + 1, "sample_size": n, "day": int(d) if math.isfinite(d) else None,
+             "z_boundary": c, "p_value": p, "stop_probability": s}
+            for k, (n, d, c, p, s) in enumerate(zip(look_sizes, look_days, design.z_boundaries, design.nominal_p_values, stops))
+        ],
+    }
@@ -0,0 +1,274 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from utils.models import PRD
+
+# --- Governor Configuration ---
+DEFAULT_BUDGET_BYTES = int(os.environ.get("SESSION_MEMORY_BUDGET_MB", 256)) * 2**20
+DEFAULT_IDLE_SECONDS = 900     # sessions idle this long are spilled even under budget
+MIN_IDLE_SECONDS = 30          # never evict a session used more recently than this: it may be mid-run
+SESSION_TTL_SECONDS = 86400    # sessions idle this long are forgotten, snapshot included
+SWEEP_INTERVAL_SECONDS = 60
+
+RESIDENT, SPILLED = "resident", "spilled"
+# What decoding a damaged snapshot can raise; the session then restarts empty, counted as lost.
+_DECODE_ERRORS = (ValueError, TypeError, KeyError, IndexError, AttributeError, EOFError)
+
+
+_ATOMIC = (str, bytes, bytearray, int, float, bool, type(None))
+
+
+def estimate_size(*objs):
+    """
+    Approximate in-memory footprint in bytes: sys.getsizeof summed over the objects and
+    the containers, slotted records and plain objects they reference, each counted once.
+    """
+    seen, stack, size = set(), list(objs), 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, _ATOMIC):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            stack.extend(getattr(obj, name, None) for name in getattr(type(obj), "__slots__", ()))
+            if hasattr(obj, "__dict__"):
+                stack.append(vars(obj))
+    return size
+
+
+class SessionData:
+    """
+    One session's heavy working state: the PRD, its generated hypotheses and the enriched
+    custom hypothesis the user is reviewing, if any. Streamlit's
+    session state keeps only this handle; once attached to a SessionGovernor, every access
+    goes through the governor, which may spill the contents to disk while the session is
+    idle and restores them transparently on the next access.
+    """
+
+    __slots__ = ("_prd", "_hypotheses", "_custom_hypothesis", "_governor", "key", "size", "last_access", "state")
+
+    def __init__(self, prd=None, hypotheses=None, custom_hypothesis=None):
+        self._prd = prd if prd is not None else PRD()
+        self._hypotheses = hypotheses
+        self._custom_hypothesis = custom_hypothesis
+        self._governor = None
+        self.key = None
+        self.size = 0
+        self.last_access = 0.0
+        self.state = RESIDENT
+
+    def _use(self):
+        if self._governor is not None:
+            self._governor.touch(self)
+
+    def _changed(self):
+        if self._governor is not None:
+            self._governor.account(self)
+
+    def changed(self):
+        """Re-measures the state after it was edited in place, e.g. a PRD section rewritten."""
+        self._use()
+        self._changed()
+
+    @property
+    def prd(self):
+        self._use()
+        return self._prd
+
+    @prd.setter
+    def prd(self, value):
+        self._use()
+        self._prd = value
+        self._changed()
+
+    @property
+    def hypotheses(self):
+        self._use()
+        return self._hypotheses
+
+    @hypotheses.setter
+    def hypotheses(self, value):
+        self._use()
+        self._hypotheses = value
+        self._changed()
+
+    @property
+    def custom_hypothesis(self):
+        self._use()
+        return self._custom_hypothesis
+
+    @custom_hypothesis.setter
+    def custom_hypothesis(self, value):
+        self._use()
+        self._custom_hypothesis = value
+        self._changed()
+
+
+class SessionGovernor:
+    """
+    Process-wide accounting of session working state against a memory budget.
+
+    Resident sessions are kept in least-recently-used order. When their state exceeds the
+    budget, the least recently used ones idle for at least `min_idle_seconds` are spilled
+    to the PRD store's session_snapshots table; sessions idle past `idle_seconds` are
+    spilled regardless. Spilled sessions are restored lazily on their next access.
+    Without a store nothing can be spilled, and the governor only keeps the figures.
+    One lock guards everything, so accounting stays consistent across session threads.
+    """
+
+    def __init__(self, store=None, budget_bytes=DEFAULT_BUDGET_BYTES, idle_seconds=DEFAULT_IDLE_SECONDS,
+                 min_idle_seconds=MIN_IDLE_SECONDS, session_ttl=SESSION_TTL_SECONDS, clock=time.monotonic):
+        self.store = store
+        self.budget_bytes = budget_bytes
+        self.idle_seconds = idle_seconds
+        self.min_idle_seconds = min_idle_seconds
+        self.session_ttl = session_ttl
+        self.clock = clock
+        self.resident_bytes = 0
+        self.counters = {"spills": 0, "restores": 0, "evictions": 0, "expired": 0, "lost": 0}
+        # Both least recently used first: every known session, and the resident ones only.
+        self._sessions = OrderedDict()
+        self._resident = OrderedDict()
+        self._lock = threading.RLock()
+        self._last_sweep = clock()
+
+    # --- Session Lifecycle ---
+    def attach(self, session_key, data):
+        """
+        Registers a session's data (again, after it was forgotten) and measures it; call
+        once per full script run. Later edits are re-measured through SessionData, so an
+        attached session is only touched. Also runs the periodic idle sweep.
+        """
+        with self._lock:
+            if self._sessions.get(session_key) is not data:
+                if session_key in self._sessions:
+                    self._forget(session_key)
+                data._governor, data.key = self, session_key
+            self.touch(data)
+            if self.clock() - self._last_sweep >= SWEEP_INTERVAL_SECONDS:
+                self.sweep()
+
+    def touch(self, data):
+        """Marks a session as just used, restoring its state first if it was spilled."""
+        with self._lock:
+            data.last_access = self.clock()
+            registered = data.key in self._sessions
+            self._sessions[data.key] = data  # also re-registers a session forgotten after the TTL
+            self._sessions.move_to_end(data.key)
+            if data.state == SPILLED:
+                self._restore(data)
+            else:
+                self._resident[data.key] = data
+                self._resident.move_to_end(data.key)
+                if not registered:
+                    self.account(data)
+
+    def account(self, data):
+        """Re-measures a resident session and enforces the budget."""
+        with self._lock:
+            if data.state != RESIDENT:
+                return
+            size = estimate_size(data._prd, data._hypotheses, data._custom_hypothesis)
+            self.resident_bytes += size - data.size
+            data.size = size
+            self._enforce_budget()
+
+    def sweep(self):
+        """Spills sessions idle past `idle_seconds` and forgets those idle past `session_ttl`."""
+        with self._lock:
+            now = self.clock()
+            self._last_sweep = now
+            while self._sessions:
+                data = next(iter(self._sessions.values()))
+                if now - data.last_access < self.session_ttl:
+                    break
+                self._forget(data.key)
+                self.counters["expired"] += 1
+            if self.store is None:
+                return
+            while self._resident:
+                data = next(iter(self._resident.values()))
+                if now - data.last_access < self.idle_seconds:
+                    break
+                self._spill(data)
+            self.store.delete_session_snapshots(before=time.time() - self.session_ttl)
+
+    # --- Spilling ---
+    def _enforce_budget(self):
+        if self.store is None:
+            return
+        now = self.clock()
+        while self.resident_bytes > self.budget_bytes and self._resident:
+            data = next(iter(self._resident.values()))
+            if now - data.last_access < self.min_idle_seconds:
+                break  # everyone left is in active use; run over budget rather than stall them
+            self._spill(data)
+            self.counters["evictions"] += 1
+
+    def _spill(self, data):
+        self.store.save_session_snapshot(data.key, data._prd.to_bytes(), data._hypotheses, data._custom_hypothesis)
+        del self._resident[data.key]
+        data._prd, data._hypotheses, data._custom_hypothesis = None, None, None
+        data.state = SPILLED
+        self.resident_bytes -= data.size
+        data.size = 0
+        self.counters["spills"] += 1
+
+    def _restore(self, data):
+        try:
+            snapshot = self.store.pop_session_snapshot(data.key) if self.store is not None else None
+            data._prd = PRD.from_bytes(snapshot[0]) if snapshot else PRD()
+            data._hypotheses, data._custom_hypothesis = snapshot[1:] if snapshot else (None, None)
+        except _DECODE_ERRORS:
+            # A corrupt snapshot, or one from an incompatible version.
+            data._prd, data._hypotheses, data._custom_hypothesis = PRD(), None, None
+            snapshot = None
+        if snapshot is None:
+            self.counters["lost"] += 1
+        data.state = RESIDENT
+        self._resident[data.key] = data
+        self.counters["restores"] += 1
+        self.account(data)
+
+    def _forget(self, key):
+        data = self._sessions.pop(key)
+        if self._resident.pop(key, None) is not None:
+            self.resident_bytes -= data.size
+        elif self.store is not None:
+            self.store.delete_session_snapshots([key])
+        data.size = 0
+
+    # --- Figures ---
+    def stats(self):
+        with self._lock:
+            snapshots, snapshot_bytes = self.store.session_snapshot_stats() if self.store is not None else (0, 0)
+            return {
+                "sessions": len(self._sessions),
+                "resident_sessions": len(self._resident),
+                "spilled_sessions": len(self._sessions) - len(self._resident),
+                "resident_bytes": self.resident_bytes,
+                "budget_bytes": self.budget_bytes,
+                "snapshots": snapshots,
+                "snapshot_bytes": snapshot_bytes,
+                **self.counters,
+            }
+
+    def sessions(self):
+        """Per-session figures, most recently used first."""
+        with self._lock:
+            now = self.clock()
+            return [
+                {"session": key[:8], "state": data.state, "bytes": data.size, "idle_seconds": round(now - data.last_access)}
+                for key, data in reversed(self._sessions.items())
+            ]
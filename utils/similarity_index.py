@@ -0,0 +1,308 @@
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+
+import numpy as np
+
+# --- Index Configuration ---
+DEFAULT_THRESHOLD = 0.6
+N_FEATURES = 2 ** 20
+# New entries are scored from a side index until they reach this share of a bucket (or
+# the minimum), then compacted in; compiled IDF weights drift by about that share meanwhile.
+COMPACT_FRACTION = 1 / 64
+COMPACT_MIN_PENDING = 8
+
+# Fields that make two intro forms "the same experiment idea". Product area and
+# metric type partition the index; the free-text fields are compared by TF-IDF.
+TEXT_FIELDS = ("business_goal", "key_metric", "app_description")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or our the their this to with we e g".split()
+)
+
+
+@dataclass
+class SimilarityMatch:
+    score: float
+    intro_data: dict
+    hypotheses: dict
+
+
+# --- Helpers ---
+def _normalize(text):
+    return " ".join(str(text or "").lower().split())
+
+
+def bucket_key(intro_data):
+    """Entries are only compared within the same product area and metric type."""
+    return (_normalize(intro_data.get("product_area")), _normalize(intro_data.get("metric_type")))
+
+
+def _features(intro_data):
+    """
+    Hashes the intro text into sparse term-frequency features.
+    crc32 is used instead of hash() so feature ids are stable across processes.
+    """
+    counts = {}
+    for field in TEXT_FIELDS:
+        for token in re.findall(r"[a-z0-9]+", _normalize(intro_data.get(field))):
+            if token in STOPWORDS:
+                continue
+            feature = zlib.crc32(f"{field}:{token}".encode()) % N_FEATURES
+            counts[feature] = counts.get(feature, 0) + 1
+    features = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    tf = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))
+    return features, tf
+
+
+def _idf(entries, df):
+    return np.log((1 + entries) / (1 + df)) + 1.0
+
+
+class _Postings:
+    """
+    Compiled postings of a bucket's first `size` entries, sorted by feature id, with
+    TF-IDF weights. Never modified once built, so queries read them without a lock.
+    """
+
+    def __init__(self, features, rows, tf, weights, size):
+        self.features, self.rows, self.tf, self.weights, self.size = features, rows, tf, weights, size
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=np.float32), 0)
+
+    def merged(self, pending):
+        """New postings with the pending (row, features, tf) entries added and every weight recomputed."""
+        size = self.size + len(pending)
+        rows = np.concatenate([self.rows] + [np.full(len(f), r, dtype=np.int64) for r, f, _ in pending])
+        features = np.concatenate([self.features] + [f for _, f, _ in pending])
+        tf = np.concatenate([self.tf] + [t for _, _, t in pending])
+        order = np.argsort(features, kind="stable")
+        features, rows, tf = features[order], rows[order], tf[order]
+
+        # Each entry holds a feature at most once, so a feature's run length is its document frequency.
+        _, df = np.unique(features, return_counts=True)
+        weights = tf * np.repeat(_idf(size, df), df)
+        norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=size))
+        return _Postings(features, rows, tf, (weights / norms[rows]).astype(np.float32), size)
+
+    def df(self, features):
+        """(first posting, document frequency) of each feature."""
+        lo = np.searchsorted(self.features, features, side="left")
+        return lo, np.searchsorted(self.features, features, side="right") - lo
+
+    def scores(self, lo, df, q):
+        """Cosine similarity of every compiled entry to the query weights `q`, given the query terms' postings."""
+        present = df > 0
+        lo, df, q = lo[present], df[present], q[present]
+        # Gather every posting of the query terms at once and sum them per entry.
+        postings = np.arange(df.sum()) + np.repeat(lo - np.cumsum(df) + df, df)
+        contributions = self.weights[postings] * np.repeat(q, df).astype(np.float32)
+        return np.bincount(self.rows[postings], weights=contributions, minlength=self.size)
+
+
+class _SideIndex:
+    """
+    Unsorted postings of the entries added since the last compaction, in row order.
+    Each entry is weighted once, on arrival, with the document frequencies of the
+    compiled postings. Adding returns a new side index, so queries never see a partial one.
+    """
+
+    def __init__(self, features, rows, weights, size):
+        self.features, self.rows, self.weights, self.size = features, rows, weights, size
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), 0)
+
+    def added(self, row, features, tf, postings):
+        weights = tf * _idf(postings.size + 1, postings.df(features)[1] + 1)
+        weights = (weights / np.linalg.norm(weights)).astype(np.float32)
+        return _SideIndex(
+            np.concatenate([self.features, features]),
+            np.concatenate([self.rows, np.full(len(features), row, dtype=np.int64)]),
+            np.concatenate([self.weights, weights]),
+            self.size + 1,
+        )
+
+    def since(self, row):
+        """The side index without the entries before `row`, once those are compiled."""
+        start = np.searchsorted(self.rows, row)
+        return _SideIndex(self.features[start:], self.rows[start:], self.weights[start:], len(np.unique(self.rows[start:])))
+
+    def matches(self, features):
+        """(postings of the query terms, index of each one's term in `features`)."""
+        hits = np.flatnonzero(np.isin(self.features, features))
+        return hits, (self.features[hits][:, None] == features).argmax(axis=1)
+
+
+def _best_match(postings, side, features, tf):
+    """(row, cosine similarity) of the closest entry, compiled or still in the side index, or None."""
+    if not len(features):
+        return None
+    lo, df = postings.df(features)
+    hits, terms = side.matches(features)
+    total = df + np.bincount(terms, minlength=len(features))
+    if not total.any():
+        return None
+    q = tf * _idf(postings.size + side.size, total)
+    q /= np.linalg.norm(q)
+
+    best = None
+    if df.any():
+        scores = postings.scores(lo, df, q)
+        row = int(np.argmax(scores))
+        best = row, float(scores[row])
+    if len(hits):
+        rows, inverse = np.unique(side.rows[hits], return_inverse=True)
+        scores = np.bincount(inverse, weights=side.weights[hits] * q[terms].astype(np.float32))
+        row = int(np.argmax(scores))
+        if best is None or scores[row] > best[1]:
+            best = int(rows[row]), float(scores[row])
+    return best
+
+
+class _Bucket:
+    """
+    An inverted index over one (product area, metric type) partition.
+
+    Postings are kept sorted by feature id, so a query only touches the postings of its
+    own terms instead of scanning every stored entry. New entries go to a side index
+    that queries scan directly; once enough are waiting (see COMPACT_FRACTION), they are
+    merged into new postings in the background while queries keep reading the old ones.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.pending = []
+        self.postings = _Postings.empty()
+        self.side = _SideIndex.empty()
+        self.compacting = False
+        self._compaction_lock = threading.Lock()
+
+    def add(self, features, tf, entry):
+        self.pending.append((len(self.entries), features, tf))
+        self.side = self.side.added(len(self.entries), features, tf, self.postings)
+        self.entries.append(entry)
+
+    def needs_compaction(self):
+        return len(self.pending) >= max(COMPACT_MIN_PENDING, self.postings.size * COMPACT_FRACTION)
+
+    def compact(self, lock):
+        """Merges the pending entries into new postings; `lock` is held only to snapshot and swap."""
+        with self._compaction_lock:
+            with lock:
+                postings, pending = self.postings, list(self.pending)
+            if not pending:
+                return
+            merged = postings.merged(pending)
+            with lock:
+                self.postings = merged
+                self.side = self.side.since(merged.size)
+                del self.pending[:len(pending)]
+
+
+# --- Core Index ---
+class SimilarityIndex:
+    """
+    Local TF-IDF similarity index over past intro form inputs.
+    Used to offer earlier hypotheses instead of calling the LLM again.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._queries = 0
+        self._hits = 0
+        self._query_seconds = 0.0
+
+    def __len__(self):
+        return sum(len(b.entries) for b in self._buckets.values())
+
+    def _bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+        return bucket
+
+    def add(self, intro_data, hypotheses):
+        """Records the hypotheses generated for an intro form."""
+        features, tf = _features(intro_data)
+        if not len(features):
+            return
+        entry = (dict(intro_data), hypotheses)
+        with self._lock:
+            bucket = self._bucket(bucket_key(intro_data))
+            bucket.add(features, tf, entry)
+            compact = bucket.needs_compaction() and not bucket.compacting
+            bucket.compacting = bucket.compacting or compact
+        if compact:
+            threading.Thread(target=self._compact_in_background, args=(bucket,), name="similarity-compaction", daemon=True).start()
+
+    def add_many(self, items):
+        """
+        Records many (intro_data, hypotheses) pairs, e.g. when warming the index from the
+        store, and compiles them in one pass; they become visible to queries by the time it returns.
+        """
+        buckets = {}
+        for intro_data, hypotheses in items:
+            features, tf = _features(intro_data)
+            if not len(features):
+                continue
+            entry = (dict(intro_data), hypotheses)
+            with self._lock:
+                bucket = self._bucket(bucket_key(intro_data))
+                bucket.pending.append((len(bucket.entries), features, tf))
+                bucket.entries.append(entry)
+            buckets[id(bucket)] = bucket
+        for bucket in buckets.values():
+            bucket.compact(self._lock)
+
+    def _compact_in_background(self, bucket):
+        while True:
+            bucket.compact(self._lock)
+            with self._lock:
+                if not bucket.needs_compaction():
+                    bucket.compacting = False
+                    return
+
+    def query(self, intro_data, threshold=None):
+        """
+        Returns the most similar earlier entry as a SimilarityMatch, or None when
+        nothing in the same product area and metric type reaches the threshold.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        start = time.perf_counter()
+        match = None
+        bucket = self._buckets.get(bucket_key(intro_data))
+        if bucket is not None:
+            features, tf = _features(intro_data)
+            with self._lock:
+                postings, side = bucket.postings, bucket.side
+            result = _best_match(postings, side, features, tf)  # outside the lock: both are immutable
+            if result is not None and result[1] >= threshold:
+                entry_intro, hypotheses = bucket.entries[result[0]]
+                match = SimilarityMatch(score=result[1], intro_data=entry_intro, hypotheses=hypotheses)
+
+        with self._lock:
+            self._queries += 1
+            self._hits += match is not None
+            self._query_seconds += time.perf_counter() - start
+        return match
+
+    def stats(self):
+        """Hit-rate and latency figures for monitoring the cache."""
+        with self._lock:
+            queries = self._queries
+            return {
+                "entries": len(self),
+                "buckets": len(self._buckets),
+                "queries": queries,
+                "hits": self._hits,
+                "hit_rate": self._hits / queries if queries else 0.0,
+                "avg_query_ms": 1000 * self._query_seconds / queries if queries else 0.0,
+                "threshold": self.threshold,
+            }
@@ -0,0 +1,165 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils.calculations import calculate_sample_size_continuous
+
+# --- Streaming Configuration ---
+CHUNK_ROWS = 1_000_000  # events read and aggregated at a time
+
+
+@dataclass
+class MetricVariance:
+    """
+    Variance of a ratio metric (sum of `value` / sum of `denominator`) randomised by unit.
+    `std_dev` is the per-unit standard deviation to use with the continuous sample-size
+    formula, which then returns units per variant; `naive_std_dev` is what treating every
+    event as an independent observation would give.
+    """
+    units: int
+    events: int
+    mean: float
+    std_dev: float
+    naive_std_dev: float
+    design_effect: float  # variance of the mean with clustering / variance if events were independent
+
+    @property
+    def events_per_unit(self):
+        return self.events / self.units
+
+    @property
+    def effective_events(self):
+        """Independent events carrying the same information as the clustered sample."""
+        return self.events / self.design_effect
+
+    def sample_size(self, min_detectable_effect, confidence, power):
+        """Units per variant to detect a relative `min_detectable_effect` (%) on this metric."""
+        return calculate_sample_size_continuous(self.mean, self.std_dev, min_detectable_effect, confidence, power)
+
+    def to_dict(self):
+        return {
+            "units": self.units, "events": self.events, "mean": self.mean, "std_dev": self.std_dev,
+            "naive_std_dev": self.naive_std_dev, "design_effect": self.design_effect,
+        }
+
+
+class _Moments:
+    """
+    Count, means and co-moments of (y, x) pairs, merged chunk by chunk with Chan et al.'s
+    pairwise update so large sums never cancel catastrophically.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean_y = self.mean_x = 0.0
+        self.m_yy = self.m_xx = self.m_xy = 0.0
+
+    def add(self, y, x):
+        n = len(y)
+        if not n:
+            return
+        mean_y, mean_x = y.mean(), x.mean()
+        dy, dx = y - mean_y, x - mean_x
+        m_yy, m_xx, m_xy = dy @ dy, dx @ dx, dy @ dx
+
+        total = self.n + n
+        delta_y, delta_x = mean_y - self.mean_y, mean_x - self.mean_x
+        weight = self.n * n / total
+        self.m_yy += m_yy + delta_y * delta_y * weight
+        self.m_xx += m_xx + delta_x * delta_x * weight
+        self.m_xy += m_xy + delta_y * delta_x * weight
+        self.mean_y += delta_y * n / total
+        self.mean_x += delta_x * n / total
+        self.n = total
+
+    def delta_method_variance(self):
+        """
+        Per-observation variance of the ratio of means (delta method):
+        (var(y) - 2 r cov(y, x) + r^2 var(x)) / mean(x)^2 with r = mean(y) / mean(x).
+        """
+        ratio = self.mean_y / self.mean_x
+        ddof = max(self.n - 1, 1)
+        var_y, var_x, cov = self.m_yy / ddof, self.m_xx / ddof, self.m_xy / ddof
+        return max(var_y - 2 * ratio * cov + ratio ** 2 * var_x, 0.0) / self.mean_x ** 2
+
+
+class _UnitAggregator:
+    """
+    Per-unit sums of value and denominator, built from chunks. Unit ids are hashed to
+    64-bit keys kept sorted alongside their sums: each chunk is reduced to one row per key,
+    then added in place where the key is known and inserted where it is new. The table
+    costs 24 bytes per unit whatever the id type, so memory grows with units, not events.
+    """
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.y = np.empty(0)
+        self.x = np.empty(0)
+
+    def add(self, keys, values, denominators):
+        keys, inverse = np.unique(keys, return_inverse=True)
+        y = np.bincount(inverse, weights=values, minlength=len(keys))
+        x = np.bincount(inverse, weights=denominators, minlength=len(keys))
+
+        position = np.searchsorted(self.keys, keys)
+        known = position < len(self.keys)
+        known[known] = self.keys[position[known]] == keys[known]
+        self.y[position[known]] += y[known]
+        self.x[position[known]] += x[known]
+
+        new = ~known
+        if new.any():
+            self.keys = np.insert(self.keys, position[new], keys[new])
+            self.y = np.insert(self.y, position[new], y[new])
+            self.x = np.insert(self.x, position[new], x[new])
+
+def read_event_chunks(source, columns, chunk_rows=CHUNK_ROWS):
+    """Streams the given columns of an event CSV (path or file-like) in chunks of `chunk_rows`."""
+    return pd.read_csv(source, usecols=list(columns), chunksize=chunk_rows)
+
+
+def estimate_metric_variance(chunks, unit_column, value_column, denominator_column=None):
+    """
+    Delta-method, cluster-robust variance of a metric from event-level data.
+
+    `chunks` is an iterable of DataFrames (e.g. from read_event_chunks), one row per event,
+    with the randomisation unit, the metric value and optionally a denominator (each event
+    counts 1 without one, making the metric the mean per event). Events are aggregated per
+    unit with a hashed group-by, one chunk at a time; the metric's variance is then taken
+    across units, which accounts for events of the same unit being correlated.
+    Raises ValueError if the data cannot be used.
+    """
+    units, events = _UnitAggregator(), _Moments()
+    for chunk in chunks:
+        missing = {unit_column, value_column, denominator_column} - set(chunk.columns) - {None}
+        if missing:
+            raise ValueError(f"Event data is missing column(s): {', '.join(sorted(missing))}.")
+        chunk = chunk.dropna(subset=[c for c in (unit_column, value_column, denominator_column) if c])
+        y = pd.to_numeric(chunk[value_column], errors="coerce").to_numpy(dtype=float)
+        x = (pd.to_numeric(chunk[denominator_column], errors="coerce").to_numpy(dtype=float)
+             if denominator_column else np.ones(len(chunk)))
+        usable = np.isfinite(y) & np.isfinite(x)
+        keys = pd.util.hash_array(chunk[unit_column].to_numpy()[usable])
+        units.add(keys, y[usable], x[usable])
+        events.add(y[usable], x[usable])
+
+    if len(units.keys) < 2:
+        raise ValueError("At least two randomisation units are needed to estimate variance.")
+    per_unit = _Moments()
+    per_unit.add(units.y, units.x)
+    if per_unit.mean_x <= 0:
+        raise ValueError("The denominator must have a positive mean.")
+
+    unit_variance = per_unit.delta_method_variance()
+    event_variance = events.delta_method_variance()
+    design_effect = (unit_variance / per_unit.n) / (event_variance / events.n) if event_variance > 0 else float("nan")
+    return MetricVariance(
+        units=per_unit.n,
+        events=events.n,
+        mean=float(per_unit.mean_y / per_unit.mean_x),
+        std_dev=math.sqrt(unit_variance),
+        naive_std_dev=math.sqrt(event_variance),
+        design_effect=float(design_effect),
+    )